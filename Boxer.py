@@ -6,9 +6,17 @@ import adsk.fusion
 import adsk.cam
 import traceback
 import math
+import json
+import collections
+import os
+import shutil
+import tempfile
+import time
+
+from .boxerlib import apitrace, dividers, export, fingerplan, hinge, jobs, \
+    jointcheck, panels, segments, spatial, spec, timing, validate, xform
 
 # TODO:
-# - Make the finger-joint edge into a standalone command.
 # - Temporarily display the origin when the command window is taking input.
 
 # Global list to keep all event handlers in scope.
@@ -17,11 +25,119 @@ handlers = []
 app = None
 ui = None
 
+# The ids of all the commands Boxer adds to the UI.
+COMMAND_IDS = ['BoxerButtonDefId', 'BoxerEditButtonDefId',
+               'BoxerBatchButtonDefId', 'BoxerJointButtonDefId',
+               'BoxerExportButtonDefId', 'BoxerTimingButtonDefId',
+               'BoxerBuildBatchDefId']
+
+# The custom event the planning thread fires when it has planned a box.
+PLAN_READY_EVENT = 'BoxerPlanReadyEventId'
+
+# The attribute group drawBox records each box's spec in, so that it can be
+# edited later.
+ATTRIBUTE_GROUP = 'Boxer'
+
+# The index of the boxes in the active design, if it's been built.
+boxIndex = None
+
+# The batch of boxes being built in the background, if there is one.
+currentBatch = None
+
+# The custom graphics group used to preview the box, if there is one.
+previewGraphics = None
+
+# Records how long each phase of building a box takes, when it's enabled with
+# the Boxer Timings command.
+profiler = timing.Profiler()
+
+# Times every Fusion API call made while building a box, when API tracing is
+# turned on; see startTrace.
+tracer = None
+
+# The functions whose API calls are traced, and where the trace is written
+# when tracing stops. Setting BOXER_TRACE to a file name turns tracing on
+# when the add-in starts, and writes the trace there.
+TRACE_ROOTS = ('drawBox', 'drawBoxes', 'editBox', 'fingerJointEdge',
+               'jointBodies', 'exportBoxes')
+TRACE_FILE = os.path.join(tempfile.gettempdir(), 'boxer-api.folded')
+tracePath = TRACE_FILE
+
 
 # BoxerInputs is used to hold the parameters specified by the user for creating
 # a box.
 class boxerInputs:
-    pass
+    # Build the panels in memory and add them as a single base feature,
+    # instead of as sketches and extrudes.
+    fastSolid = False
+    # Put everything drawBox adds to the timeline into one group.
+    groupTimeline = False
+    dividersX = 0
+    dividersY = 0
+    # The names of the panels to cut living hinges in.
+    hinges = ()
+
+
+# The dialog inputs that feed into boxerInputs, and the boxerInputs fields they
+# set. Changes to any other input (like the fingerInfo text) don't invalidate
+# the session's cache.
+BOX_INPUT_FIELDS = {
+    'lid': 'drawLid',
+    'baseLength': 'length',
+    'baseWidth': 'width',
+    'height': 'height',
+    'dimsInOut': 'dimsOuter',
+    'thickness': 'thickness',
+    'fingerScale': 'fingerScale',
+    'dividersX': 'dividersX',
+    'dividersY': 'dividersY',
+    'hinges': 'hinges',
+}
+
+
+class BoxerSession:
+    """BoxerSession caches work between the events of a single run of the
+    Boxer dialog. Fusion fires validateInputs and executePreview far more often
+    than the inputs actually change, so the inputs are only re-read after the
+    inputChanged handler has seen a change, and the validation verdict and the
+    preview are only recomputed when the box's signature changes.
+    """
+
+    def __init__(self):
+        self.inputs = None
+        self.changed = set(BOX_INPUT_FIELDS)
+        self.validator = validate.Validator()
+        # The fields changed since the last validation; None means all of them.
+        self.unvalidated = None
+        self.errors = []
+        self.verdictSignature = None
+        self.previewSignature = None
+
+    def inputChanged(self, inputId):
+        field = BOX_INPUT_FIELDS.get(inputId)
+        if field is None:
+            return
+        self.changed.add(inputId)
+        if self.unvalidated is not None:
+            self.unvalidated.add(field)
+
+    def validate(self, inputs):
+        """Returns the list of problems with the inputs, only re-checking the
+        rules that depend on the fields that have changed."""
+        sig = spec.signature(inputs)
+        if sig != self.verdictSignature:
+            self.errors = self.validator.validate(inputs, self.unvalidated)
+            self.unvalidated = set()
+            self.verdictSignature = sig
+        return self.errors
+
+    def readInputs(self, commandInputs, writeBack=False):
+        """Returns the dialog's inputs, reading them again only if one of them
+        has changed since the last read."""
+        if self.inputs is None or self.changed:
+            self.inputs = getInputs(commandInputs, writeBack)
+            self.changed = set()
+        return self.inputs
 
 
 def run(context):
@@ -30,6 +146,9 @@ def run(context):
         app = adsk.core.Application.get()
         ui = app.userInterface
 
+        if os.environ.get('BOXER_TRACE'):
+            startTrace(os.environ['BOXER_TRACE'])
+
         cmdDefs = ui.commandDefinitions
         buttonBoxer = cmdDefs.addButtonDefinition(
             'BoxerButtonDefId',
@@ -43,9 +162,86 @@ def run(context):
         buttonBoxer.commandCreated.add(buttonCreated)
         handlers.append(buttonCreated)
 
+        buttonEdit = cmdDefs.addButtonDefinition(
+            'BoxerEditButtonDefId',
+            'Edit Finger-Jointed Box',
+            ("Change the dimensions of a box inserted by Boxer. The box's "
+             "sketches and extrudes are updated in place."),
+            './Resources')
+
+        editCreated = BoxerEditCommandCreatedHandler()
+        buttonEdit.commandCreated.add(editCreated)
+        handlers.append(editCreated)
+
+        buttonBatch = cmdDefs.addButtonDefinition(
+            'BoxerBatchButtonDefId',
+            'Finger-Jointed Boxes from File',
+            ("Insert a set of finger-jointed boxes described by a CSV or JSON "
+             "spec file, with lengths in millimeters. Boxes with the same "
+             "spec share a component."),
+            './Resources')
+
+        batchCreated = BoxerBatchCommandCreatedHandler()
+        buttonBatch.commandCreated.add(batchCreated)
+        handlers.append(batchCreated)
+
+        buttonJoint = cmdDefs.addButtonDefinition(
+            'BoxerJointButtonDefId',
+            'Finger-Joint Bodies',
+            ("Cut finger joints wherever the selected bodies overlap at their "
+             "edges. The bodies must be in the same component."),
+            './Resources')
+
+        jointCreated = BoxerJointCommandCreatedHandler()
+        buttonJoint.commandCreated.add(jointCreated)
+        handlers.append(jointCreated)
+
+        buttonExport = cmdDefs.addButtonDefinition(
+            'BoxerExportButtonDefId',
+            'Export Box Panels as DXF',
+            ("Write a DXF file for every panel of every box Boxer has "
+             "inserted into the design, ready for laser cutting, along with "
+             "a manifest listing them."),
+            './Resources')
+
+        exportCreated = BoxerExportCommandCreatedHandler()
+        buttonExport.commandCreated.add(exportCreated)
+        handlers.append(exportCreated)
+
+        buttonTiming = cmdDefs.addButtonDefinition(
+            'BoxerTimingButtonDefId',
+            'Boxer Timings',
+            ("Turn timing of Boxer's phases on or off, and show how long the "
+             "last few boxes took to build."),
+            './Resources')
+
+        timingCreated = BoxerTimingCommandCreatedHandler()
+        buttonTiming.commandCreated.add(timingCreated)
+        handlers.append(timingCreated)
+
+        # Not in any panel: it's run when a batch's first plan is ready, so
+        # that the batch is built inside a command, as one step to undo.
+        buildBatch = cmdDefs.addButtonDefinition(
+            'BoxerBuildBatchDefId', 'Build Finger-Jointed Boxes',
+            'Build the boxes of a batch as they are planned.')
+
+        buildBatchCreated = BoxerBuildBatchCommandCreatedHandler()
+        buildBatch.commandCreated.add(buildBatchCreated)
+        handlers.append(buildBatchCreated)
+
+        planReady = app.registerCustomEvent(PLAN_READY_EVENT)
+        onPlanReady = BoxerPlanReadyHandler()
+        planReady.add(onPlanReady)
+        handlers.append(onPlanReady)
+
         createPanel = ui.allToolbarPanels.itemById('SolidCreatePanel')
 
         buttonControl = createPanel.controls.addCommand(buttonBoxer)
+        createPanel.controls.addCommand(buttonEdit)
+        createPanel.controls.addCommand(buttonBatch)
+        createPanel.controls.addCommand(buttonJoint)
+        createPanel.controls.addCommand(buttonExport)
+        createPanel.controls.addCommand(buttonTiming)
 
     except:
         if ui:
@@ -58,14 +254,23 @@ def stop(context):
         app = adsk.core.Application.get()
         ui = app.userInterface
 
-        cmdDef = ui.commandDefinitions.itemById('BoxerButtonDefId')
-        if cmdDef:
-            cmdDef.deleteMe()
+        clearCaches()
+        global currentBatch
+        if currentBatch is not None:
+            currentBatch.job.cancel()
+            currentBatch = None
+        app.unregisterCustomEvent(PLAN_READY_EVENT)
+        stopTrace()
 
         createPanel = ui.allToolbarPanels.itemById('SolidCreatePanel')
-        cntrl = createPanel.controls.itemById('BoxerButtonDefId')
-        if cntrl:
-            cntrl.deleteMe()
+        for cmdId in COMMAND_IDS:
+            cmdDef = ui.commandDefinitions.itemById(cmdId)
+            if cmdDef:
+                cmdDef.deleteMe()
+
+            cntrl = createPanel.controls.itemById(cmdId)
+            if cntrl:
+                cntrl.deleteMe()
 
     except:
         if ui:
@@ -84,64 +289,32 @@ class BoxerCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             unitsMgr = des.unitsManager
             lenUnit = unitsMgr.defaultLengthUnits
 
-            # Command inputs
-            inputs = cmd.commandInputs
-
-            # This control let the user specify a construction plane to build
-            # the box on, but that introduces some corner cases, and it's not
-            # obviously valuable, since the box can just be moved after it's
-            # built.
-            # plane = inputs.addSelectionInput(
-            #     'plane', 'Plane', 'select plane, planar face, or sketch profile for the base')
-            # plane.addSelectionFilter('PlanarFaces')
-            # plane.addSelectionFilter('ConstructionPlanes')
-
-            lid = inputs.addBoolValueInput('lid', 'Add a lid', True)
-            lid.tooltip = ("If this option is selected, a lid will be generated "
-                           "for the box. The lid will be finger-jointed to the "
-                           "sides it touches.")
-
-            length = inputs.addValueInput(
-                'baseLength', 'Box length', lenUnit, adsk.core.ValueInput.createByReal(0))
-            length.tooltip = ("Enter the length of the box along the X-axis")
-
-            width = inputs.addValueInput(
-                'baseWidth', 'Box width', lenUnit, adsk.core.ValueInput.createByReal(0))
-            width.tooltip = ("Enter the width of the box along the Y-axis")
-
-            height = inputs.addValueInput(
-                'height', 'Box Height', lenUnit, adsk.core.ValueInput.createByReal(0))
-            height.tooltip = ("Enter the height of the box along the Z-axis")
-
-            radioInOutGroup = inputs.addRadioButtonGroupCommandInput(
-                'dimsInOut', 'Dimensions are')
-            radioItems = radioInOutGroup.listItems
-            radioItems.add("outer", True)
-            radioItems.add("inner", False)
-
-            thickness = inputs.addValueInput(
-                'thickness', 'Material thickness', lenUnit, adsk.core.ValueInput.createByReal(0))
-            thickness.tooltip = ("Enter the exact thickness of the material here. "
-                                 "The same thickness is used for all sides of the "
-                                 "box.")
-            fingerScale = inputs.addIntegerSliderCommandInput(
-                'fingerScale', 'Finger scale', 1, 20)
-            fingerScale.valueOne = 5
-            fingerScale.tooltip = ("The finger size is set as a multiple of the "
-                                   "material thickness. The exact size of the "
-                                   "fingers will be adjusted before drawing so "
-                                   "that there are at least 3 fingers per side.")
-
-            fingerInfo = inputs.addTextBoxCommandInput(
-                'fingerInfo', '', "", 2, True)
+            addBoxInputs(cmd.commandInputs, lenUnit)
+            fastSolid = cmd.commandInputs.addBoolValueInput(
+                'fastSolid', 'Fast solid', True)
+            fastSolid.tooltip = ("Build the box's bodies directly, as a single "
+                                 "base feature, instead of from sketches and "
+                                 "extrudes. This is much quicker in a large "
+                                 "design, but the box can't be edited "
+                                 "afterwards.")
+            groupTimeline = cmd.commandInputs.addBoolValueInput(
+                'groupTimeline', 'Group in timeline', True)
+            groupTimeline.tooltip = ("Put the box's component, sketches and "
+                                     "features in a single timeline group. "
+                                     "This tidies the timeline, but Fusion "
+                                     "still recomputes every feature in "
+                                     "the group; only Fast solid makes "
+                                     "the box quicker to recompute.")
+
+            session = BoxerSession()
 
             # Connect to the validate inputs event
-            onValidate = BoxerCommandValidateHandler()
+            onValidate = BoxerCommandValidateHandler(session)
             cmd.validateInputs.add(onValidate)
             handlers.append(onValidate)
 
             # Connect to the execute preview event
-            onPreview = BoxerCommandPreviewHandler()
+            onPreview = BoxerCommandPreviewHandler(session)
             cmd.executePreview.add(onPreview)
             handlers.append(onPreview)
 
@@ -151,32 +324,119 @@ class BoxerCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             handlers.append(onExecute)
 
             # Connect to the inputChanged event
-            onInputChanged = BoxerCommandInputChangedHandler()
+            onInputChanged = BoxerCommandInputChangedHandler(session)
             cmd.inputChanged.add(onInputChanged)
             handlers.append(onInputChanged)
 
+            # Connect to the destroy event
+            onDestroy = BoxerCommandDestroyHandler()
+            cmd.destroy.add(onDestroy)
+            handlers.append(onDestroy)
+
         except:
             ui.messageBox('Boxer failed:\n{}'.format(
                 traceback.format_exc()))
 
 
+def addBoxInputs(inputs, lenUnit):
+    """Adds the inputs that describe a box to a command's dialog."""
+    # This control let the user specify a construction plane to build
+    # the box on, but that introduces some corner cases, and it's not
+    # obviously valuable, since the box can just be moved after it's
+    # built.
+    # plane = inputs.addSelectionInput(
+    #     'plane', 'Plane', 'select plane, planar face, or sketch profile for the base')
+    # plane.addSelectionFilter('PlanarFaces')
+    # plane.addSelectionFilter('ConstructionPlanes')
+
+    lid = inputs.addBoolValueInput('lid', 'Add a lid', True)
+    lid.tooltip = ("If this option is selected, a lid will be generated "
+                   "for the box. The lid will be finger-jointed to the "
+                   "sides it touches.")
+
+    length = inputs.addValueInput(
+        'baseLength', 'Box length', lenUnit, adsk.core.ValueInput.createByReal(0))
+    length.tooltip = ("Enter the length of the box along the X-axis")
+
+    width = inputs.addValueInput(
+        'baseWidth', 'Box width', lenUnit, adsk.core.ValueInput.createByReal(0))
+    width.tooltip = ("Enter the width of the box along the Y-axis")
+
+    height = inputs.addValueInput(
+        'height', 'Box Height', lenUnit, adsk.core.ValueInput.createByReal(0))
+    height.tooltip = ("Enter the height of the box along the Z-axis")
+
+    radioInOutGroup = inputs.addRadioButtonGroupCommandInput(
+        'dimsInOut', 'Dimensions are')
+    radioItems = radioInOutGroup.listItems
+    radioItems.add("outer", True)
+    radioItems.add("inner", False)
+
+    thickness = inputs.addValueInput(
+        'thickness', 'Material thickness', lenUnit, adsk.core.ValueInput.createByReal(0))
+    thickness.tooltip = ("Enter the exact thickness of the material here. "
+                         "The same thickness is used for all sides of the "
+                         "box.")
+    fingerScale = inputs.addIntegerSliderCommandInput(
+        'fingerScale', 'Finger scale', 1, 20)
+    fingerScale.valueOne = 5
+    fingerScale.tooltip = ("The finger size is set as a multiple of the "
+                           "material thickness. The exact size of the "
+                           "fingers will be adjusted before drawing so "
+                           "that there are at least 3 fingers per side.")
+
+    dividersX = inputs.addIntegerSpinnerCommandInput(
+        'dividersX', 'Dividers across length', 0, 50, 1, 0)
+    dividersX.tooltip = ("The number of dividers across the length of the "
+                         "box. They're spaced to make equal compartments.")
+    dividersY = inputs.addIntegerSpinnerCommandInput(
+        'dividersY', 'Dividers across width', 0, 50, 1, 0)
+    dividersY.tooltip = ("The number of dividers across the width of the "
+                         "box. Dividers that cross are half-lapped.")
+
+    hinges = inputs.addDropDownCommandInput(
+        'hinges', 'Living hinges',
+        adsk.core.DropDownStyles.CheckBoxDropDownStyle)
+    for name in panels.PANEL_NAMES:
+        hinges.listItems.add(name, False)
+    hinges.tooltip = ("The panels to cut a living hinge in: rows of "
+                      "staggered slits that let the panel bend. The hinge "
+                      "fills the panel, clear of its fingers and of any "
+                      "divider slots.")
+
+    inputs.addTextBoxCommandInput('fingerInfo', '', "", 2, True)
+
+
+def setBoxInputs(inputs, values):
+    """Fills in the inputs added by addBoxInputs from a dict of spec fields."""
+    inputs.itemById('lid').value = values['drawLid']
+    for inputId, field in BOX_INPUT_FIELDS.items():
+        if field in spec.LENGTH_FIELDS:
+            inputs.itemById(inputId).value = values[field]
+    inputs.itemById('fingerScale').valueOne = values['fingerScale']
+    inputs.itemById('dividersX').value = values['dividersX']
+    inputs.itemById('dividersY').value = values['dividersY']
+    for item in inputs.itemById('hinges').listItems:
+        item.isSelected = item.name in values['hinges']
+    for item in inputs.itemById('dimsInOut').listItems:
+        item.isSelected = (item.name == 'outer') == values['dimsOuter']
+
+
 class BoxerCommandValidateHandler(adsk.core.ValidateInputsEventHandler):
     """Handler for checking whether parameters are valid"""
 
-    def __init__(self):
+    def __init__(self, session):
         super().__init__()
+        self.session = session
 
     def notify(self, args):
         try:
             vArgs = adsk.core.ValidateInputsEventArgs.cast(args)
-            inputs = getInputs(vArgs.inputs, writeBack=True)
-            if inputs.plane is None:
-                vArgs.areInputsValid = False
-            if inputs.thickness == 0:
-                vArgs.areInputsValid = False
-            for dim in [inputs.length, inputs.width, inputs.height]:
-                if dim <= 2*inputs.thickness:
-                    vArgs.areInputsValid = False
+            inputs = self.session.readInputs(vArgs.inputs, writeBack=True)
+            # This also checks that there's room for fingers on every edge, so
+            # the preview never starts on a box that can't be built.
+            errors = self.session.validate(inputs)
+            vArgs.areInputsValid = inputs.plane is not None and not errors
         except:
             ui.messageBox('Boxer failed:\n{}'.format(traceback.format_exc()))
 
@@ -184,16 +444,23 @@ class BoxerCommandValidateHandler(adsk.core.ValidateInputsEventHandler):
 class BoxerCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
     """Handler for changed inputs"""
 
-    def __init__(self):
+    def __init__(self, session):
         super().__init__()
+        self.session = session
 
     def notify(self, args):
         try:
-            # If a thickness is set, calculate & display the approximate width
-            # of the fingers.
             eventArgs = adsk.core.InputChangedEventArgs.cast(args)
+            changedId = eventArgs.input.id
+            self.session.inputChanged(changedId)
+
+            # If a thickness is set, calculate & display the approximate width
+            # of the fingers. This only depends on the thickness and the
+            # finger scale, so leave it alone when anything else changes.
+            if changedId not in ('thickness', 'fingerScale'):
+                return
             inp = eventArgs.inputs
-            inputs = getInputs(inp)
+            inputs = self.session.readInputs(inp)
             fingerInfo = inp.itemById('fingerInfo')
             if inputs.thickness > 0:
                 des = adsk.fusion.Design.cast(app.activeProduct)
@@ -213,16 +480,30 @@ class BoxerCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
 class BoxerCommandPreviewHandler(adsk.core.CommandEventHandler):
     """Handler for the preview event"""
 
-    def __init__(self):
+    def __init__(self, session):
         super().__init__()
+        self.session = session
 
     def notify(self, args):
         try:
             eventArgs = adsk.core.CommandEventArgs.cast(args)
             inp = eventArgs.command.commandInputs
-            inputs = getInputs(inp)
-            drawBox(inputs)
-            eventArgs.isValidResult = True
+            inputs = self.session.readInputs(inp)
+            if self.session.validate(inputs):
+                # Don't leave the last valid box on screen next to the error.
+                clearPreview()
+                self.session.previewSignature = None
+                return
+            sig = spec.signature(inputs)
+            # Only redraw the preview if the box has changed, or if Fusion has
+            # thrown the last one away.
+            if (sig != self.session.previewSignature or
+                    previewGraphics is None or not previewGraphics.isValid):
+                drawPreview(inputs)
+                self.session.previewSignature = sig
+            # The preview is only graphics, so the execute handler still has to
+            # build the real box.
+            eventArgs.isValidResult = False
         except:
             ui.messageBox('Boxer preview failed:\n{}'.format(
                 traceback.format_exc()))
@@ -239,13 +520,733 @@ class BoxerCommandExecuteHandler(adsk.core.CommandEventHandler):
             eventArgs = adsk.core.CommandEventArgs.cast(args)
             inp = eventArgs.command.commandInputs
             inputs = getInputs(inp)
-            drawBox(inputs)
+            clearPreview()
+            boxPanels = spec.specPanels(inputs)
+            progress = BoxerProgress('Building the box: %v of %m panels',
+                                     len(boxPanels))
+            try:
+                drawBox(inputs, boxPanels=boxPanels, progress=progress.check)
+            except jobs.Cancelled:
+                pass
+            finally:
+                progress.close()
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerCommandDestroyHandler(adsk.core.CommandEventHandler):
+    """Handler for the destroy event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            clearPreview()
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerEditCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    """Handler for the edit command. The dialog is the same as the one used to
+    create a box, with a selection for the box to edit; selecting a box fills
+    in its current dimensions."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
+            cmd = eventArgs.command
+            des = adsk.fusion.Design.cast(app.activeProduct)
+            lenUnit = des.unitsManager.defaultLengthUnits
+
+            box = cmd.commandInputs.addSelectionInput(
+                'box', 'Box', 'Select the box to edit')
+            box.addSelectionFilter('Occurrences')
+            box.setSelectionLimits(1, 1)
+            identical = cmd.commandInputs.addBoolValueInput(
+                'identical', 'Change identical boxes', True, '', False)
+            identical.tooltip = ("Make the same change to every other box in "
+                                 "the design that was built with the same "
+                                 "settings as the selected one.")
+            addBoxInputs(cmd.commandInputs, lenUnit)
+
+            session = BoxerSession()
+
+            onValidate = BoxerEditCommandValidateHandler(session)
+            cmd.validateInputs.add(onValidate)
+            handlers.append(onValidate)
+
+            onExecute = BoxerEditCommandExecuteHandler()
+            cmd.execute.add(onExecute)
+            handlers.append(onExecute)
+
+            onInputChanged = BoxerEditCommandInputChangedHandler(session)
+            cmd.inputChanged.add(onInputChanged)
+            handlers.append(onInputChanged)
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(
+                traceback.format_exc()))
+
+
+def selectedBox(inputs):
+    """Returns the component of the box selected in the edit dialog, or None
+    if nothing is selected or the selection isn't a Boxer box."""
+    sel = inputs.itemById('box')
+    if sel.selectionCount == 0:
+        return None
+    occurrence = adsk.fusion.Occurrence.cast(sel.selection(0).entity)
+    if occurrence is None or loadBoxSpec(occurrence.component) is None:
+        return None
+    return occurrence.component
+
+
+class BoxerEditCommandValidateHandler(BoxerCommandValidateHandler):
+    """Handler for checking the edit dialog's inputs. As well as a valid box,
+    they need a Boxer box to apply it to."""
+
+    def notify(self, args):
+        super().notify(args)
+        try:
+            vArgs = adsk.core.ValidateInputsEventArgs.cast(args)
+            if selectedBox(vArgs.inputs) is None:
+                vArgs.areInputsValid = False
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(traceback.format_exc()))
+
+
+class BoxerEditCommandInputChangedHandler(BoxerCommandInputChangedHandler):
+    """Handler for changed inputs in the edit dialog. When a box is selected,
+    its spec is loaded into the dialog."""
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.InputChangedEventArgs.cast(args)
+            if eventArgs.input.id == 'box':
+                component = selectedBox(eventArgs.inputs)
+                if component is not None:
+                    values, _ = loadBoxSpec(component)
+                    setBoxInputs(eventArgs.inputs, values)
+                    for inputId in BOX_INPUT_FIELDS:
+                        self.session.inputChanged(inputId)
+                return
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(traceback.format_exc()))
+        super().notify(args)
+
+
+class BoxerEditCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """Handler for the edit command's execute event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandEventArgs.cast(args)
+            inp = eventArgs.command.commandInputs
+            inputs = getInputs(inp)
+            components = [selectedBox(inp)]
+            skipped = []
+            if inp.itemById('identical').value:
+                others, skipped = identicalBoxes(components[0], inputs)
+                components += others
+            retargetBoxes(components, inputs)
+            if skipped:
+                ui.messageBox(
+                    'Boxer left {} identical boxes as they were:\n{}'.format(
+                        len(skipped), '\n'.join(
+                            '{}: {}'.format(c.name, problem)
+                            for c, problem in skipped)))
+        except ValueError as e:
+            ui.messageBox('Boxer could not edit the box:\n{}'.format(e))
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerBatchCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    """Handler for the batch command. The command has no inputs of its own; it
+    asks for a spec file when it's executed."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
+            onExecute = BoxerBatchCommandExecuteHandler()
+            eventArgs.command.execute.add(onExecute)
+            handlers.append(onExecute)
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(
+                traceback.format_exc()))
+
+
+class BoxerBatchCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """Handler for the batch command's execute event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            dlg = ui.createFileDialog()
+            dlg.title = 'Open Box Spec File'
+            dlg.filter = 'Box specs (*.csv *.json);;All files (*.*)'
+            if dlg.showOpen() != adsk.core.DialogResults.DialogOK:
+                return
+
+            des = adsk.fusion.Design.cast(app.activeProduct)
+            # Spec files are in millimeters; Fusion works in centimeters.
+            scale = des.unitsManager.convert(1, 'mm', 'cm')
+            specs = spec.loadSpecs(dlg.filename, scale)
+            global currentBatch
+            if currentBatch is not None:
+                ui.messageBox('Boxer is still building the last batch.')
+                return
+            currentBatch = BatchRun(specs)
+        except ValueError as e:
+            # Every box is checked before any are built, so nothing has been
+            # drawn yet.
+            ui.messageBox('Boxer could not build the boxes:\n{}'.format(e))
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerPlanReadyHandler(adsk.core.CustomEventHandler):
+    """Handler for the event the planning thread fires when it has planned a
+    box. It runs on the main thread, and the first time it's called for a
+    batch it runs the hidden build command, which builds the whole batch."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            if currentBatch is not None and not currentBatch.building:
+                currentBatch.building = True
+                cmdDef = ui.commandDefinitions.itemById('BoxerBuildBatchDefId')
+                cmdDef.execute()
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerBuildBatchCommandCreatedHandler(
+        adsk.core.CommandCreatedEventHandler):
+    """Handler for the hidden command that builds a batch. It has no inputs,
+    and builds the batch as soon as it's executed."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
+            onExecute = BoxerBuildBatchCommandExecuteHandler()
+            eventArgs.command.execute.add(onExecute)
+            handlers.append(onExecute)
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(
+                traceback.format_exc()))
+
+
+class BoxerBuildBatchCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """Handler for the build command's execute event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            if currentBatch is not None:
+                currentBatch.build()
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerProgress:
+    """Shows a ProgressDialog that counts up to total. It only appears if the
+    work takes more than a second. check lets Fusion process events, so that
+    the dialog is redrawn and its Cancel button works, and raises
+    jobs.Cancelled if it's been clicked."""
+
+    def __init__(self, message, total):
+        self.dialog = ui.createProgressDialog()
+        self.dialog.isCancelButtonShown = True
+        self.dialog.show('Boxer', message, 0, total, 1)
+
+    def check(self, count=0):
+        adsk.doEvents()
+        if self.dialog.wasCancelled:
+            raise jobs.Cancelled()
+        self.dialog.progressValue += count
+
+    def close(self):
+        self.dialog.hide()
+
+
+class BatchRun:
+    """BatchRun builds a batch of boxes while they're planned on a worker
+    thread. The worker fires PLAN_READY_EVENT after planning each unique box;
+    the first of those runs the hidden build command, whose execute handler
+    calls build. Building the batch inside a single command makes it one step
+    in Fusion's undo history. Cancelling the progress dialog stops both the
+    worker and the building."""
+
+    # How long build waits for the next plan before checking the progress
+    # dialog again, in seconds.
+    WAIT = 0.05
+
+    def __init__(self, specs):
+        self.batch = BoxBatch(specs)
+        self.groups = spec.groupSpecs(self.batch.specs)
+        self.drawn = 0
+        self.building = False
+        self.progress = BoxerProgress('Building boxes: %v of %m',
+                                      len(self.batch.specs))
+        self.job = jobs.Job(
+            spec.specPanels, [self.batch.specs[g[0]] for g in self.groups],
+            lambda: app.fireCustomEvent(PLAN_READY_EVENT)).start()
+
+    def build(self):
+        """Builds every box as its plan comes in, until the job has finished or
+        been cancelled. The progress dialog is checked between panels, and
+        while waiting for plans, so a cancel is noticed even when nothing is
+        being built."""
+        try:
+            while not self.job.finished:
+                for k, boxPanels in self.job.ready(self.WAIT):
+                    for i in self.groups[k]:
+                        self.batch.draw(i, boxPanels,
+                                        lambda count: self.progress.check())
+                        self.drawn += 1
+                        self.progress.check(1)
+                self.progress.check()
+        except jobs.Cancelled:
+            self.job.cancel()
+        except Exception:
+            # Leave the error to the handler to show, but don't leave the
+            # worker running or the batch in the way of the next one.
+            self.job.cancel()
+            self.stop()
+            raise
+        self.finish()
+
+    def stop(self):
+        """Closes the progress dialog and finishes the batch, so that another
+        can be started. Returns the number of unique boxes built."""
+        global currentBatch
+        currentBatch = None
+        self.progress.close()
+        return self.batch.finish()
+
+    def finish(self):
+        built = self.stop()
+        if self.job.error is not None:
+            ui.messageBox('Boxer failed:\n{}'.format(self.job.error))
+        elif self.drawn < len(self.batch.specs):
+            ui.messageBox('Cancelled after inserting {} of {} boxes.'.format(
+                self.drawn, len(self.batch.specs)))
+        else:
+            ui.messageBox('Inserted {} boxes ({} unique).'.format(
+                self.drawn, built))
+
+
+class BoxerJointCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    """Handler for the finger-joint command, which asks for the bodies to
+    joint."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
+            cmd = eventArgs.command
+            sel = cmd.commandInputs.addSelectionInput(
+                'bodies', 'Bodies', 'Select the bodies to finger-joint')
+            sel.addSelectionFilter('SolidBodies')
+            sel.setSelectionLimits(2, 0)
+
+            onExecute = BoxerJointCommandExecuteHandler()
+            cmd.execute.add(onExecute)
+            handlers.append(onExecute)
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(
+                traceback.format_exc()))
+
+
+class BoxerJointCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """Handler for the finger-joint command's execute event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandEventArgs.cast(args)
+            sel = eventArgs.command.commandInputs.itemById('bodies')
+            bodies = []
+            for i in range(sel.selectionCount):
+                body = adsk.fusion.BRepBody.cast(sel.selection(i).entity)
+                # Work on the bodies themselves, not on their occurrences.
+                if body.assemblyContext:
+                    body = body.nativeObject
+                bodies.append(body)
+
+            component = bodies[0].parentComponent
+            for body in bodies:
+                if body.parentComponent != component:
+                    raise ValueError(
+                        'the bodies must all be in the same component')
+            jointBodies(component, bodies)
+        except ValueError as e:
+            ui.messageBox('Boxer could not joint the bodies:\n{}'.format(e))
         except:
             if ui:
                 ui.messageBox('Boxer failed:\n{}'.format(
                     traceback.format_exc()))
 
 
+class BoxerExportCommandCreatedHandler(
+        adsk.core.CommandCreatedEventHandler):
+    """Handler for the export command. It asks for the folder to write to
+    when it's executed."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
+            cmd = eventArgs.command
+            compress = cmd.commandInputs.addBoolValueInput(
+                'compress', 'Compress files', True, '', False)
+            compress.tooltip = "Write the files gzipped, as .dxf.gz."
+
+            onExecute = BoxerExportCommandExecuteHandler()
+            cmd.execute.add(onExecute)
+            handlers.append(onExecute)
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(
+                traceback.format_exc()))
+
+
+class BoxerExportCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """Handler for the export command's execute event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandEventArgs.cast(args)
+            inputs = eventArgs.command.commandInputs
+            dlg = ui.createFolderDialog()
+            dlg.title = 'Export Box Panels'
+            if dlg.showDialog() != adsk.core.DialogResults.DialogOK:
+                return
+            manifest = exportBoxes(dlg.folder,
+                                   inputs.itemById('compress').value)
+            if not manifest['files']:
+                ui.messageBox('There are no Boxer boxes in the design.')
+                return
+            ui.messageBox(
+                'Wrote {} panels of {} boxes in {:.1f}s; {} lists '
+                'them.'.format(len(manifest['files']), manifest['boxes'],
+                               manifest['seconds'], export.MANIFEST_NAME))
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+class BoxerTimingCommandCreatedHandler(
+        adsk.core.CommandCreatedEventHandler):
+    """Handler for the timings command, which shows the profiler's report and
+    lets it be turned on or off."""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
+            cmd = eventArgs.command
+            inputs = cmd.commandInputs
+            inputs.addBoolValueInput(
+                'enabled', 'Record timings', True, '', profiler.enabled)
+            inputs.addTextBoxCommandInput(
+                'report', 'Last runs', profiler.report(), 12, True)
+            inputs.addBoolValueInput('clear', 'Clear runs', True, '', False)
+            inputs.addBoolValueInput('saveJSON', 'Save as JSON', True, '',
+                                     False)
+            trace = inputs.addBoolValueInput(
+                'trace', 'Trace API calls', True, '', tracer is not None)
+            trace.tooltip = (
+                "Time every Fusion API call Boxer makes while building "
+                "boxes. Turning this off writes the calls, with where they "
+                "were made from, to {} as collapsed stacks for a flame "
+                "graph.".format(tracePath))
+            if tracer is not None:
+                inputs.addTextBoxCommandInput(
+                    'apiReport', 'Slowest API calls', tracer.report(), 12,
+                    True)
+            recompute = inputs.addBoolValueInput(
+                'recompute', 'Time a recompute', True, '', False)
+            recompute.tooltip = (
+                "Recompute the whole design and show how long it took, to "
+                "compare boxes built with and without Fast solid.")
+
+            onExecute = BoxerTimingCommandExecuteHandler()
+            cmd.execute.add(onExecute)
+            handlers.append(onExecute)
+        except:
+            ui.messageBox('Boxer failed:\n{}'.format(
+                traceback.format_exc()))
+
+
+class BoxerTimingCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """Handler for the timings command's execute event"""
+
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandEventArgs.cast(args)
+            inputs = eventArgs.command.commandInputs
+            if inputs.itemById('saveJSON').value:
+                dlg = ui.createFileDialog()
+                dlg.title = 'Save Boxer Timings'
+                dlg.filter = 'JSON files (*.json);;All files (*.*)'
+                if dlg.showSave() == adsk.core.DialogResults.DialogOK:
+                    with open(dlg.filename, 'w') as f:
+                        f.write(profiler.toJSON())
+            if inputs.itemById('clear').value:
+                profiler.clear()
+            profiler.enabled = inputs.itemById('enabled').value
+            if inputs.itemById('trace').value:
+                startTrace()
+            elif tracer is not None:
+                path = stopTrace()
+                ui.messageBox('Wrote the API trace to {}'.format(path))
+            if inputs.itemById('recompute').value:
+                ui.messageBox(timeRecompute())
+        except:
+            if ui:
+                ui.messageBox('Boxer failed:\n{}'.format(
+                    traceback.format_exc()))
+
+
+def timeRecompute():
+    """Recomputes the active design, and returns a message saying how long
+    it took."""
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    with profiler.run('recompute'):
+        start = time.perf_counter()
+        des.computeAll()
+        seconds = time.perf_counter() - start
+    if des.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return 'Recomputed the design in {:.2f}s'.format(seconds)
+    return 'Recomputed {} timeline entries in {:.2f}s'.format(
+        des.timeline.count, seconds)
+
+
+def exportBoxes(folder, compress=False):
+    """Writes a DXF file for each panel of each box in the design to folder.
+    Boxer names each panel's body after it, so the bodies of the boxes in the
+    box index with panel names are exported, whether they were built as
+    extrudes or as fast solids, and any changes made to them since are
+    included. Each body is projected into a sketch of its own, which Fusion
+    writes to a staging folder; an export.FileWriter moves the files into
+    folder, compressing them if asked, on worker threads while the next
+    sketch is made. Boxes that share a component are only exported once, with
+    the number of copies recorded in the manifest. Returns the manifest, which
+    is also written to folder."""
+    started = time.perf_counter()
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    root = des.rootComponent
+    index = designBoxIndex(des)
+    # Pick up boxes pasted in from other designs.
+    index.refresh()
+    records = index.records()
+
+    staging = tempfile.mkdtemp(prefix='boxer-export-')
+    try:
+        with export.FileWriter(folder, compress) as writer:
+            for record in records:
+                component = record.component
+                copies = root.allOccurrencesByComponent(component).count
+                for body in component.bRepBodies:
+                    if not panels.isPanelName(body.name):
+                        continue
+                    entry = {'box': component.name, 'panel': body.name,
+                             'copies': copies}
+                    name = writer.fileName(component.name, body.name)
+                    staged = os.path.join(staging, name)
+
+                    start = time.perf_counter()
+                    sk = flatSketch(component, body)
+                    entry['sketchSeconds'] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    sk.saveAsDXF(staged)
+                    entry['saveSeconds'] = time.perf_counter() - start
+                    sk.deleteMe()
+                    writer.submit(staged, name, entry)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return export.writeManifest(
+        folder, writer.entries, boxes=len(records), compressed=compress,
+        seconds=time.perf_counter() - started)
+
+
+def flatSketch(component, body):
+    """Returns a new sketch on the largest flat face of a panel's body, with
+    the face's edges projected into it: the panel's flat pattern, with its
+    fingers, notches and slots. Adding a sketch on a face projects its edges,
+    so they mustn't be projected again, or every cut would be in the DXF
+    twice."""
+    face = max((f for f in body.faces if f.geometry.surfaceType ==
+                adsk.core.SurfaceTypes.PlaneSurfaceType),
+               key=lambda f: f.area)
+    sk = component.sketches.add(face)
+    sk.name = body.name + 'Flat'
+    return sk
+
+
+def startTrace(path=TRACE_FILE):
+    """Starts tracing API calls. The module's adsk is replaced by a proxy for
+    it, so every API call made through it is timed; the stacks of calls made
+    from the functions in TRACE_ROOTS are recorded, and written to path when
+    tracing stops."""
+    global adsk, tracer, tracePath
+    if tracer is None:
+        tracer = apitrace.Tracer(TRACE_ROOTS, [__file__])
+        adsk = tracer.wrap(adsk)
+        tracePath = path
+        clearCaches()
+
+
+def stopTrace():
+    """Stops tracing API calls, and writes the trace. Returns the path it was
+    written to, or None if API calls weren't being traced."""
+    global adsk, tracer
+    if tracer is None:
+        return None
+    adsk = apitrace.unwrap(adsk)
+    tracer.write(tracePath)
+    tracer = None
+    clearCaches()
+    return tracePath
+
+
+def clearCaches():
+    """Forgets the API objects Boxer keeps between commands. They have to be
+    looked up again when tracing starts or stops, so that traced and untraced
+    objects are never mixed."""
+    global boxIndex
+    profileIndexes.clear()
+    boxIndex = None
+
+
+def inputsFromSpec(boxSpec):
+    """Returns a boxerInputs for a box spec, as if it had been entered in the
+    dialog."""
+    inp = boxerInputs()
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    inp.plane = des.rootComponent.xZConstructionPlane
+    for field in spec.SPEC_FIELDS:
+        setattr(inp, field, getattr(boxSpec, field))
+    return inp
+
+
+class BoxBatch:
+    """BoxBatch draws a box for each of a list of BoxSpecs, one at a time, so
+    that drawing a batch can be spread over several events. Each unique box is
+    only built once; boxes with the same spec as one that's already been built
+    are added as another occurrence of its component. Boxes already in the
+    design, drawn from the same spec, are reused the same way. Boxes without a
+    position are laid out in a row, gap apart. In a parametric design,
+    everything is put in a single timeline group when the batch is finished.
+    """
+
+    def __init__(self, specs, gap=1.0):
+        self.specs = list(specs)
+        self.positions = spec.layoutRow(self.specs, gap)
+        des = adsk.fusion.Design.cast(app.activeProduct)
+        self.root = des.rootComponent
+        self.timeline = None
+        if des.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+            self.timeline = des.timeline
+            self.start = self.timeline.markerPosition
+        self.index = designBoxIndex(des)
+        self.boxToModel = planeTransform(
+            self.root.xZConstructionPlane).asArray()
+        self.components = {}
+        self.built = 0
+
+    def draw(self, i, boxPanels=None, progress=None):
+        """Draws the i'th box. boxPanels and progress are passed on to
+        drawBox if the box has to be built."""
+        transform = adsk.core.Matrix3D.create()
+        transform.translation = adsk.core.Vector3D.create(*self.positions[i])
+        inputs = inputsFromSpec(self.specs[i])
+        sig = spec.signature(inputs)
+        if sig not in self.components:
+            existing = self.index.find(spec.specHash(inputs), self.boxToModel)
+            self.components[sig] = existing[0].component if existing else None
+        if self.components[sig] is None:
+            self.components[sig] = drawBox(
+                inputs, transform, boxPanels, progress).component
+            self.built += 1
+        else:
+            self.root.occurrences.addExistingComponent(
+                self.components[sig], transform)
+
+    def finish(self):
+        """Groups everything the batch added in the timeline. Returns the
+        number of unique boxes built."""
+        if self.timeline is not None:
+            addTimelineGroup(self.timeline, self.start)
+        return self.built
+
+
+def addTimelineGroup(timeline, start, name=None):
+    """Puts the timeline entries from start up to the marker in a group.
+    Returns the group, or None if there's less than two entries to group."""
+    if timeline.markerPosition - 1 <= start:
+        return None
+    group = timeline.timelineGroups.add(start, timeline.markerPosition - 1)
+    if name is not None:
+        group.name = name
+    return group
+
+
+def drawBoxes(specs, gap=1.0):
+    """Draws a box for each of a list of BoxSpecs, as a BoxBatch. Returns the
+    number of unique boxes built."""
+    batch = BoxBatch(specs, gap)
+    for i in range(len(batch.specs)):
+        batch.draw(i)
+    return batch.finish()
+
+
 def getInputs(inputs, writeBack=False):
     """getInputs pulls all the inputs from the dialog and returns them in a 
     struct. There's a wrinkle here: when you read from value inputs, it causes
@@ -273,6 +1274,16 @@ def getInputs(inputs, writeBack=False):
 
     inp.dimsOuter = inputs.itemById(
         'dimsInOut').selectedItem.name == "outer"
+    inp.dividersX = inputs.itemById('dividersX').value
+    inp.dividersY = inputs.itemById('dividersY').value
+    inp.hinges = tuple(item.name for item in
+                       inputs.itemById('hinges').listItems if item.isSelected)
+    fastSolid = inputs.itemById('fastSolid')
+    if fastSolid is not None:
+        inp.fastSolid = fastSolid.value
+    groupTimeline = inputs.itemById('groupTimeline')
+    if groupTimeline is not None:
+        inp.groupTimeline = groupTimeline.value
 
     return inp
 
@@ -288,145 +1299,464 @@ def readInputValue(item, writeBack=False):
     return v
 
 
-def drawBox(inputs):
-    """drawBox creates the finger-jointed box.
+def drawPreview(inputs):
+    """drawPreview shows the box's panel outlines, fingers included, as custom
+    graphics. This is much quicker than building the box with drawBox, and
+    doesn't add anything to the timeline.
     """
-    app = adsk.core.Application.get()
-    ui = app.userInterface
-    des = adsk.fusion.Design.cast(app.activeProduct)
+    global previewGraphics
+    clearPreview()
 
-    length = inputs.length
-    width = inputs.width
-    height = inputs.height
-    thickness = inputs.thickness
-    drawLid = inputs.drawLid
-    fingerScale = inputs.fingerScale
-
-    # If the user gave us inner dimensions, adjust them so they're outer
-    # dimensions.
-    if not inputs.dimsOuter:
-        length += 2*thickness
-        width += 2*thickness
-        height += thickness
-        if drawLid:
-            height += thickness
-
-    # Create the box as a new component
-    root = des.rootComponent
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    boxPanels = spec.specPanels(inputs)
+
+    coords = []
+    stripLengths = []
+    for panel in boxPanels:
+        for loop in panels.panelLoops(panel):
+            for p in loop:
+                coords.extend(p)
+            stripLengths.append(len(loop))
+
+    previewGraphics = des.rootComponent.customGraphicsGroups.add()
+    lines = previewGraphics.addLines(
+        adsk.core.CustomGraphicsCoordinates.create(coords), [], True,
+        stripLengths)
+    lines.transform = planeTransform(inputs.plane)
+
+
+def clearPreview():
+    """Removes the custom graphics drawn by drawPreview."""
+    global previewGraphics
+    if previewGraphics is not None and previewGraphics.isValid:
+        previewGraphics.deleteMe()
+    previewGraphics = None
+
+
+def planeTransform(plane):
+    """Returns the transform from box space (see boxerlib/panels.py) to model
+    space for a box built on the given construction plane."""
+    geom = plane.geometry
+    normal = geom.uDirection.crossProduct(geom.vDirection)
     transform = adsk.core.Matrix3D.create()
-    boxComponent = root.occurrences.addNewComponent(transform)
-    sk = boxComponent.component.sketches.addWithoutEdges(inputs.plane)
-    extrudes = boxComponent.component.features.extrudeFeatures
-    lines = sk.sketchCurves.sketchLines
-    combines = boxComponent.component.features.combineFeatures
+    transform.setWithCoordinateSystem(
+        geom.origin, geom.uDirection, geom.vDirection, normal)
+    return transform
+
+
+def drawBox(inputs, transform=None, boxPanels=None, progress=None):
+    """drawBox creates the finger-jointed box. Each panel is sketched as a
+    single outline that already includes its fingers and notches, and is then
+    extruded once, so no combine features are needed to cut the fingers.
+    The box is built in a new component; transform places its occurrence.
+    boxPanels are the box's panels, if they've already been planned. progress
+    is called with the number of panels finished as each is built; if it
+    raises jobs.Cancelled, the half-built box is deleted. If
+    inputs.groupTimeline is set, everything it adds to a parametric design's
+    timeline is put in a group.
+    Returns the new occurrence.
+    """
+    with profiler.run('drawBox'):
+        des = adsk.fusion.Design.cast(app.activeProduct)
+        if boxPanels is None:
+            with profiler.span('plan'):
+                boxPanels = spec.specPanels(inputs)
+        with profiler.span('check'):
+            checkPanels(inputs, boxPanels)
+        timeline = None
+        if (inputs.groupTimeline and des.designType ==
+                adsk.fusion.DesignTypes.ParametricDesignType):
+            timeline = des.timeline
+            start = timeline.markerPosition
+
+        # Create the box as a new component
+        with profiler.span('component'):
+            root = des.rootComponent
+            if transform is None:
+                transform = adsk.core.Matrix3D.create()
+            boxComponent = root.occurrences.addNewComponent(transform)
+            component = boxComponent.component
+            boxToModel = planeTransform(inputs.plane).asArray()
+            storeBoxSpec(component, inputs, boxToModel)
+
+        try:
+            if inputs.fastSolid:
+                drawSolids(component, boxToModel, boxPanels)
+            else:
+                drawPanels(component, boxToModel, boxPanels, progress)
+        except jobs.Cancelled:
+            boxComponent.deleteMe()
+            raise
 
-    # base
-    p1 = adsk.core.Point3D.create(thickness, thickness, 0)
-    p2 = adsk.core.Point3D.create(length-thickness, width-thickness, 0)
-    base = lines.addTwoPointRectangle(p1, p2)
+        if timeline is not None:
+            addTimelineGroup(timeline, start, 'Boxer')
 
-    # fingers for the y axis edges
-    fingers = fingersForY(calcFingers2D(width, thickness, factor=fingerScale))
-    sketchFingers(lines, fingers, length-thickness, 0)
+    return boxComponent
 
-    # fingers for the x axis edges
-    fingers = fingersForX(calcFingers2D(length, thickness, factor=fingerScale))
-    sketchFingers(lines, fingers, 0, width-thickness)
 
-    newBody = adsk.fusion.FeatureOperations.NewBodyFeatureOperation
+def checkPanels(inputs, boxPanels):
+    """Checks that the panels planned for inputs fit together before any of
+    them are built. Raises ValueError if they don't."""
+    problems = jointcheck.checkPlan(inputs, boxPanels, app.pointTolerance)
+    if problems:
+        raise ValueError('The panels of the box don\'t fit together:\n' +
+                         '\n'.join(jointcheck.describe(p)
+                                    for p in problems[:10]))
+
 
-    # extrude the base
-    prof = adsk.core.ObjectCollection.create()
-    for p in sk.profiles:
-        prof.add(p)
-    dist = adsk.core.ValueInput.createByReal(thickness)
-    baseBody = extrudeSide(extrudes, "base", prof, thickness, 0.0)
-
-    # extrude the lid
-    lidBody = None
-    if drawLid:
-        lidBody = extrudeSide(
-            extrudes, "lid", prof, -thickness, height)
-
-    # FIXME: This method doesn't work on inclined planes. The front and
-    # side sketches end up offset by some amount from the origin of the
-    # first sketch, because the plane the first sketch is on probably
-    # won't intersect with the workspace origin.
-    frontFace = None
-    sideFace = None
-    for f in baseBody.faces:
-        p = sk.modelToSketchSpace(f.pointOnFace)
-        if math.fabs(p.y) < app.pointTolerance:
-            frontFace = f
-        if math.fabs(p.x) < app.pointTolerance:
-            sideFace = f
-        if frontFace and sideFace:
+def drawPanels(component, boxToModel, boxPanels, progress=None):
+    """Sketches and extrudes the panels of a box in component."""
+    if progress is None:
+        def progress(count):
+            pass
+
+    extrudes = component.features.extrudeFeatures
+    walls = [p for p in boxPanels if not panels.isDivider(p)]
+
+    # Panels that are parallel to each other have the same outline, so
+    # they share a sketch: base and lid, front and back, left and right.
+    sketched = {}
+    bodies = {}
+    for panel in walls:
+        axis = panel.axes[2]
+        if axis not in sketched:
+            with profiler.span('sketch'):
+                sk, boxToSketch = panelSketch(
+                    component, boxToModel, axis)
+                sk.name = panel.name
+                sketchOutline(sk, boxToSketch, panel)
+            with profiler.span('profiles'):
+                prof = adsk.core.ObjectCollection.create()
+                for p in sk.profiles:
+                    prof.add(p)
+                profiler.count('profiles', prof.count)
+            sketched[axis] = (prof, boxToSketch)
+        prof, boxToSketch = sketched[axis]
+
+        start, direction = panelExtent(boxToSketch, panel)
+        with profiler.span('extrude'):
+            bodies[panel.name] = extrudeSide(
+                extrudes, panel.name, prof, direction * panel.thickness,
+                start)
+        progress(1)
+
+    # Opposite walls have the same slots, so each pair is cut at once.
+    slotted = set()
+    for panel in walls:
+        axis = panel.axes[2]
+        if panel.holes and axis not in slotted:
+            pair = [p for p in walls if p.axes[2] == axis]
+            cutSlots(component, boxToModel, pair,
+                     [bodies[p.name] for p in pair])
+            slotted.add(axis)
+    cutHinges(component, boxToModel, walls, bodies)
+
+    drawDividers(component, boxToModel,
+                 [p for p in boxPanels if panels.isDivider(p)], progress)
+
+
+def panelExtent(boxToSketch, panel):
+    """Works out where a panel starts along a sketch's normal, and which way
+    it goes from there. Returns the start and the direction, 1 or -1."""
+    start = xform.applyPoint(
+        boxToSketch, panels.toBox(panel, 0, 0, panel.offset))[2]
+    direction = xform.applyVector(
+        boxToSketch, panels.toBox(panel, 0, 0, 1))[2]
+    return start, direction
+
+
+def cutSlots(component, boxToModel, pair, bodies):
+    """Cuts the slots for the dividers through a pair of opposite walls. Only
+    the slots for the first divider are sketched, and cut through both walls
+    at once; the rest are made by patterning that cut, so the number of
+    features doesn't grow with the number of dividers."""
+    near = min(pair, key=lambda p: p.offset)
+    first, count, pitch = dividers.slotPattern(near.holes)
+    cut = cutRects(component, boxToModel, pair, bodies, first, 'Slots')
+    if count > 1:
+        with profiler.span('pattern'):
+            patternAlong(component, boxToModel, [cut], near.axes[0], count,
+                         pitch, identical=True)
+
+
+def cutHinges(component, boxToModel, walls, bodies):
+    """Cuts the living hinges in walls. Opposite walls with the same hinge are
+    cut together. If a hinge is a pair of lines of slits repeated, only the
+    first pair is sketched and cut, and the cut is patterned across the
+    panel; otherwise every slit is drawn in one sketch, with compute
+    deferred, and cut with one extrude."""
+    for axis in sorted(set(p.axes[2] for p in walls if p.slits)):
+        hinged = [p for p in walls if p.axes[2] == axis and p.slits]
+        if len(set(p.slits for p in hinged)) > 1:
+            groups = [[p] for p in hinged]
+        else:
+            groups = [hinged]
+        for group in groups:
+            slits = group[0].slits
+            pattern = hinge.linePattern(slits)
+            if pattern is not None:
+                slits, count, pitch = pattern
+            cut = cutRects(component, boxToModel, group,
+                           [bodies[p.name] for p in group], slits, 'Hinge')
+            if pattern is not None and count > 1:
+                with profiler.span('pattern'):
+                    patternAlong(component, boxToModel, [cut],
+                                 group[0].axes[0], count, pitch,
+                                 identical=True)
+
+
+def cutRects(component, boxToModel, pair, bodies, rects, suffix):
+    """Sketches (u1, v1, u2, v2) rectangles on the nearest of a set of
+    parallel panels, and cuts them through all of the panels' bodies with a
+    single extrude, named after the nearest panel and suffix. Returns the
+    extrude."""
+    near = min(pair, key=lambda p: p.offset)
+    far = max(pair, key=lambda p: p.offset)
+    with profiler.span('sketch'):
+        sk, boxToSketch = panelSketch(component, boxToModel, near.axes[2])
+        sk.name = near.name + suffix
+        sketched = []
+        for u1, v1, u2, v2 in rects:
+            x1, y1, _ = xform.applyPoint(boxToSketch,
+                                         panels.toBox(near, u1, v1, 0))
+            x2, y2, _ = xform.applyPoint(boxToSketch,
+                                         panels.toBox(near, u2, v2, 0))
+            sketched.append((min(x1, x2), min(y1, y2), max(x1, x2),
+                             max(y1, y2)))
+        sketchRects(sk, sketched)
+    with profiler.span('profiles'):
+        prof = adsk.core.ObjectCollection.create()
+        for p in sk.profiles:
+            prof.add(p)
+        profiler.count('profiles', prof.count)
+
+    start, direction = panelExtent(boxToSketch, near)
+    depth = far.offset + far.thickness - near.offset
+    extrudes = component.features.extrudeFeatures
+    with profiler.span('extrude'):
+        dist = adsk.core.ValueInput.createByReal(depth)
+        inp = extrudes.createInput(
+            prof, adsk.fusion.FeatureOperations.CutFeatureOperation)
+        inp.setOneSideExtent(
+            adsk.fusion.DistanceExtentDefinition.create(dist),
+            adsk.fusion.ExtentDirections.PositiveExtentDirection
+            if direction > 0 else
+            adsk.fusion.ExtentDirections.NegativeExtentDirection)
+        inp.startExtent = adsk.fusion.OffsetStartDefinition.create(
+            adsk.core.ValueInput.createByReal(start))
+        inp.participantBodies = bodies
+        cut = extrudes.add(inp)
+        cut.name = near.name + suffix
+        profiler.count('extrudes')
+    return cut
+
+
+def drawDividers(component, boxToModel, dividerPanels, progress):
+    """Draws the dividers. The dividers running each way are all the same, so
+    the first is sketched and extruded, and the others are made by patterning
+    its body. progress is called after each direction is done."""
+    extrudes = component.features.extrudeFeatures
+    groups = {}
+    for panel in dividerPanels:
+        groups.setdefault(panel.axes[2], []).append(panel)
+    for axis, group in sorted(groups.items()):
+        first = group[0]
+        with profiler.span('sketch'):
+            sk, boxToSketch = panelSketch(component, boxToModel, axis)
+            sk.name = first.name
+            sketchOutline(sk, boxToSketch, first)
+        with profiler.span('profiles'):
+            prof = adsk.core.ObjectCollection.create()
+            for p in sk.profiles:
+                prof.add(p)
+            profiler.count('profiles', prof.count)
+        start, direction = panelExtent(boxToSketch, first)
+        with profiler.span('extrude'):
+            body = extrudeSide(extrudes, first.name, prof,
+                               direction * first.thickness, start)
+        if len(group) > 1:
+            with profiler.span('pattern'):
+                pattern = patternAlong(component, boxToModel, [body], axis,
+                                       len(group),
+                                       group[1].offset - first.offset)
+                for panel, copy in zip(group[1:], pattern.bodies):
+                    copy.name = panel.name
+        progress(len(group))
+
+
+def patternAlong(component, boxToModel, entities, axis, count, pitch,
+                 identical=False):
+    """Patterns features or bodies along one of the box's axes, so that there
+    are count of them, pitch apart. Features that only need to be copied, not
+    recomputed against the bodies they land on, can be patterned as identical,
+    which is much quicker. Returns the pattern feature."""
+    boxAxis = [0.0, 0.0, 0.0]
+    boxAxis[axis] = 1.0
+    direction = adsk.core.Vector3D.create(
+        *xform.applyVector(boxToModel, boxAxis))
+    for constructionAxis in [component.xConstructionAxis,
+                             component.yConstructionAxis,
+                             component.zConstructionAxis]:
+        along = constructionAxis.geometry.direction
+        if along.isParallelTo(direction):
             break
-    if frontFace is None:
-        raise Exception('failed to find front face on base body')
-    if sideFace is None:
-        raise Exception(
-            'failed to find right/left side face on base body')
-
-    # sketch the front/back
-    frontSk = boxComponent.component.sketches.addWithoutEdges(
-        frontFace)
-    lines = frontSk.sketchCurves.sketchLines
-
-    p1 = adsk.core.Point3D.create(thickness, 0, 0)
-    p2 = adsk.core.Point3D.create(length-thickness, height, 0)
-    lines.addTwoPointRectangle(p1, p2)
-    fingers = fingersForY(calcFingers2D(height, thickness, factor=fingerScale))
-    sketchFingers(lines, fingers, length-thickness, 0)
-
-    # sketch the left/right sides
-    sideSk = boxComponent.component.sketches.addWithoutEdges(sideFace)
-    lines = sideSk.sketchCurves.sketchLines
-
-    p1 = adsk.core.Point3D.create(0, 0, 0)
-    p2 = adsk.core.Point3D.create(-width, height, 0)
-    lines.addTwoPointRectangle(p1, p2)
-
-    # extrude front back and sides
-    prof = adsk.core.ObjectCollection.create()
-    for p in frontSk.profiles:
-        prof.add(p)
-    frontBody = extrudeSide(extrudes, "front", prof, -thickness, 0.0)
-    backBody = extrudeSide(
-        extrudes, "back", prof, thickness, -width)
-
-    prof = adsk.core.ObjectCollection.create()
-    for p in sideSk.profiles:
-        prof.add(p)
-    leftBody = extrudeSide(extrudes, "left", prof, -thickness, 0.0)
-    rightBody = extrudeSide(
-        extrudes, "right", prof, thickness, -length)
-
-    # Combine the sides
-    tools = adsk.core.ObjectCollection.create()
-    tools.add(frontBody)
-    tools.add(backBody)
-    tools.add(baseBody)
-    if drawLid:
-        tools.add(lidBody)
-
-    for side in [leftBody, rightBody]:
-        combineInp = combines.createInput(side, tools)
-        combineInp.isKeepToolBodies = True
-        combineInp.operation = adsk.fusion.FeatureOperations.CutFeatureOperation
-        combines.add(combineInp)
-
-    tools = adsk.core.ObjectCollection.create()
-    tools.add(baseBody)
-    if drawLid:
-        tools.add(lidBody)
-    for side in [frontBody, backBody, leftBody, rightBody]:
-        if side is None:
-            continue
-        combineInp = combines.createInput(side, tools)
-        combineInp.isKeepToolBodies = True
-        combineInp.operation = adsk.fusion.FeatureOperations.CutFeatureOperation
-        combines.add(combineInp)
+    else:
+        raise Exception('failed to find an axis to pattern the dividers along')
+    if along.dotProduct(direction) < 0:
+        pitch = -pitch
+
+    items = adsk.core.ObjectCollection.create()
+    for entity in entities:
+        items.add(entity)
+    patterns = component.features.rectangularPatternFeatures
+    inp = patterns.createInput(
+        items, constructionAxis, adsk.core.ValueInput.createByReal(count),
+        adsk.core.ValueInput.createByReal(pitch),
+        adsk.fusion.PatternDistanceType.SpacingPatternDistanceType)
+    if identical:
+        inp.patternComputeOption = (
+            adsk.fusion.PatternComputeOptions.IdenticalPatternCompute)
+    pattern = patterns.add(inp)
+    profiler.count('patterns')
+    return pattern
+
+
+def drawSolids(component, boxToModel, boxPanels):
+    """Builds the panels of a box as temporary bodies and adds them to
+    component. In a parametric design they're all added in one base feature,
+    so the whole box is a single entry on the timeline, with nothing for
+    Fusion to recompute."""
+    tbm = adsk.fusion.TemporaryBRepManager.get()
+    with profiler.span('solids'):
+        solids = [panelSolid(tbm, boxToModel, panel) for panel in boxPanels]
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    baseFeature = None
+    with profiler.span('bodies'):
+        if des.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+            baseFeature = component.features.baseFeatures.add()
+            baseFeature.startEdit()
+        try:
+            for panel, solid in zip(boxPanels, solids):
+                if baseFeature is None:
+                    body = component.bRepBodies.add(solid)
+                else:
+                    body = component.bRepBodies.add(solid, baseFeature)
+                body.name = panel.name
+        finally:
+            if baseFeature is not None:
+                baseFeature.finishEdit()
+        if baseFeature is not None:
+            baseFeature.name = 'Boxer'
+
+
+def panelSolid(tbm, boxToModel, panel):
+    """Returns a panel as a temporary body: a box for its core, with a box
+    joined to it for each tab and cut from it for each notch, hole and hinge
+    slit."""
+    union = adsk.fusion.BooleanTypes.UnionBooleanType
+    difference = adsk.fusion.BooleanTypes.DifferenceBooleanType
+    solid = tbm.createBox(rectBox(boxToModel, panel, panel.core))
+    for rect in panel.tabs:
+        tbm.booleanOperation(solid, tbm.createBox(
+            rectBox(boxToModel, panel, rect)), union)
+    for rect in panel.notches + panel.holes + panel.slits:
+        tbm.booleanOperation(solid, tbm.createBox(
+            rectBox(boxToModel, panel, rect)), difference)
+    profiler.count('booleans', len(panel.tabs) + len(panel.notches) +
+                   len(panel.holes) + len(panel.slits))
+    return solid
+
+
+def rectBox(boxToModel, panel, rect):
+    """Returns the OrientedBoundingBox3D, in model space, of the solid that a
+    (u1, v1, u2, v2) rectangle on a panel extrudes to."""
+    u1, v1, u2, v2 = rect
+    center = xform.applyPoint(boxToModel, panels.toBox(
+        panel, (u1 + u2) / 2, (v1 + v2) / 2,
+        panel.offset + panel.thickness / 2))
+    uDir = xform.applyVector(boxToModel, panels.toBox(panel, 1, 0, 0))
+    vDir = xform.applyVector(boxToModel, panels.toBox(panel, 0, 1, 0))
+    return adsk.core.OrientedBoundingBox3D.create(
+        adsk.core.Point3D.create(*center),
+        adsk.core.Vector3D.create(*uDir), adsk.core.Vector3D.create(*vDir),
+        u2 - u1, v2 - v1, panel.thickness)
+
+
+def panelSketch(component, boxToModel, axis):
+    """Creates a sketch for the panels whose thickness runs along the given box
+    axis, on whichever of the component's construction planes is perpendicular
+    to that axis. Returns the sketch and the transform from box space to sketch
+    space.
+    """
+    # FIXME: This doesn't work on inclined planes, since none of the
+    # construction planes will line up with the box.
+    w = [0.0, 0.0, 0.0]
+    w[axis] = 1.0
+    normal = adsk.core.Vector3D.create(*xform.applyVector(boxToModel, w))
+    for plane in [component.xYConstructionPlane,
+                  component.xZConstructionPlane,
+                  component.yZConstructionPlane]:
+        if plane.geometry.normal.isParallelTo(normal):
+            break
+    else:
+        raise Exception('failed to find a sketch plane for the box sides')
+
+    sk = component.sketches.addWithoutEdges(plane)
+    return sk, sketchTransform(sk, boxToModel)
+
+
+def sketchTransform(sketch, boxToModel):
+    """Returns the transform from box space to a sketch's space."""
+    modelToSketch = xform.invertRigid(sketch.transform.asArray())
+    return xform.multiply(modelToSketch, boxToModel)
+
+
+def panelSegments(boxToSketch, panel):
+    """Returns the line segments of a panel's outline, in sketch space."""
+    pts = []
+    for u, v in panel.outline:
+        x, y, _ = xform.applyPoint(
+            boxToSketch, panels.toBox(panel, u, v, panel.offset))
+        pts.append((x, y))
+    return segments.uniqueSegments(segments.outlineSegments(pts))
+
+
+def sketchOutline(sketch, boxToSketch, panel):
+    """Draws the outline of a panel in a sketch."""
+    sketchSegments(sketch, panelSegments(boxToSketch, panel))
+
+
+def updateOutline(sketch, boxToSketch, panel):
+    """Changes the outline drawn in a sketch to a panel's outline. Only the
+    lines that aren't part of the new outline are deleted, and only the ones
+    that are missing are added, so edges whose fingers haven't changed are
+    left alone."""
+    wanted = set(panelSegments(boxToSketch, panel))
+
+    def snap(sketchPoint):
+        p = sketchPoint.geometry
+        return (round(p.x, segments.PRECISION), round(p.y, segments.PRECISION))
+
+    points = {}
+    sketch.isComputeDeferred = True
+    try:
+        deleted = 0
+        for line in list(sketch.sketchCurves.sketchLines):
+            a, b = line.startSketchPoint, line.endSketchPoint
+            pa, pb = snap(a), snap(b)
+            seg = (pa, pb) if (pa, pb) in wanted else (pb, pa)
+            if seg in wanted:
+                wanted.discard(seg)
+                points[pa] = a
+                points[pb] = b
+            else:
+                line.deleteMe()
+                deleted += 1
+        profiler.count('deleted lines', deleted)
+        sketchSegments(sketch, sorted(wanted), points)
+    finally:
+        sketch.isComputeDeferred = False
 
 
 def extrudeSide(extrudes, name, prof, thickness, offset):
@@ -442,60 +1772,380 @@ def extrudeSide(extrudes, name, prof, thickness, offset):
     inp.setOneSideExtent(extent, extentDir)
     inp.startExtent = startOffs
     solid = extrudes.add(inp)
+    profiler.count('extrudes')
+    solid.name = name
     body = solid.bodies.item(0)
     body.name = name
     return body
 
 
-def fingersForX(fingers):
-    xFingers = []
-    for f in fingers:
-        p1, p2 = f
-        p1.x, p1.y = p1.y, p1.x
-        p2.x, p2.y = p2.y, p2.x
-        xFingers.append((p1, p2))
-    return xFingers
-
-
-def fingersForY(fingers):
-    return fingers
+def storeBoxSpec(component, inputs, boxToModel):
+    """Records the spec of the box drawn in component, its hash, and where it
+    was drawn, as attributes of the component, and adds the box to the
+    design's box index."""
+    component.attributes.add(
+        ATTRIBUTE_GROUP, 'spec', json.dumps(spec.specToDict(inputs)))
+    component.attributes.add(
+        ATTRIBUTE_GROUP, 'transform', json.dumps(list(boxToModel)))
+    component.attributes.add(ATTRIBUTE_GROUP, 'hash', spec.specHash(inputs))
+    if boxIndex is not None and boxIndex.design == app.activeProduct:
+        boxIndex.add(component)
+
+
+def loadBoxSpec(component):
+    """Returns the spec of the box in component, as a dict of spec fields,
+    and its box-to-model transform. Returns None if the component wasn't
+    drawn by Boxer."""
+    attrs = component.attributes
+    specAttr = attrs.itemByName(ATTRIBUTE_GROUP, 'spec')
+    transformAttr = attrs.itemByName(ATTRIBUTE_GROUP, 'transform')
+    if specAttr is None or transformAttr is None:
+        return None
+    # Boxes drawn before a field was added get its default.
+    values = dict(spec.DEFAULTS)
+    values.update(json.loads(specAttr.value))
+    return values, json.loads(transformAttr.value)
+
+
+# A box in a BoxIndex: its component, its spec as a dict of spec fields, its
+# box-to-model transform, and the hash of its spec.
+BoxRecord = collections.namedtuple(
+    'BoxRecord', ['component', 'values', 'boxToModel', 'hash'])
+
+
+class BoxIndex:
+    """BoxIndex lists the boxes Boxer has drawn in a design. The boxes are
+    found with a single findAttributes call for the spec attribute drawBox
+    leaves on each box's component, rather than by walking every occurrence
+    in the design. Boxes Boxer draws or edits are added to the index as it
+    goes, and boxes whose components have been deleted are skipped; refresh
+    picks up anything else, like boxes pasted in from another design."""
+
+    def __init__(self, design):
+        self.design = design
+        self.refresh()
+
+    def refresh(self):
+        self.boxes = {}
+        for attr in self.design.findAttributes(ATTRIBUTE_GROUP, 'spec'):
+            component = adsk.fusion.Component.cast(attr.parent)
+            if component is not None:
+                self.add(component)
+
+    def add(self, component):
+        """Adds a box's component to the index, or updates its entry."""
+        stored = loadBoxSpec(component)
+        if stored is None:
+            return
+        values, boxToModel = stored
+        # Boxes drawn before hashes were recorded get theirs worked out.
+        hashAttr = component.attributes.itemByName(ATTRIBUTE_GROUP, 'hash')
+        boxHash = hashAttr.value if hashAttr is not None else spec.specHash(
+            spec.BoxSpec(position=None, **values))
+        self.boxes[component.entityToken] = BoxRecord(
+            component, values, boxToModel, boxHash)
+
+    def records(self):
+        """Returns a BoxRecord for every box in the design."""
+        return [r for r in self.boxes.values() if r.component.isValid]
+
+    def find(self, boxHash=None, boxToModel=None, **fields):
+        """Returns the records of the boxes with the given hash, transform and
+        spec field values; any that aren't given aren't checked."""
+        found = []
+        for r in self.records():
+            if boxHash is not None and r.hash != boxHash:
+                continue
+            if boxToModel is not None and any(
+                    abs(a - b) > 1e-9 for a, b in zip(r.boxToModel,
+                                                       boxToModel)):
+                continue
+            if any(r.values[k] != v for k, v in fields.items()):
+                continue
+            found.append(r)
+        return found
+
+    def duplicates(self):
+        """Returns lists of the records of boxes that share a spec, for every
+        spec more than one component was drawn from."""
+        byHash = {}
+        for r in self.records():
+            byHash.setdefault(r.hash, []).append(r)
+        return [group for group in byHash.values() if len(group) > 1]
+
+
+def designBoxIndex(design):
+    """Returns the BoxIndex for design. It's kept between commands, and only
+    rebuilt when a different design is active."""
+    global boxIndex
+    if boxIndex is None or boxIndex.design != design:
+        boxIndex = BoxIndex(design)
+    return boxIndex
+
+
+def retargetBoxes(components, inputs):
+    """Edits each of the boxes in components to match inputs. Components are
+    shared by all their occurrences, so each is only edited once. Every box
+    is checked before any of them are changed, so if one can't be edited,
+    ValueError is raised and the design is left as it was."""
+    unique = {}
+    for component in components:
+        unique.setdefault(component.entityToken, component)
+    for component in unique.values():
+        problem = editProblem(component, inputs)
+        if problem is not None:
+            raise ValueError(problem)
+    for component in unique.values():
+        editBox(component, inputs)
+
+
+def editProblem(component, inputs, stored=None):
+    """Returns why the box in component can't be edited to match inputs, or
+    None if it can. stored is what loadBoxSpec returns for the component, if
+    it's already been loaded."""
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    if des.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return 'boxes can only be edited in a parametric design'
+    if stored is None:
+        stored = loadBoxSpec(component)
+    if stored is None:
+        return 'the selected component is not a Boxer box'
+    values = stored[0]
+    if (values['dividersX'] or values['dividersY'] or inputs.dividersX or
+            inputs.dividersY):
+        return 'boxes with dividers can\'t be edited'
+    if values['hinges'] or inputs.hinges:
+        return 'boxes with living hinges can\'t be edited'
+    # Fast solids have the same spec as the boxes drawn as sketches and
+    # extrudes, but none of the sketches.
+    if component.sketches.itemByName('base') is None:
+        return 'boxes built as fast solids can\'t be edited'
+    return None
+
+
+def identicalBoxes(component, inputs):
+    """Returns the other boxes in the design with the same spec as component
+    that can be edited to match inputs, and a list of (component, problem)
+    pairs for those that can't. Boxes with the same spec can still have been
+    built in a way that can't be edited, like as fast solids."""
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    index = designBoxIndex(des)
+    index.add(component)
+    boxHash = index.boxes[component.entityToken].hash
+    boxes = []
+    skipped = []
+    for r in index.find(boxHash):
+        if r.component.entityToken == component.entityToken:
+            continue
+        problem = editProblem(r.component, inputs)
+        if problem is None:
+            boxes.append(r.component)
+        else:
+            skipped.append((r.component, problem))
+    return boxes, skipped
 
 
-def sketchFingers(lines, fingers, xOffs, yOffs):
-    """Draws a set of fingers in a sketch"""
-    vect = adsk.core.Vector3D.create(xOffs, yOffs, 0)
-    for f in fingers:
-        p1, p2 = f
-        lines.addTwoPointRectangle(p1, p2)
-        p1.translateBy(vect)
-        p2.translateBy(vect)
-        lines.addTwoPointRectangle(p1, p2)
+def editBox(component, inputs):
+    """Changes a box drawn by drawBox to match inputs, in place. The sketch
+    for a pair of panels is only redrawn if their outline has changed; every
+    panel's extrude keeps its place in the timeline and just has its profiles,
+    thickness and start offset updated. A lid is added or removed if need be.
+    """
+    stored = loadBoxSpec(component)
+    problem = editProblem(component, inputs, stored)
+    if problem is not None:
+        raise ValueError(problem)
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    values, boxToModel = stored
+
+    with profiler.run('editBox'):
+        with profiler.span('plan'):
+            oldPanels = {p.name: p for p in spec.specPanels(
+                spec.BoxSpec(position=None, **values))}
+            boxPanels = spec.specPanels(inputs)
+
+        timeline = des.timeline
+        atEnd = timeline.markerPosition == timeline.count
+        marker = timeline.markerPosition
+        extrudes = component.features.extrudeFeatures
+        tol = app.pointTolerance
+
+        # Each pair of panels shares the sketch named after the first of them.
+        sketches = {}
+        for panel in boxPanels:
+            axis = panel.axes[2]
+            if axis in sketches:
+                continue
+            sk = component.sketches.itemByName(panel.name)
+            if sk is None:
+                raise ValueError(
+                    'boxes built as fast solids can\'t be edited')
+            redraw = panel.outline != oldPanels[panel.name].outline
+            sketches[axis] = (sk, sketchTransform(sk, boxToModel), redraw)
+
+        added = []
+        redrawn = set()
+        for panel in boxPanels:
+            feature = extrudes.itemByName(panel.name)
+            if feature is None:
+                added.append(panel)
+                continue
+            sk, boxToSketch, redraw = sketches[panel.axes[2]]
+            start, _ = panelExtent(boxToSketch, panel)
+            distance = adsk.fusion.DistanceExtentDefinition.cast(
+                feature.extentOne).distance
+            offset = adsk.fusion.OffsetStartDefinition.cast(
+                feature.startExtent).offset
+            if (not redraw and abs(distance.value - panel.thickness) < tol
+                    and abs(offset.value - start) < tol):
+                continue
+
+            if redraw:
+                # Profiles can only be swapped with the timeline rolled back
+                # to just before the feature that uses them.
+                with profiler.span('rollback'):
+                    feature.timelineObject.rollTo(True)
+                if sk.name not in redrawn:
+                    with profiler.span('sketch'):
+                        updateOutline(sk, boxToSketch, panel)
+                    redrawn.add(sk.name)
+                with profiler.span('profiles'):
+                    prof = adsk.core.ObjectCollection.create()
+                    for p in sk.profiles:
+                        prof.add(p)
+                    profiler.count('profiles', prof.count)
+                    feature.profile = prof
+            with profiler.span('extrude'):
+                if abs(distance.value - panel.thickness) >= tol:
+                    distance.value = panel.thickness
+                if abs(offset.value - start) >= tol:
+                    offset.value = start
+                profiler.count('extrudes')
+
+        if atEnd:
+            timeline.moveToEnd()
+        else:
+            timeline.markerPosition = marker
+
+        # A lid that's no longer wanted goes, and a new one is extruded from
+        # the base's sketch.
+        names = set(p.name for p in boxPanels)
+        for name in oldPanels:
+            if name not in names:
+                feature = extrudes.itemByName(name)
+                if feature is not None:
+                    feature.deleteMe()
+        for panel in added:
+            sk, boxToSketch, _ = sketches[panel.axes[2]]
+            prof = adsk.core.ObjectCollection.create()
+            for p in sk.profiles:
+                prof.add(p)
+            start, direction = panelExtent(boxToSketch, panel)
+            with profiler.span('extrude'):
+                extrudeSide(extrudes, panel.name, prof,
+                            direction * panel.thickness, start)
+
+        storeBoxSpec(component, inputs, boxToModel)
+
+
+def sketchRects(sketch, rects):
+    """Draws a list of (x1, y1, x2, y2) rectangles in a sketch in a single
+    batch. Edges shared between rectangles are only drawn once."""
+    segs = []
+    for rect in rects:
+        segs += segments.rectSegments(rect)
+    sketchSegments(sketch, segments.uniqueSegments(segs))
+
+
+def sketchSegments(sketch, segs, points=None):
+    """Draws a list of line segments in a sketch. Compute is deferred while the
+    lines are added, so that the sketch is only solved and profiled once, and
+    lines that meet share a sketch point. points maps (x, y) tuples to sketch
+    points already in the sketch that the new lines should join up with."""
+    lines = sketch.sketchCurves.sketchLines
+    if points is None:
+        points = {}
+
+    def point(p):
+        sp = points.get(p)
+        if sp is None:
+            return adsk.core.Point3D.create(p[0], p[1], 0)
+        return sp
+
+    # If the caller has already deferred compute, leave it to them to turn it
+    # back on.
+    deferred = sketch.isComputeDeferred
+    sketch.isComputeDeferred = True
+    try:
+        for a, b in segs:
+            line = lines.addByTwoPoints(point(a), point(b))
+            points[a] = line.startSketchPoint
+            points[b] = line.endSketchPoint
+    finally:
+        sketch.isComputeDeferred = deferred
+    profiler.count('sketch lines', len(segs))
+
+
+def boxTuple(bbox):
+    """Returns a BoundingBox3D as a (lo, hi) pair of tuples."""
+    return (tuple(bbox.minPoint.asArray()), tuple(bbox.maxPoint.asArray()))
+
+
+def findJoints(bodies):
+    """Finds the places where the bodies should be finger-jointed: wherever
+    an end face of one body, as narrow as the body is thick, lies within a face
+    of another body that it overlaps. Each pair of bodies is jointed at most
+    once, with the fingers cut into whichever comes first in bodies. Returns a
+    list of (i, face, j) tuples: the face of bodies[i] to cut fingers into,
+    and the index of the body it meets.
+
+    Rather than compare every face of every body with every other, the face
+    bounding boxes are swept along one axis, so only faces that touch are
+    compared."""
+    tol = app.pointTolerance
+    faces = []
+    boxes = []
+    bodyBoxes = []
+    for i, body in enumerate(bodies):
+        bodyBoxes.append(boxTuple(body.boundingBox))
+        for face in body.faces:
+            faces.append((i, face))
+            boxes.append(boxTuple(face.boundingBox))
+    thickness = [min(spatial.size(box)) for box in bodyBoxes]
+
+    def isJoint(k, box, other):
+        # A face is an end face if, once its flat direction is ignored, its
+        # short side is the body's thickness.
+        dims = sorted(spatial.size(box))[1:]
+        return (abs(dims[0] - thickness[k]) < tol and
+                spatial.contains(other, box, tol))
+
+    joints = {}
+    for a, b in spatial.sweepPairs(boxes, tol):
+        (i, faceA), (j, faceB) = faces[a], faces[b]
+        if i == j or joints.get((i, j), (j,))[0] == i:
+            continue
+        if not spatial.overlaps(bodyBoxes[i], bodyBoxes[j], -tol):
+            continue
+        if isJoint(i, boxes[a], boxes[b]):
+            joints[(i, j)] = (i, faceA, j)
+        elif (i, j) not in joints and isJoint(j, boxes[b], boxes[a]):
+            joints[(i, j)] = (j, faceB, i)
+    return [joints[pair] for pair in sorted(joints)]
 
 
-def fingerJointEdge(component: adsk.fusion.Component,
-                    body1: adsk.fusion.BRepBody,
-                    body2: adsk.fusion.BRepBody):
-    """Add finger joints to an edge between two bodies. The edges must
-    intersect."""
-    if body2 is None:
-        return
-    # Find the face on body1 that's completely contained by any face on body2.
-    fingerEdge = None
-    for face in body1.faces:
-        bbox = face.boundingBox
-        for cf in body2.faces:
-            cbbox = cf.boundingBox
-            if cbbox.contains(bbox.minPoint) and cbbox.contains(bbox.maxPoint):
-                fingerEdge = face
-                break
-        if fingerEdge is not None:
-            break
+def planJoint(face):
+    """Returns the finger plan for a joint face, working from its bounding box
+    so that nothing has to be sketched first. Raises ValueError if the face is
+    too short to joint."""
+    dims = sorted(spatial.size(boxTuple(face.boundingBox)))
+    return fingerplan.planFingers(dims[2], dims[1])
 
-    if fingerEdge is None:
-        raise Exception('failed to find common edge for bodies')
 
-    # Create a sketch for the fingers
-    sk = component.sketches.add(fingerEdge)
+def sketchFingers(component, face):
+    """Sketches the fingers for a joint on face. Returns the sketch and the
+    depth to cut the fingers to."""
+    sk = component.sketches.add(face)
 
     # The new sketch contains the projected profile of the end of the side,
     # which is a rectangle, but may be located some distance from the origin.
@@ -519,32 +2169,103 @@ def fingerJointEdge(component: adsk.fusion.Component,
     edgeX = maxVect.x - minVect.x
     edgeY = maxVect.y - minVect.y
 
-    thickness = min(edgeX, edgeY)
-
     # Get an array of fingers to draw
     fingers = calcFingers(edgeX, edgeY)
+    sketchRects(sk, segments.offsetRects(fingers, minVect.x, minVect.y))
+    return sk, min(edgeX, edgeY)
 
-    lines = sk.sketchCurves.sketchLines
+
+def cutFingers(component, body, sk, thickness):
+    """Cuts the fingers sketched in sk into body."""
     extrudes = component.features.extrudeFeatures
+    with profiler.span('profiles'):
+        prof = adsk.core.ObjectCollection.create()
+        for pr in sk.profiles:
+            prof.add(pr)
+        profiler.count('profiles', prof.count)
+
+    with profiler.span('extrude'):
+        dist = adsk.core.ValueInput.createByReal(thickness)
+        extent = adsk.fusion.DistanceExtentDefinition.create(dist)
+        inp = extrudes.createInput(
+            prof, adsk.fusion.FeatureOperations.CutFeatureOperation)
+        inp.participantBodies = [body]
+        inp.setOneSideExtent(
+            extent, adsk.fusion.ExtentDirections.NegativeExtentDirection)
+        extrudes.add(inp)
+        profiler.count('extrudes')
 
-    faces = []
-    for f in fingers:
-        p1, p2 = f
-        p1.translateBy(minVect)
-        p2.translateBy(minVect)
-        faces.append(lines.addTwoPointRectangle(p1, p2))
-
-    prof = adsk.core.ObjectCollection.create()
-    for pr in sk.profiles:
-        prof.add(pr)
-    dist = adsk.core.ValueInput.createByReal(thickness)
-    extent = adsk.fusion.DistanceExtentDefinition.create(dist)
-    inp = extrudes.createInput(
-        prof, adsk.fusion.FeatureOperations.CutFeatureOperation)
-    inp.participantBodies = [body1]
-    inp.setOneSideExtent(
-        extent, adsk.fusion.ExtentDirections.NegativeExtentDirection)
-    extrudes.add(inp)
+
+def fingerJointEdge(component: adsk.fusion.Component,
+                    body1: adsk.fusion.BRepBody,
+                    body2: adsk.fusion.BRepBody):
+    """Create a finger joint on the edge where body1 and body2 intersect. The
+    fingers are cut into body1, on its end face that lies within a face of
+    body2."""
+    if body2 is None:
+        return
+    with profiler.run('fingerJointEdge'):
+        with profiler.span('faceSearch'):
+            joints = [(face, j) for i, face, j in findJoints([body1, body2])
+                      if i == 0]
+        if not joints:
+            raise Exception('failed to find common edge for bodies')
+
+        with profiler.span('sketch'):
+            sk, thickness = sketchFingers(component, joints[0][0])
+        cutFingers(component, body1, sk, thickness)
+
+
+def jointBodies(component, bodies):
+    """Finger-joints every pair of the bodies that meet, as found by
+    findJoints. All the joints are planned before anything is changed, so that
+    every joint that's too short is reported at once. The fingers are then
+    sketched on every joint face before any of them are cut, since cutting a
+    body can invalidate its other faces, and finally each body that was met
+    is cut by all the bodies that meet it, in a single combine. Returns the
+    number of joints made."""
+    with profiler.run('jointBodies'):
+        with profiler.span('faceSearch'):
+            joints = findJoints(bodies)
+        if not joints:
+            raise Exception('none of the selected bodies meet')
+
+        with profiler.span('plan'):
+            errors = []
+            for i, face, j in joints:
+                try:
+                    planJoint(face)
+                except ValueError as e:
+                    errors.append('{} and {}: {}'.format(
+                        bodies[i].name, bodies[j].name, e))
+            if errors:
+                raise ValueError('\n'.join(errors))
+
+        sketched = []
+        with profiler.span('sketch'):
+            for i, face, j in joints:
+                sketched.append(sketchFingers(component, face))
+
+        for (i, face, j), (sk, thickness) in zip(joints, sketched):
+            cutFingers(component, bodies[i], sk, thickness)
+
+        # Cut the other half of each joint out of the body that was met.
+        with profiler.span('combine'):
+            tools = {}
+            for i, face, j in joints:
+                tools.setdefault(j, []).append(bodies[i])
+            combines = component.features.combineFeatures
+            for j in sorted(tools):
+                toolBodies = adsk.core.ObjectCollection.create()
+                for body in tools[j]:
+                    toolBodies.add(body)
+                inp = combines.createInput(bodies[j], toolBodies)
+                inp.isKeepToolBodies = True
+                inp.operation = (
+                    adsk.fusion.FeatureOperations.CutFeatureOperation)
+                combines.add(inp)
+                profiler.count('combines')
+    return len(joints)
 
 
 def calcFingers2D(edgeLen: float, thickness: float, factor=5):
@@ -556,37 +2277,11 @@ def calcFingers2D(edgeLen: float, thickness: float, factor=5):
     will be used as the material thickness. The factor sets the desired finger
     length as a multiple of the material thickness. This is a goal only; if an
     edge is too short to allow this, this routine will calculate a smaller
-    factor to use, down to a minimum of 1.
+    factor to use, down to a minimum of 1. The fingers are returned as
+    (x1, y1, x2, y2) tuples; they only become points when they're sketched.
     """
-    fingers = []
-
-    if 3 * thickness > edgeLen:
-        return []
-    flen = factor * thickness
-    fcount = math.floor(edgeLen/flen)
-    while fcount == 0:
-        factor -= 1
-        if factor == 0:
-            return []
-        flen = factor * thickness
-        fcount = math.floor(edgeLen/flen)
-    if fcount < 3:
-        # shorten the fingers so there are at least 3.
-        flen = edgeLen / 3
-        fcount = math.floor(edgeLen/flen)
-    if fcount % 2 == 0:
-        # lengthen the fingers so there's one less
-        flen += flen/fcount
-        fcount = math.floor(edgeLen/flen)
-
-    y = (edgeLen - fcount * flen) / 2
-    for i in range(fcount):
-        if i % 2 == 1:
-            p1 = adsk.core.Point3D.create(0, y, 0)
-            p2 = adsk.core.Point3D.create(thickness, y + flen, 0)
-            fingers.append((p1, p2))
-        y += flen
-    return fingers
+    return fingerplan.fingerRects(
+        fingerplan.planFingers2D(edgeLen, thickness, factor))
 
 
 def calcFingers(edgeX: float, edgeY: float):
@@ -595,80 +2290,80 @@ def calcFingers(edgeX: float, edgeY: float):
     else:
         edgeLen, thickness = edgeY, edgeX
 
-    # This point generating routine figures out which dimension is which.
-    def point(x, y):
-        if edgeX > edgeY:
-            return adsk.core.Point3D.create(y, x, 0)
-        else:
-            return adsk.core.Point3D.create(x, y, 0)
-    fingers = []
-
-    innerHeight = edgeLen - thickness * 2
-
-    # we'll create fingers about the length of 8 * the thickness of the stock.
-    flen = 8 * thickness
-    fcount = math.floor(innerHeight/flen)
-    if fcount == 0:
-        raise ValueError('edge is too short for finger joints')
-    if fcount < 3:
-        # shorten the fingers so there are at least 3.
-        flen = innerHeight / 3
-        fcount = math.floor(innerHeight/flen)
-    if fcount % 2 == 0:
-        # lengthen the fingers so there's one less.
-        flen += flen/fcount
-        fcount = math.floor(innerHeight/flen)
-
-    y = (edgeLen - fcount * flen) / 2
-    for i in range(fcount):
-        if i % 2 == 1:
-            p1 = point(0, y)
-            p2 = point(thickness, y + flen)
-            fingers.append((p1, p2))
-        y += flen
-
+    fingers = fingerplan.fingerRects(
+        fingerplan.planFingers(edgeLen, thickness))
+    # The plan runs along the y axis; swap it if the edge runs along x.
+    if edgeX > edgeY:
+        fingers = fingerplan.swapXY(fingers)
     return fingers
 
 
+class ProfileIndex:
+    """The profiles of a sketch, indexed by their bounding boxes so that the
+    ones inside a box can be found without checking them all. An index is only
+    good for the revision of the sketch it was built from."""
+
+    def __init__(self, sketch):
+        self.revisionId = sketch.revisionId
+        self.profiles = list(sketch.profiles)
+
+        # Bounding boxes are not exact enough for our purposes - the max value
+        # of the box for profiles is frequently outside of the bounding box
+        # defined by the lines use to create the profile. For now, compensate
+        # by shrinking the profile's bounding box by the pointTolerance value.
+        # This is not a correct solution.
+        tol = app.pointTolerance
+        boxes = []
+        for pr in self.profiles:
+            lo, hi = boxTuple(pr.boundingBox)
+            boxes.append(((lo[0] + tol, lo[1] + tol, lo[2]),
+                          (hi[0] - tol, hi[1] - tol, hi[2])))
+        self.grid = spatial.GridIndex(boxes)
+
+    def contained(self, box):
+        """Returns the profiles inside box, a (lo, hi) pair of points in
+        sketch space, as an ObjectCollection."""
+        rProfiles = adsk.core.ObjectCollection.create()
+        for i in self.grid.within(box):
+            rProfiles.add(self.profiles[i])
+        return rProfiles
+
+
+# The most recently used profile indexes, by sketch entity token.
+profileIndexes = {}
+MAX_PROFILE_INDEXES = 32
+
+
+def profileIndex(sketch):
+    """Returns a ProfileIndex for sketch, reusing the last one built for it if
+    the sketch hasn't changed since."""
+    key = sketch.entityToken
+    index = profileIndexes.pop(key, None)
+    if index is None or index.revisionId != sketch.revisionId:
+        index = ProfileIndex(sketch)
+    if len(profileIndexes) >= MAX_PROFILE_INDEXES:
+        del profileIndexes[next(iter(profileIndexes))]
+    profileIndexes[key] = index
+    return index
+
+
 def findContainedProfiles(lines):
     """Find the profiles contained within a collection of lines. This is done by
-    creating a bouding box for the lines, and then returning a list of the 
+    finding the bounding box of the lines, and then returning a list of the
     sketch profiles that fall within that bounding box."""
     sk = lines.item(0).parentSketch
 
-    bbox = lines[0].boundingBox.copy()
+    lo, hi = boxTuple(lines.item(0).boundingBox)
     for line in lines:
-        bbox.combine(line.boundingBox)
-    return findContainedProfilesBBox(sk, bbox)
+        lineLo, lineHi = boxTuple(line.boundingBox)
+        lo = tuple(map(min, lo, lineLo))
+        hi = tuple(map(max, hi, lineHi))
+    return profileIndex(sk).contained((lo, hi))
 
 
 def findContainedProfilesBBox(sketch, bbox):
-    """Find the profiles contained within a bouding box. This routine works by
-    iterating through all the profiles in the sketch, and checking if the
-    bounding box for the profile is contained within the bounding box passed in
-    to this routine. Because bounding boxes in practice are often slightly 
-    larger than the geometry they contain, this routine first shrinks the bbox 
-    it's checking slightly. This is a hack, but has worked so far."""
-    prs = sketch.profiles
-
-    rProfiles = adsk.core.ObjectCollection.create()
-    # vectors used to adjust the bbox around the profile. See below.
-    lowVec = adsk.core.Vector3D.create(
-        app.pointTolerance, app.pointTolerance, 0.0)
-    highVec = adsk.core.Vector3D.create(-app.pointTolerance, -
-                                        app.pointTolerance, 0.0)
-    for pr in prs:
-        # Bounding boxes are not exact enough for our purposes - the max value
-        # of the box for profiles is frequently outside of the bounding box
-        # defined by the lines use to create the profile. For now, compensate
-        # by shrinking the profile's bounding box by the pointTolerance value.
-        # This is not a correct solution.
-        minP = pr.boundingBox.minPoint.copy()
-        minP.translateBy(lowVec)
-        maxP = pr.boundingBox.maxPoint.copy()
-        maxP.translateBy(highVec)
-        if bbox.contains(minP) and bbox.contains(maxP):
-            rProfiles.add(pr)
-            continue
-
-    return rProfiles
+    """Find the profiles contained within a bouding box. The profiles are
+    looked up in the sketch's ProfileIndex, which is built the first time the
+    sketch is searched, and again whenever it has changed since; each lookup
+    only checks the profiles near the bounding box."""
+    return profileIndex(sketch).contained(boxTuple(bbox))
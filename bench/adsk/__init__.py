@@ -0,0 +1,76 @@
+"""A stand-in for Fusion 360's adsk package, used to benchmark Boxer outside of
+Fusion. It implements just enough of the API for Boxer's geometry code to run,
+and records every call made through it along with a simulated cost, so that
+benchmarks can count API calls and estimate where Fusion would spend its time.
+
+This package is only importable when bench/ is on sys.path; it must never be
+installed alongside the real adsk package.
+"""
+
+import collections
+
+
+class Recorder:
+    """Recorder counts the API calls made through the stub, and adds up their
+    simulated cost in milliseconds."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = collections.Counter()
+        self.cost = 0.0
+
+    def record(self, name, cost=0.0):
+        self.calls[name] += 1
+        self.cost += cost
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+
+recorder = Recorder()
+
+# Simulated costs, in milliseconds, of the calls that matter. Calls that aren't
+# listed here are counted but cost DEFAULT_COST.
+COSTS = {
+    'Occurrences.addNewComponent': 30.0,
+    'Occurrences.addExistingComponent': 5.0,
+    'Sketches.add': 20.0,
+    'Sketches.addWithoutEdges': 15.0,
+    'SketchLines.addByTwoPoints': 0.3,
+    'SketchLines.addTwoPointRectangle': 1.2,
+    'ExtrudeFeatures.add': 40.0,
+    'CombineFeatures.add': 150.0,
+    'ExtrudeFeature.setProfile': 40.0,
+    'ExtrudeFeature.deleteMe': 20.0,
+    'ModelParameter.setValue': 40.0,
+    'TimelineObject.rollTo': 20.0,
+    'Timeline.moveToEnd': 20.0,
+    'SketchLine.deleteMe': 0.3,
+    'TemporaryBRepManager.createBox': 0.1,
+    'TemporaryBRepManager.booleanOperation': 0.5,
+    'BaseFeatures.add': 10.0,
+    'BaseFeature.finishEdit': 40.0,
+    'BRepBodies.add': 5.0,
+    'Design.findAttributes': 5.0,
+    'Sketch.project': 10.0,
+    'Sketch.saveAsDXF': 30.0,
+    'Sketch.deleteMe': 10.0,
+    'Profile.boundingBox': 0.05,
+    'BRepFace.boundingBox': 0.05,
+    'Sketch.modelToSketchSpace': 0.05,
+}
+DEFAULT_COST = 0.002
+
+# The cost of solving a sketch, per line in the sketch. Sketches are solved
+# after every edit unless compute is deferred.
+SOLVE_COST_PER_LINE = 0.01
+
+# The cost of finding a sketch's profiles, per line in the sketch.
+PROFILE_COST_PER_LINE = 0.05
+
+def record(name, cost=None):
+    recorder.record(name, COSTS.get(name, DEFAULT_COST) if cost is None
+                    else cost)
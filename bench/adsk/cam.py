@@ -0,0 +1 @@
+"""Stand-in for adsk.cam. Boxer imports it but doesn't use it."""
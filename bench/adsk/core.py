@@ -0,0 +1,384 @@
+"""Stand-in for adsk.core."""
+
+import math
+
+from . import record
+
+
+class Point3D:
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = float(x), float(y), float(z)
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        record('Point3D.create')
+        return Point3D(x, y, z)
+
+    def copy(self):
+        record('Point3D.copy')
+        return Point3D(self.x, self.y, self.z)
+
+    def translateBy(self, v):
+        record('Point3D.translateBy')
+        self.x += v.x
+        self.y += v.y
+        self.z += v.z
+        return True
+
+    def transformBy(self, m):
+        record('Point3D.transformBy')
+        self.x, self.y, self.z = m._apply((self.x, self.y, self.z))
+        return True
+
+    def distanceTo(self, p):
+        record('Point3D.distanceTo')
+        return math.dist((self.x, self.y, self.z), (p.x, p.y, p.z))
+
+    def asArray(self):
+        return (self.x, self.y, self.z)
+
+
+class Vector3D(Point3D):
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        record('Vector3D.create')
+        return Vector3D(x, y, z)
+
+    def copy(self):
+        record('Vector3D.copy')
+        return Vector3D(self.x, self.y, self.z)
+
+    def transformBy(self, m):
+        record('Vector3D.transformBy')
+        self.x, self.y, self.z = m._applyVector((self.x, self.y, self.z))
+        return True
+
+    def crossProduct(self, v):
+        record('Vector3D.crossProduct')
+        return Vector3D(self.y*v.z - self.z*v.y, self.z*v.x - self.x*v.z,
+                        self.x*v.y - self.y*v.x)
+
+    def dotProduct(self, v):
+        record('Vector3D.dotProduct')
+        return self.x*v.x + self.y*v.y + self.z*v.z
+
+    @property
+    def length(self):
+        return math.sqrt(self.x*self.x + self.y*self.y + self.z*self.z)
+
+    def isParallelTo(self, v):
+        record('Vector3D.isParallelTo')
+        c = Vector3D(self.y*v.z - self.z*v.y, self.z*v.x - self.x*v.z,
+                     self.x*v.y - self.y*v.x)
+        return c.length < 1e-9
+
+
+class Matrix3D:
+    def __init__(self, cells=None):
+        self.cells = list(cells) if cells else [
+            1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+    @staticmethod
+    def create():
+        record('Matrix3D.create')
+        return Matrix3D()
+
+    def copy(self):
+        record('Matrix3D.copy')
+        return Matrix3D(self.cells)
+
+    def asArray(self):
+        record('Matrix3D.asArray')
+        return list(self.cells)
+
+    def setWithArray(self, cells):
+        record('Matrix3D.setWithArray')
+        self.cells = list(cells)
+        return True
+
+    def getCell(self, row, col):
+        return self.cells[row*4 + col]
+
+    def setCell(self, row, col, value):
+        self.cells[row*4 + col] = value
+        return True
+
+    def setWithCoordinateSystem(self, origin, xAxis, yAxis, zAxis):
+        record('Matrix3D.setWithCoordinateSystem')
+        self.cells = [xAxis.x, yAxis.x, zAxis.x, origin.x,
+                      xAxis.y, yAxis.y, zAxis.y, origin.y,
+                      xAxis.z, yAxis.z, zAxis.z, origin.z,
+                      0.0, 0.0, 0.0, 1.0]
+        return True
+
+    @property
+    def translation(self):
+        return Vector3D(self.cells[3], self.cells[7], self.cells[11])
+
+    @translation.setter
+    def translation(self, v):
+        self.cells[3], self.cells[7], self.cells[11] = v.x, v.y, v.z
+
+    def invert(self):
+        record('Matrix3D.invert')
+        m = self.cells
+        rt = [m[0], m[4], m[8], m[1], m[5], m[9], m[2], m[6], m[10]]
+        t = (m[3], m[7], m[11])
+        self.cells = [
+            rt[0], rt[1], rt[2], -(rt[0]*t[0] + rt[1]*t[1] + rt[2]*t[2]),
+            rt[3], rt[4], rt[5], -(rt[3]*t[0] + rt[4]*t[1] + rt[5]*t[2]),
+            rt[6], rt[7], rt[8], -(rt[6]*t[0] + rt[7]*t[1] + rt[8]*t[2]),
+            0.0, 0.0, 0.0, 1.0]
+        return True
+
+    def transformBy(self, other):
+        """Applies other after this matrix."""
+        record('Matrix3D.transformBy')
+        a, b = other.cells, self.cells
+        self.cells = [sum(a[r*4 + k] * b[k*4 + c] for k in range(4))
+                      for r in range(4) for c in range(4)]
+        return True
+
+    def _apply(self, p):
+        m = self.cells
+        x, y, z = p
+        return (m[0]*x + m[1]*y + m[2]*z + m[3],
+                m[4]*x + m[5]*y + m[6]*z + m[7],
+                m[8]*x + m[9]*y + m[10]*z + m[11])
+
+    def _applyVector(self, v):
+        m = self.cells
+        x, y, z = v
+        return (m[0]*x + m[1]*y + m[2]*z,
+                m[4]*x + m[5]*y + m[6]*z,
+                m[8]*x + m[9]*y + m[10]*z)
+
+
+class OrientedBoundingBox3D:
+    def __init__(self, centerPoint, lengthDirection, widthDirection, length,
+                 width, height):
+        self.centerPoint = centerPoint
+        self.lengthDirection = lengthDirection
+        self.widthDirection = widthDirection
+        self.heightDirection = lengthDirection.crossProduct(widthDirection)
+        self.length = length
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def create(centerPoint, lengthDirection, widthDirection, length, width,
+               height):
+        record('OrientedBoundingBox3D.create')
+        return OrientedBoundingBox3D(centerPoint, lengthDirection,
+                                     widthDirection, length, width, height)
+
+
+class BoundingBox3D:
+    def __init__(self, minPoint, maxPoint):
+        self.minPoint = minPoint
+        self.maxPoint = maxPoint
+
+    @staticmethod
+    def create(minPoint, maxPoint):
+        record('BoundingBox3D.create')
+        return BoundingBox3D(Point3D(minPoint.x, minPoint.y, minPoint.z),
+                             Point3D(maxPoint.x, maxPoint.y, maxPoint.z))
+
+    def copy(self):
+        record('BoundingBox3D.copy')
+        return BoundingBox3D(Point3D(*self.minPoint.asArray()),
+                             Point3D(*self.maxPoint.asArray()))
+
+    def contains(self, p):
+        record('BoundingBox3D.contains')
+        lo, hi = self.minPoint, self.maxPoint
+        return (lo.x <= p.x <= hi.x and lo.y <= p.y <= hi.y and
+                lo.z <= p.z <= hi.z)
+
+    def intersects(self, box):
+        record('BoundingBox3D.intersects')
+        a, b = self, box
+        return (a.minPoint.x <= b.maxPoint.x and b.minPoint.x <= a.maxPoint.x
+                and a.minPoint.y <= b.maxPoint.y and
+                b.minPoint.y <= a.maxPoint.y and
+                a.minPoint.z <= b.maxPoint.z and b.minPoint.z <= a.maxPoint.z)
+
+    def combine(self, box):
+        record('BoundingBox3D.combine')
+        lo, hi = self.minPoint, self.maxPoint
+        self.minPoint = Point3D(min(lo.x, box.minPoint.x),
+                                min(lo.y, box.minPoint.y),
+                                min(lo.z, box.minPoint.z))
+        self.maxPoint = Point3D(max(hi.x, box.maxPoint.x),
+                                max(hi.y, box.maxPoint.y),
+                                max(hi.z, box.maxPoint.z))
+        return True
+
+
+class Plane:
+    def __init__(self, origin, uDirection, vDirection):
+        self.origin = origin
+        self.uDirection = uDirection
+        self.vDirection = vDirection
+        self.normal = Vector3D(
+            uDirection.y*vDirection.z - uDirection.z*vDirection.y,
+            uDirection.z*vDirection.x - uDirection.x*vDirection.z,
+            uDirection.x*vDirection.y - uDirection.y*vDirection.x)
+
+
+class Collection:
+    """Base for the read-only API collections."""
+
+    def __init__(self, items=None):
+        self._items = list(items) if items else []
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index]
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def itemByName(self, name):
+        for item in self._items:
+            if getattr(item, 'name', None) == name:
+                return item
+        return None
+
+
+class ObjectCollection(Collection):
+    @staticmethod
+    def create():
+        record('ObjectCollection.create')
+        return ObjectCollection()
+
+    def add(self, item):
+        record('ObjectCollection.add')
+        self._items.append(item)
+        return True
+
+    def clear(self):
+        self._items = []
+        return True
+
+
+class ValueInput:
+    def __init__(self, value):
+        self.realValue = value
+
+    @staticmethod
+    def createByReal(value):
+        record('ValueInput.createByReal')
+        return ValueInput(value)
+
+    @staticmethod
+    def createByString(value):
+        record('ValueInput.createByString')
+        return ValueInput(value)
+
+
+class CustomGraphicsCoordinates:
+    def __init__(self, coords):
+        self.coordinates = list(coords)
+
+    @staticmethod
+    def create(coords):
+        record('CustomGraphicsCoordinates.create')
+        return CustomGraphicsCoordinates(coords)
+
+
+class SurfaceTypes:
+    PlaneSurfaceType = 0
+    CylinderSurfaceType = 1
+
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+    DialogError = 2
+    DialogYes = 3
+    DialogNo = 4
+
+
+class _EventHandler:
+    def __init__(self):
+        pass
+
+
+class CommandCreatedEventHandler(_EventHandler):
+    pass
+
+
+class CommandEventHandler(_EventHandler):
+    pass
+
+
+class ValidateInputsEventHandler(_EventHandler):
+    pass
+
+
+class InputChangedEventHandler(_EventHandler):
+    pass
+
+
+class CustomEventHandler(_EventHandler):
+    pass
+
+
+class _EventArgs:
+    @classmethod
+    def cast(cls, obj):
+        return obj
+
+
+class CommandCreatedEventArgs(_EventArgs):
+    pass
+
+
+class CommandEventArgs(_EventArgs):
+    pass
+
+
+class ValidateInputsEventArgs(_EventArgs):
+    pass
+
+
+class InputChangedEventArgs(_EventArgs):
+    pass
+
+
+class CustomEventArgs(_EventArgs):
+    pass
+
+
+class UserInterface:
+    def messageBox(self, text, *args):
+        print(text)
+        return DialogResults.DialogOK
+
+
+class Application:
+    _instance = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.pointTolerance = 1e-8
+        self.activeProduct = None
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+            from . import fusion
+            Application._instance.activeProduct = fusion.Design()
+        return Application._instance
@@ -0,0 +1,987 @@
+"""Stand-in for adsk.fusion."""
+
+import math
+
+from . import core, record, recorder, PROFILE_COST_PER_LINE, \
+    SOLVE_COST_PER_LINE
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class ExtentDirections:
+    PositiveExtentDirection = 0
+    NegativeExtentDirection = 1
+    SymmetricExtentDirection = 2
+
+
+class BooleanTypes:
+    DifferenceBooleanType = 0
+    IntersectionBooleanType = 1
+    UnionBooleanType = 2
+
+
+class PatternDistanceType:
+    ExtentPatternDistanceType = 0
+    SpacingPatternDistanceType = 1
+
+
+class PatternComputeOptions:
+    OptimizedPatternCompute = 0
+    IdenticalPatternCompute = 1
+    AdjustPatternCompute = 2
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class ModelParameter:
+    def __init__(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        record('ModelParameter.value')
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        record('ModelParameter.setValue')
+        self._value = value
+
+
+class OffsetStartDefinition:
+    def __init__(self, offset):
+        self.offset = offset
+
+    @staticmethod
+    def create(offset):
+        record('OffsetStartDefinition.create')
+        return OffsetStartDefinition(offset)
+
+    @staticmethod
+    def cast(obj):
+        return obj
+
+
+class DistanceExtentDefinition:
+    def __init__(self, distance):
+        self.distance = distance
+
+    @staticmethod
+    def create(distance):
+        record('DistanceExtentDefinition.create')
+        return DistanceExtentDefinition(distance)
+
+    @staticmethod
+    def cast(obj):
+        return obj
+
+
+class ConstructionPlane:
+    def __init__(self, geometry):
+        self._geometry = geometry
+
+    @property
+    def geometry(self):
+        record('ConstructionPlane.geometry')
+        return self._geometry
+
+
+def _plane(origin, u, v):
+    return core.Plane(core.Point3D(*origin), core.Vector3D(*u),
+                      core.Vector3D(*v))
+
+
+class InfiniteLine3D:
+    def __init__(self, origin, direction):
+        self.origin = core.Point3D(*origin)
+        self.direction = core.Vector3D(*direction)
+
+
+class ConstructionAxis:
+    def __init__(self, geometry):
+        self._geometry = geometry
+
+    @property
+    def geometry(self):
+        record('ConstructionAxis.geometry')
+        return self._geometry
+
+
+class SketchPoint:
+    def __init__(self, sketch, geometry):
+        self.parentSketch = sketch
+        self.geometry = geometry
+
+
+class SketchLine:
+    def __init__(self, sketch, start, end):
+        self.parentSketch = sketch
+        self.startSketchPoint = start
+        self.endSketchPoint = end
+        self.isConstruction = False
+
+    @property
+    def boundingBox(self):
+        record('SketchLine.boundingBox')
+        a, b = self.startSketchPoint.geometry, self.endSketchPoint.geometry
+        return core.BoundingBox3D(
+            core.Point3D(min(a.x, b.x), min(a.y, b.y), min(a.z, b.z)),
+            core.Point3D(max(a.x, b.x), max(a.y, b.y), max(a.z, b.z)))
+
+    def deleteMe(self):
+        record('SketchLine.deleteMe')
+        self.parentSketch._lines.remove(self)
+        self.parentSketch._edited()
+        return True
+
+
+class SketchLines(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def _point(self, p):
+        if isinstance(p, SketchPoint):
+            return p
+        return SketchPoint(self._sketch, core.Point3D(p.x, p.y, p.z))
+
+    def addByTwoPoints(self, p1, p2):
+        record('SketchLines.addByTwoPoints')
+        line = SketchLine(self._sketch, self._point(p1), self._point(p2))
+        self._sketch._lines.append(line)
+        self._sketch._edited()
+        return line
+
+    def addTwoPointRectangle(self, p1, p2):
+        record('SketchLines.addTwoPointRectangle')
+        corners = [core.Point3D(p1.x, p1.y, 0), core.Point3D(p2.x, p1.y, 0),
+                   core.Point3D(p2.x, p2.y, 0), core.Point3D(p1.x, p2.y, 0)]
+        pts = [SketchPoint(self._sketch, c) for c in corners]
+        lines = core.ObjectCollection()
+        for i in range(4):
+            line = SketchLine(self._sketch, pts[i], pts[(i + 1) % 4])
+            self._sketch._lines.append(line)
+            lines._items.append(line)
+        self._sketch._edited()
+        return lines
+
+    def item(self, index):
+        return self._sketch._lines[index]
+
+    def __getitem__(self, index):
+        return self._sketch._lines[index]
+
+    def __iter__(self):
+        return iter(list(self._sketch._lines))
+
+    @property
+    def count(self):
+        return len(self._sketch._lines)
+
+
+class SketchCurves:
+    def __init__(self, sketch):
+        self.sketchLines = SketchLines(sketch)
+        self._sketch = sketch
+
+    def __iter__(self):
+        return iter(list(self._sketch._lines))
+
+    @property
+    def count(self):
+        return len(self._sketch._lines)
+
+    def item(self, index):
+        return self._sketch._lines[index]
+
+
+class Profile:
+    def __init__(self, sketch, bounds):
+        self.parentSketch = sketch
+        self._bounds = bounds
+
+    @property
+    def boundingBox(self):
+        record('Profile.boundingBox')
+        x1, y1, x2, y2 = self._bounds
+        return core.BoundingBox3D(core.Point3D(x1, y1, 0),
+                                  core.Point3D(x2, y2, 0))
+
+
+class Profiles(core.Collection):
+    pass
+
+
+class Sketch:
+    def __init__(self, component, transform):
+        self.parentComponent = component
+        self._transform = transform
+        self._lines = []
+        self._profiles = None
+        self._deferred = False
+        self.name = 'Sketch'
+        self.sketchCurves = SketchCurves(self)
+        self.isValid = True
+        self._revision = 0
+        Sketch._tokens += 1
+        self._token = 'sketch{}'.format(Sketch._tokens)
+
+    _tokens = 0
+
+    @property
+    def entityToken(self):
+        record('Sketch.entityToken')
+        return self._token
+
+    @property
+    def revisionId(self):
+        record('Sketch.revisionId')
+        return str(self._revision)
+
+    @property
+    def transform(self):
+        record('Sketch.transform')
+        return self._transform.copy()
+
+    @property
+    def isComputeDeferred(self):
+        return self._deferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value):
+        record('Sketch.isComputeDeferred')
+        self._deferred = value
+        if not value:
+            self._solve()
+
+    def _edited(self):
+        self._profiles = None
+        self._revision += 1
+        if not self._deferred:
+            self._solve()
+
+    def _solve(self):
+        recorder.record('Sketch.solve', SOLVE_COST_PER_LINE * len(self._lines))
+
+    @property
+    def profiles(self):
+        record('Sketch.profiles')
+        if self._profiles is None:
+            recorder.record('Sketch.computeProfiles',
+                            PROFILE_COST_PER_LINE * len(self._lines))
+            self._profiles = Profiles(
+                [Profile(self, b) for b in _traceFaces(self._lines)
+                 if not self._isConstructionOnly(b)])
+        return self._profiles
+
+    def _isConstructionOnly(self, bounds):
+        return False
+
+    def modelToSketchSpace(self, p):
+        record('Sketch.modelToSketchSpace')
+        m = self._transform.copy()
+        m.invert()
+        return core.Point3D(*m._apply((p.x, p.y, p.z)))
+
+    def sketchToModelSpace(self, p):
+        record('Sketch.sketchToModelSpace')
+        return core.Point3D(*self._transform._apply((p.x, p.y, p.z)))
+
+    def project(self, entity):
+        """Faces are projected as their outlines."""
+        record('Sketch.project')
+        m = self._transform.copy()
+        m.invert()
+        corners = [core.Point3D(*m._apply(c)) for c in entity._corners()]
+        lines = self.sketchCurves.sketchLines
+        return core.ObjectCollection(
+            [lines.addByTwoPoints(a, b)
+             for a, b in zip(corners, corners[1:] + corners[:1])])
+
+    def saveAsDXF(self, fullFilename):
+        record('Sketch.saveAsDXF')
+        with open(fullFilename, 'w') as f:
+            f.write('0\nSECTION\n2\nENTITIES\n')
+            for line in self._lines:
+                a = line.startSketchPoint.geometry
+                b = line.endSketchPoint.geometry
+                f.write('0\nLINE\n8\n0\n10\n{}\n20\n{}\n11\n{}\n21\n{}\n'
+                        .format(a.x, a.y, b.x, b.y))
+            f.write('0\nENDSEC\n0\nEOF\n')
+        return True
+
+    def deleteMe(self):
+        record('Sketch.deleteMe')
+        self.parentComponent.sketches._items.remove(self)
+        self.timelineObject._remove()
+        self.isValid = False
+        return True
+
+
+def _traceFaces(lines):
+    """Returns the bounds of the bounded faces of the planar graph formed by
+    the non-construction lines, which is what Fusion would offer as
+    profiles."""
+    def key(p):
+        return (round(p.x, 9), round(p.y, 9))
+
+    adjacent = {}
+    for line in lines:
+        if line.isConstruction:
+            continue
+        a, b = key(line.startSketchPoint.geometry), \
+            key(line.endSketchPoint.geometry)
+        if a == b:
+            continue
+        adjacent.setdefault(a, set()).add(b)
+        adjacent.setdefault(b, set()).add(a)
+    order = {v: sorted(ns, key=lambda n: math.atan2(n[1] - v[1], n[0] - v[0]))
+             for v, ns in adjacent.items()}
+    visited = set()
+    faces = []
+    for u in order:
+        for v in order[u]:
+            if (u, v) in visited:
+                continue
+            loop = []
+            a, b = u, v
+            while (a, b) not in visited:
+                visited.add((a, b))
+                loop.append(a)
+                ns = order[b]
+                i = ns.index(a)
+                a, b = b, ns[i - 1]
+            area = sum(loop[i][0] * loop[(i + 1) % len(loop)][1] -
+                       loop[(i + 1) % len(loop)][0] * loop[i][1]
+                       for i in range(len(loop)))
+            if area > 1e-12:
+                xs = [p[0] for p in loop]
+                ys = [p[1] for p in loop]
+                faces.append((min(xs), min(ys), max(xs), max(ys)))
+    return faces
+
+
+class Sketches(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def _transformFor(self, planarEntity):
+        if isinstance(planarEntity, BRepFace):
+            return planarEntity._sketchTransform()
+        geom = planarEntity.geometry
+        m = core.Matrix3D()
+        m.setWithCoordinateSystem(geom.origin, geom.uDirection,
+                                  geom.vDirection, geom.normal)
+        return m
+
+    def addWithoutEdges(self, planarEntity):
+        record('Sketches.addWithoutEdges')
+        sk = Sketch(self._component, self._transformFor(planarEntity))
+        sk.timelineObject = _addToTimeline('Sketch')
+        self._items.append(sk)
+        return sk
+
+    def add(self, planarEntity, occurrence=None):
+        record('Sketches.add')
+        sk = Sketch(self._component, self._transformFor(planarEntity))
+        sk.timelineObject = _addToTimeline('Sketch')
+        self._items.append(sk)
+        if isinstance(planarEntity, BRepFace):
+            # Project the edges of the face, which is always a rectangle here.
+            inv = sk._transform.copy()
+            inv.invert()
+            corners = [core.Point3D(*inv._apply(c))
+                       for c in planarEntity._corners()]
+            pts = [SketchPoint(sk, c) for c in corners]
+            for i in range(4):
+                sk._lines.append(SketchLine(sk, pts[i], pts[(i + 1) % 4]))
+        return sk
+
+
+class BRepFace:
+    def __init__(self, body, lo, hi):
+        self.body = body
+        self._lo = lo
+        self._hi = hi
+
+    @property
+    def boundingBox(self):
+        record('BRepFace.boundingBox')
+        return core.BoundingBox3D(core.Point3D(*self._lo),
+                                  core.Point3D(*self._hi))
+
+    @property
+    def area(self):
+        record('BRepFace.area')
+        (i, j), _ = self._axes()
+        return (self._hi[i] - self._lo[i]) * (self._hi[j] - self._lo[j])
+
+    @property
+    def geometry(self):
+        record('BRepFace.geometry')
+        return _Surface(core.SurfaceTypes.PlaneSurfaceType)
+
+    @property
+    def pointOnFace(self):
+        record('BRepFace.pointOnFace')
+        return core.Point3D(*[(a + b) / 2 for a, b in zip(self._lo, self._hi)])
+
+    def _axes(self):
+        flat = [i for i in range(3) if self._hi[i] - self._lo[i] < 1e-12][0]
+        return [i for i in range(3) if i != flat], flat
+
+    def _corners(self):
+        (i, j), flat = self._axes()
+        corners = []
+        for a, b in [(0, 0), (1, 0), (1, 1), (0, 1)]:
+            p = list(self._lo)
+            p[i] = (self._lo, self._hi)[a][i]
+            p[j] = (self._lo, self._hi)[b][j]
+            corners.append(tuple(p))
+        return corners
+
+    def _sketchTransform(self):
+        (i, j), _ = self._axes()
+        u = [0.0, 0.0, 0.0]
+        v = [0.0, 0.0, 0.0]
+        u[i] = 1.0
+        v[j] = 1.0
+        geom = core.Plane(core.Point3D(*self._lo), core.Vector3D(*u),
+                          core.Vector3D(*v))
+        m = core.Matrix3D()
+        m.setWithCoordinateSystem(geom.origin, geom.uDirection,
+                                  geom.vDirection, geom.normal)
+        return m
+
+
+class _Surface:
+    def __init__(self, surfaceType):
+        self.surfaceType = surfaceType
+
+
+class BRepFaces(core.Collection):
+    pass
+
+
+class BRepBody:
+    def __init__(self, lo, hi, name='Body'):
+        self.name = name
+        self._lo = tuple(lo)
+        self._hi = tuple(hi)
+        self.isValid = True
+
+    @staticmethod
+    def box(lo, hi, name='Body'):
+        """Makes a box-shaped body; used by the benchmarks."""
+        return BRepBody(lo, hi, name)
+
+    @property
+    def boundingBox(self):
+        record('BRepBody.boundingBox')
+        return core.BoundingBox3D(core.Point3D(*self._lo),
+                                  core.Point3D(*self._hi))
+
+    @property
+    def faces(self):
+        record('BRepBody.faces')
+        faces = []
+        for axis in range(3):
+            for side in (self._lo, self._hi):
+                lo, hi = list(self._lo), list(self._hi)
+                lo[axis] = hi[axis] = side[axis]
+                faces.append(BRepFace(self, tuple(lo), tuple(hi)))
+        return BRepFaces(faces)
+
+
+class BRepBodies(core.Collection):
+    def add(self, body, baseFeature=None):
+        record('BRepBodies.add')
+        body = BRepBody(body._lo, body._hi)
+        self._items.append(body)
+        return body
+
+
+class TemporaryBRepManager:
+    """Temporary bodies are kept as their bounding boxes, like the rest of the
+    stand-in's bodies."""
+
+    @staticmethod
+    def get():
+        return TemporaryBRepManager()
+
+    def createBox(self, box):
+        record('TemporaryBRepManager.createBox')
+        sides = ((box.lengthDirection, box.length),
+                 (box.widthDirection, box.width),
+                 (box.heightDirection, box.height))
+        extent = [sum(abs(d.asArray()[i]) * n / 2 for d, n in sides)
+                  for i in range(3)]
+        c = box.centerPoint.asArray()
+        return BRepBody(tuple(c[i] - extent[i] for i in range(3)),
+                        tuple(c[i] + extent[i] for i in range(3)))
+
+    def booleanOperation(self, targetBody, toolBody, booleanType):
+        record('TemporaryBRepManager.booleanOperation')
+        if booleanType == BooleanTypes.UnionBooleanType:
+            targetBody._lo = tuple(map(min, targetBody._lo, toolBody._lo))
+            targetBody._hi = tuple(map(max, targetBody._hi, toolBody._hi))
+        return True
+
+
+class BaseFeature:
+    def __init__(self):
+        self.name = 'Base Feature'
+        self.timelineObject = _addToTimeline('BaseFeature')
+
+    def startEdit(self):
+        record('BaseFeature.startEdit')
+        return True
+
+    def finishEdit(self):
+        record('BaseFeature.finishEdit')
+        return True
+
+
+class BaseFeatures(core.Collection):
+    def add(self):
+        record('BaseFeatures.add')
+        feature = BaseFeature()
+        self._items.append(feature)
+        return feature
+
+
+class ExtrudeFeatureInput:
+    def __init__(self, profiles, operation):
+        self.profile = profiles
+        self.operation = operation
+        self.startExtent = None
+        self.participantBodies = []
+        self._extent = None
+        self._direction = ExtentDirections.PositiveExtentDirection
+
+    def setOneSideExtent(self, extent, direction, taperAngle=None):
+        record('ExtrudeFeatureInput.setOneSideExtent')
+        self._extent = extent
+        self._direction = direction
+        return True
+
+
+class ExtrudeFeature:
+    def __init__(self, features, inp, bodies):
+        self._features = features
+        self.bodies = BRepBodies(bodies)
+        self.name = 'Extrude{}'.format(len(features) + 1)
+        self._profile = inp.profile
+        self.extentOne = DistanceExtentDefinition(
+            ModelParameter(inp._extent.distance.realValue))
+        self.startExtent = OffsetStartDefinition(ModelParameter(
+            inp.startExtent.offset.realValue if inp.startExtent else 0.0))
+        self.timelineObject = _addToTimeline('ExtrudeFeature')
+
+    @property
+    def profile(self):
+        record('ExtrudeFeature.profile')
+        return self._profile
+
+    @profile.setter
+    def profile(self, value):
+        record('ExtrudeFeature.setProfile')
+        self._profile = value
+
+    def deleteMe(self):
+        record('ExtrudeFeature.deleteMe')
+        self._features._items.remove(self)
+        self.timelineObject._remove()
+        return True
+
+
+class ExtrudeFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, profiles, operation):
+        record('ExtrudeFeatures.createInput')
+        return ExtrudeFeatureInput(profiles, operation)
+
+    def add(self, inp):
+        record('ExtrudeFeatures.add')
+        profiles = inp.profile
+        if isinstance(profiles, Profile):
+            profiles = [profiles]
+        profiles = list(profiles)
+        sketch = profiles[0].parentSketch
+        bounds = [p._bounds for p in profiles]
+        x1 = min(b[0] for b in bounds)
+        y1 = min(b[1] for b in bounds)
+        x2 = max(b[2] for b in bounds)
+        y2 = max(b[3] for b in bounds)
+        start = inp.startExtent.offset.realValue if inp.startExtent else 0.0
+        dist = inp._extent.distance.realValue
+        if inp._direction == ExtentDirections.NegativeExtentDirection:
+            dist = -dist
+        corners = [sketch._transform._apply((x, y, z))
+                   for x in (x1, x2) for y in (y1, y2)
+                   for z in (start, start + dist)]
+        lo = tuple(min(c[i] for c in corners) for i in range(3))
+        hi = tuple(max(c[i] for c in corners) for i in range(3))
+        bodies = []
+        if inp.operation == FeatureOperations.NewBodyFeatureOperation:
+            body = BRepBody(lo, hi)
+            self._component.bRepBodies._items.append(body)
+            bodies.append(body)
+        feature = ExtrudeFeature(self, inp, bodies)
+        self._items.append(feature)
+        return feature
+
+
+class CombineFeatureInput:
+    def __init__(self, target, tools):
+        self.targetBody = target
+        self.toolBodies = tools
+        self.isKeepToolBodies = False
+        self.operation = FeatureOperations.JoinFeatureOperation
+
+
+class CombineFeatures(core.Collection):
+    def createInput(self, target, tools):
+        record('CombineFeatures.createInput')
+        return CombineFeatureInput(target, tools)
+
+    def add(self, inp):
+        record('CombineFeatures.add')
+        inp.timelineObject = _addToTimeline('CombineFeature')
+        self._items.append(inp)
+        return inp
+
+
+class RectangularPatternFeatureInput:
+    def __init__(self, entities, directionOne, quantityOne, distanceOne,
+                 patternDistanceType):
+        self.inputEntities = entities
+        self.directionOneEntity = directionOne
+        self.quantityOne = quantityOne
+        self.distanceOne = distanceOne
+        self.patternDistanceType = patternDistanceType
+        self.patternComputeOption = (
+            PatternComputeOptions.OptimizedPatternCompute)
+
+
+class RectangularPatternFeature:
+    def __init__(self, bodies):
+        self.bodies = BRepBodies(bodies)
+        self.timelineObject = _addToTimeline('RectangularPatternFeature')
+
+
+class RectangularPatternFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, inputEntities, directionOneEntity, quantityOne,
+                    distanceOne, patternDistanceType):
+        record('RectangularPatternFeatures.createInput')
+        return RectangularPatternFeatureInput(
+            inputEntities, directionOneEntity, quantityOne, distanceOne,
+            patternDistanceType)
+
+    def add(self, inp):
+        count = int(inp.quantityOne.realValue)
+        # Every copy of a feature is recomputed against the bodies it lands
+        # on, unless the copies are identical.
+        perCopy = (2.0 if inp.patternComputeOption ==
+                   PatternComputeOptions.IdenticalPatternCompute else 30.0)
+        record('RectangularPatternFeatures.add', 40.0 + perCopy * (count - 1))
+        step = inp.directionOneEntity._geometry.direction.asArray()
+        pitch = inp.distanceOne.realValue
+        bodies = []
+        for entity in inp.inputEntities:
+            if not isinstance(entity, BRepBody):
+                continue
+            for i in range(1, count):
+                offset = [d * pitch * i for d in step]
+                body = BRepBody(tuple(map(sum, zip(entity._lo, offset))),
+                                tuple(map(sum, zip(entity._hi, offset))))
+                self._component.bRepBodies._items.append(body)
+                bodies.append(body)
+        feature = RectangularPatternFeature(bodies)
+        self._items.append(feature)
+        return feature
+
+
+class Features:
+    def __init__(self, component):
+        self.extrudeFeatures = ExtrudeFeatures(component)
+        self.rectangularPatternFeatures = RectangularPatternFeatures(component)
+        self.combineFeatures = CombineFeatures()
+        self.baseFeatures = BaseFeatures()
+
+
+class CustomGraphicsEntity:
+    def __init__(self):
+        self.transform = core.Matrix3D()
+        self.isValid = True
+
+
+class CustomGraphicsGroup:
+    def __init__(self, groups):
+        self._groups = groups
+        self.isValid = True
+
+    def addLines(self, coordinates, indexList, isLineStrip,
+                 lineStripLengths=None):
+        record('CustomGraphicsGroup.addLines')
+        return CustomGraphicsEntity()
+
+    def deleteMe(self):
+        record('CustomGraphicsGroup.deleteMe')
+        self._groups._items.remove(self)
+        self.isValid = False
+        return True
+
+
+class CustomGraphicsGroups(core.Collection):
+    def add(self):
+        record('CustomGraphicsGroups.add')
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+
+class TimelineObject:
+    def __init__(self, timeline=None, kind=None):
+        self._timeline = timeline
+        self.kind = kind
+
+    def rollTo(self, rollBefore):
+        record('TimelineObject.rollTo')
+        return True
+
+    def _remove(self):
+        if self._timeline is not None:
+            self._timeline._remove(self)
+
+
+def _addToTimeline(kind):
+    """Adds an entry for a new feature of the given kind to the active
+    design's timeline, if it has one, and returns it."""
+    des = core.Application.get().activeProduct
+    if (des is None or
+            des.designType != DesignTypes.ParametricDesignType):
+        return TimelineObject()
+    return des.timeline._insert(kind)
+
+
+class TimelineGroup:
+    def __init__(self, start, end):
+        self.name = 'Group'
+        self.start = start
+        self.end = end
+
+
+class TimelineGroups(core.Collection):
+    def add(self, startIndex, endIndex):
+        record('TimelineGroups.add')
+        group = TimelineGroup(startIndex, endIndex)
+        self._items.append(group)
+        return group
+
+
+class Timeline:
+    def __init__(self):
+        self.markerPosition = 0
+        self._entries = []
+        self.timelineGroups = TimelineGroups()
+
+    @property
+    def count(self):
+        return len(self._entries)
+
+    def moveToEnd(self):
+        record('Timeline.moveToEnd')
+        self.markerPosition = self.count
+
+    def _insert(self, kind):
+        # New features go in at the marker, like they do in Fusion.
+        entry = TimelineObject(self, kind)
+        self._entries.insert(self.markerPosition, entry)
+        self.markerPosition += 1
+        return entry
+
+    def _remove(self, entry):
+        i = self._entries.index(entry)
+        del self._entries[i]
+        if i < self.markerPosition:
+            self.markerPosition -= 1
+
+
+class Attribute:
+    def __init__(self, parent, groupName, name, value):
+        self.parent = parent
+        self.groupName = groupName
+        self.name = name
+        self.value = value
+
+
+class Attributes(core.Collection):
+    def __init__(self, parent=None):
+        super().__init__()
+        self._parent = parent
+
+    def add(self, groupName, name, value):
+        record('Attributes.add')
+        attr = self.itemByName(groupName, name)
+        if attr is None:
+            attr = Attribute(self._parent, groupName, name, value)
+            self._items.append(attr)
+        attr.value = value
+        return attr
+
+    def itemByName(self, groupName, name):
+        record('Attributes.itemByName')
+        for attr in self._items:
+            if attr.groupName == groupName and attr.name == name:
+                return attr
+        return None
+
+
+class Component:
+    _tokens = 0
+
+    def __init__(self, name='Component'):
+        Component._tokens += 1
+        self._token = 'component{}'.format(Component._tokens)
+        self.name = name
+        self.isValid = True
+        self.attributes = Attributes(self)
+        self.sketches = Sketches(self)
+        self.features = Features(self)
+        self.bRepBodies = BRepBodies()
+        self.occurrences = Occurrences()
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.xYConstructionPlane = ConstructionPlane(
+            _plane((0, 0, 0), (1, 0, 0), (0, 1, 0)))
+        self.xZConstructionPlane = ConstructionPlane(
+            _plane((0, 0, 0), (1, 0, 0), (0, 0, -1)))
+        self.yZConstructionPlane = ConstructionPlane(
+            _plane((0, 0, 0), (0, 1, 0), (0, 0, 1)))
+        self.xConstructionAxis = ConstructionAxis(
+            InfiniteLine3D((0, 0, 0), (1, 0, 0)))
+        self.yConstructionAxis = ConstructionAxis(
+            InfiniteLine3D((0, 0, 0), (0, 1, 0)))
+        self.zConstructionAxis = ConstructionAxis(
+            InfiniteLine3D((0, 0, 0), (0, 0, 1)))
+
+    @property
+    def entityToken(self):
+        record('Component.entityToken')
+        return self._token
+
+    def allOccurrencesByComponent(self, component):
+        record('Component.allOccurrencesByComponent')
+        found = []
+        pending = list(self.occurrences._items)
+        while pending:
+            occ = pending.pop()
+            if occ.component is component:
+                found.append(occ)
+            pending += occ.component.occurrences._items
+        return core.Collection(found)
+
+    @staticmethod
+    def cast(obj):
+        return obj if isinstance(obj, Component) else None
+
+
+class Occurrence:
+    def __init__(self, component, transform):
+        self.component = component
+        self.transform = transform
+        self._occurrences = None
+        self.timelineObject = None
+
+    def deleteMe(self):
+        record('Occurrence.deleteMe')
+        self._occurrences._items.remove(self)
+        if self.timelineObject is not None:
+            self.timelineObject._remove()
+        self.component.isValid = False
+        return True
+
+
+class Occurrences(core.Collection):
+    def addNewComponent(self, transform):
+        record('Occurrences.addNewComponent')
+        occ = Occurrence(Component('Component{}'.format(Component._tokens)),
+                         transform.copy())
+        occ.timelineObject = _addToTimeline('Component')
+        occ._occurrences = self
+        self._items.append(occ)
+        return occ
+
+    def addExistingComponent(self, component, transform):
+        record('Occurrences.addExistingComponent')
+        occ = Occurrence(component, transform.copy())
+        occ._occurrences = self
+        self._items.append(occ)
+        return occ
+
+
+class UnitsManager:
+    defaultLengthUnits = 'mm'
+
+    def convert(self, value, fromUnits, toUnits):
+        scale = {'mm': 0.1, 'cm': 1.0, 'm': 100.0, 'in': 2.54}
+        return value * scale[fromUnits] / scale[toUnits]
+
+    def formatInternalValue(self, value, units=None, showUnits=True):
+        return '{:.2f} mm'.format(value * 10)
+
+
+class Design:
+    def __init__(self):
+        self.rootComponent = Component('Root')
+        self.unitsManager = UnitsManager()
+        self.designType = DesignTypes.ParametricDesignType
+        self.timeline = Timeline()
+
+    def findAttributes(self, groupName, attributeName):
+        # Fusion keeps attributes indexed, so this costs the same however
+        # big the design is.
+        record('Design.findAttributes')
+        found = []
+        seen = set()
+        pending = [self.rootComponent]
+        while pending:
+            component = pending.pop()
+            if id(component) in seen:
+                continue
+            seen.add(id(component))
+            found += [a for a in component.attributes._items
+                      if a.groupName == groupName and a.name == attributeName]
+            pending += [o.component for o in component.occurrences._items]
+        return found
+
+    def computeAll(self):
+        # A full recompute runs every entry in the timeline again. There's no
+        # telling here what that costs in Fusion, so each entry is counted,
+        # but costs nothing.
+        record('Design.computeAll')
+        if self.designType == DesignTypes.ParametricDesignType:
+            for entry in self.timeline._entries:
+                recorder.record('Timeline.compute' + entry.kind)
+        return True
+
+    @staticmethod
+    def cast(obj):
+        return obj
@@ -0,0 +1,444 @@
+"""Headless benchmarks for Boxer. This runs Boxer's geometry code against the
+stand-in adsk package in bench/adsk, across a grid of box sizes and finger
+scales, and records for each case the number of API calls made, their
+simulated cost (see bench/adsk/__init__.py) and the wall time.
+
+    python bench/run.py             # compare against bench/baselines.json
+    python bench/run.py --update    # record new cases and changed calls
+    python bench/run.py --update --filter drawBox --update-times
+
+The run fails if any case makes more API calls, has a higher simulated cost,
+or takes noticeably longer than its baseline. Call counts and costs are exact,
+but wall time depends on the machine and what else it's doing, so the time
+check only catches large regressions; tighten it with --time-tolerance on a
+quiet machine.
+
+--update only records baselines for new cases and for cases whose call count
+or cost has changed, and lists each of those changes. Wall times are kept as
+they were unless --update-times is given, which is best narrowed with
+--filter to the cases a change is meant to speed up or slow down.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINES = os.path.join(BENCH_DIR, 'baselines.json')
+
+# The stand-in adsk package has to be found before any real one.
+sys.path.insert(0, BENCH_DIR)
+
+import adsk  # noqa: E402
+import adsk.core  # noqa: E402
+import adsk.fusion  # noqa: E402
+
+# Box sizes (length, width, height) and material thicknesses, in cm, and finger
+# scales to benchmark.
+SIZES = [(10.0, 8.0, 5.0), (30.0, 20.0, 15.0), (60.0, 40.0, 30.0)]
+THICKNESSES = [0.3, 0.6]
+FINGER_SCALES = [1, 3, 5, 10]
+
+# The number of edges planned at once by the batched finger planner.
+BATCH_EDGES = 100000
+
+# The number of panels nested onto sheets, and the size of the sheets.
+NEST_PANELS = 5000
+NEST_SHEET = (60.0, 40.0)
+
+
+def loadBoxer():
+    """Imports Boxer.py the way Fusion does, as a module in a package named
+    after the add-in, so that its relative imports work."""
+    pkg = types.ModuleType('boxeraddin')
+    pkg.__path__ = [REPO_DIR]
+    sys.modules['boxeraddin'] = pkg
+    boxer = importlib.import_module('boxeraddin.Boxer')
+    boxer.app = adsk.core.Application.get()
+    boxer.ui = boxer.app.userInterface
+    return boxer
+
+
+def newDesign(boxer):
+    """Gives Boxer an empty design to work in."""
+    des = adsk.fusion.Design()
+    boxer.app.activeProduct = des
+    return des
+
+
+def boxInputs(boxer, des, size, thickness, fingerScale, drawLid=True):
+    inp = boxer.boxerInputs()
+    inp.plane = des.rootComponent.xZConstructionPlane
+    inp.length, inp.width, inp.height = size
+    inp.thickness = thickness
+    inp.fingerScale = fingerScale
+    inp.drawLid = drawLid
+    inp.dimsOuter = True
+    return inp
+
+
+def measure(fn, repeat):
+    """Runs fn repeat times and returns (calls, cost, seconds), where the calls
+    and cost are from the last run and the time is the best of all of them."""
+    best = None
+    for _ in range(repeat):
+        run = fn()
+        adsk.recorder.reset()
+        # Keep garbage left over from earlier cases from being collected on
+        # this one's time.
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return adsk.recorder.total, adsk.recorder.cost, best
+
+
+def cases(boxer):
+    """Yields (name, fn) pairs. Each fn does any setup that shouldn't be timed,
+    and returns a function that runs the case."""
+    grid = [(size, t, f) for size in SIZES for t in THICKNESSES
+            for f in FINGER_SCALES]
+
+    def gridName(size, t, f):
+        return '{}x{}x{}/t{}/f{}'.format(*size, t, f)
+
+    for size, t, f in grid:
+        def calcFingers2D(size=size, t=t, f=f):
+            boxer.fingerplan._planFingers2D.cache_clear()
+
+            def run():
+                for edge in size:
+                    boxer.calcFingers2D(edge, t, f)
+            return run
+        yield 'calcFingers2D/' + gridName(size, t, f), calcFingers2D
+
+    def planFingers2DBatch():
+        # Every edge of every box in the grid, at a range of scales, and some
+        # edges right at the sizes where the plan changes. The batched plans
+        # have to match planFingers2D's exactly.
+        edges = [(edge * k, t, f) for size, t, f in grid for edge in size
+                 for k in (0.25, 0.5, 1, 2, 4)]
+        edges += [(t * n, t, f) for t in THICKNESSES for f in FINGER_SCALES
+                  for n in range(1, 40)]
+        edges = (edges * (BATCH_EDGES // len(edges) + 1))[:BATCH_EDGES]
+        lengths, thicknesses, factors = [list(c) for c in zip(*edges)]
+        vecplan = importlib.import_module('boxeraddin.boxerlib.vecplan')
+        batch = vecplan.plans(*vecplan.planFingers2DBatch(
+            lengths, thicknesses, factors), thicknesses)
+        for plan, edge in zip(batch, edges):
+            if plan != boxer.fingerplan.planFingers2D(*edge):
+                raise AssertionError('batched plan for {} is {}, not {}'.format(
+                    edge, plan, boxer.fingerplan.planFingers2D(*edge)))
+        boxer.fingerplan._planFingers2D.cache_clear()
+        return lambda: vecplan.planFingers2DBatch(
+            lengths, thicknesses, factors)
+    if importlib.import_module('boxeraddin.boxerlib.vecplan').numpy is None:
+        # Then the batch planner is planFingers2D in a loop, and the case
+        # only checks it against itself; tests/test_vecplan.py checks the
+        # NumPy planner when NumPy is installed.
+        print('note: NumPy is not installed, so planFingers2DBatch runs its '
+              'scalar fallback, not the NumPy planner', file=sys.stderr)
+    yield 'planFingers2DBatch/{}'.format(BATCH_EDGES), planFingers2DBatch
+
+    def nestSheets():
+        # Boxes of a hundred different sizes, with lids, so six panels each.
+        specs = [boxer.spec.BoxSpec(8.0 + i % 10 * 2.5, 6.0 + i // 10 % 10,
+                                    4.0 + i % 7, 0.3, True, 5, True, 0, 0,
+                                    (), None)
+                 for i in range(NEST_PANELS // 6)]
+        flatpattern = importlib.import_module(
+            'boxeraddin.boxerlib.flatpattern')
+        boxer.panels._boxPanels.cache_clear()
+
+        def run():
+            sheets = flatpattern.nestSheets(specs, *NEST_SHEET, gap=0.2)
+            for sheet in sheets:
+                for _, _, p in sheet:
+                    if (p.x + p.width > NEST_SHEET[0] or
+                            p.y + p.height > NEST_SHEET[1]):
+                        raise AssertionError('{} is off the sheet'.format(p))
+        return run
+    yield 'nestSheets/{}'.format(NEST_PANELS), nestSheets
+
+    def checkJoints():
+        # Every box in the grid, with and without a lid, dividers and hinges.
+        jointcheck = importlib.import_module('boxeraddin.boxerlib.jointcheck')
+        boxes = [boxer.panels.boxPanels(*size, t, lid, f, True, d, d, h)
+                 for size, t, f in grid for lid in (False, True)
+                 for d, h in ((0, ()), (2, ('front', 'back')))]
+
+        def run():
+            for boxPanels in boxes:
+                problems = jointcheck.checkJoints(boxPanels)
+                if problems:
+                    raise AssertionError(jointcheck.describe(problems[0]))
+        return run
+    yield 'checkJoints/{}'.format(len(grid) * 4), checkJoints
+
+    for size, t, f in grid:
+        def drawBox(size=size, t=t, f=f):
+            des = newDesign(boxer)
+            inputs = boxInputs(boxer, des, size, t, f)
+            boxer.fingerplan._planFingers2D.cache_clear()
+            boxer.panels._boxPanels.cache_clear()
+            boxer.jointcheck.clearPlanCache()
+            return lambda: boxer.drawBox(inputs)
+        yield 'drawBox/' + gridName(size, t, f), drawBox
+
+    for size, t, f in grid:
+        def drawBoxFast(size=size, t=t, f=f):
+            des = newDesign(boxer)
+            inputs = boxInputs(boxer, des, size, t, f)
+            inputs.fastSolid = True
+            boxer.fingerplan._planFingers2D.cache_clear()
+            boxer.panels._boxPanels.cache_clear()
+            boxer.jointcheck.clearPlanCache()
+            return lambda: boxer.drawBox(inputs)
+        yield 'drawBoxFast/' + gridName(size, t, f), drawBoxFast
+
+    for n in (2, 10):
+        def drawBoxDividers(n=n):
+            des = newDesign(boxer)
+            inputs = boxInputs(boxer, des, SIZES[-1], THICKNESSES[0], 5)
+            inputs.dividersX = inputs.dividersY = n
+            boxer.fingerplan._planFingers2D.cache_clear()
+            boxer.panels._boxPanels.cache_clear()
+            boxer.jointcheck.clearPlanCache()
+            return lambda: boxer.drawBox(inputs)
+        yield 'drawBoxDividers/{}x{}'.format(n, n), drawBoxDividers
+
+    # A hinge of over 3000 slits in the front of the biggest box. With no
+    # dividers it's a pattern of its first two lines; the dividers' slots cut
+    # some of the slits short, so then every slit is sketched.
+    for dividersX, mode in ((0, 'pattern'), (2, 'sketch')):
+        def drawBoxHinge(dividersX=dividersX):
+            des = newDesign(boxer)
+            inputs = boxInputs(boxer, des, SIZES[-1], THICKNESSES[0], 5)
+            inputs.hinges = ('front',)
+            inputs.dividersX = dividersX
+            boxer.panels._boxPanels.cache_clear()
+            boxer.jointcheck.clearPlanCache()
+            return lambda: boxer.drawBox(inputs)
+        yield 'drawBoxHinge/' + mode, drawBoxHinge
+
+    def orderHinge():
+        flatpattern = importlib.import_module(
+            'boxeraddin.boxerlib.flatpattern')
+        toolpath = importlib.import_module('boxeraddin.boxerlib.toolpath')
+        panel = boxer.spec.specPanels(boxer.spec.BoxSpec(
+            *SIZES[-1], THICKNESSES[0], True, 5, True, 0, 0, ('front',),
+            None))[2]
+        contours = flatpattern.panelContours(panel)
+        return lambda: toolpath.orderContours(contours)
+    yield 'orderContours/hinge', orderHinge
+
+    for size, t, _ in grid[::len(FINGER_SCALES)]:
+        def fingerJointEdge(size=size, t=t):
+            des = newDesign(boxer)
+            length, width, height = size
+            side = adsk.fusion.BRepBody.box((0, 0, 0), (t, width, height))
+            base = adsk.fusion.BRepBody.box((0, 0, 0), (length, width, t))
+            boxer.fingerplan._planFingers.cache_clear()
+            return lambda: boxer.fingerJointEdge(des.rootComponent, side, base)
+        yield 'fingerJointEdge/{}x{}x{}/t{}'.format(*size, t), fingerJointEdge
+
+    for field, scale in (('height', 1.5), ('length', 1.5), ('thickness', 2)):
+        def editBox(field=field, scale=scale):
+            des = newDesign(boxer)
+            size, t = SIZES[-1], THICKNESSES[0]
+            component = boxer.drawBox(boxInputs(boxer, des, size, t, 5)).component
+            inputs = boxInputs(boxer, des, size, t, 5)
+            setattr(inputs, field, getattr(inputs, field) * scale)
+            return lambda: boxer.editBox(component, inputs)
+        yield 'editBox/{}'.format(field), editBox
+
+    for n in (2, 10):
+        def jointBodies(n=n):
+            # n open boxes in a row, each made of five overlapping panels.
+            des = newDesign(boxer)
+            (length, width, height), t = SIZES[-1], THICKNESSES[0]
+            bodies = []
+            for k in range(n):
+                x = k * (length + 1)
+                for lo, hi in [
+                        ((0, 0, 0), (length, width, t)),
+                        ((0, 0, 0), (length, t, height)),
+                        ((0, width - t, 0), (length, width, height)),
+                        ((0, 0, 0), (t, width, height)),
+                        ((length - t, 0, 0), (length, width, height))]:
+                    bodies.append(adsk.fusion.BRepBody.box(
+                        (x + lo[0], lo[1], lo[2]), (x + hi[0], hi[1], hi[2])))
+            boxer.fingerplan._planFingers.cache_clear()
+            return lambda: boxer.jointBodies(des.rootComponent, bodies)
+        yield 'jointBodies/{}x5'.format(n), jointBodies
+
+    def batchSpecs(n):
+        # n boxes, drawn from n // 2 different specs.
+        return [boxer.spec.BoxSpec(10.0 + i % (n // 2), 8.0, 5.0, 0.3, True,
+                                   5, True, 0, 0, (), None)
+                for i in range(n)]
+
+    for n in (20, 100):
+        def boxIndex(n=n):
+            des = newDesign(boxer)
+            boxer.boxIndex = None
+            for s in batchSpecs(n):
+                boxer.drawBox(boxer.inputsFromSpec(s))
+
+            def run():
+                boxer.boxIndex = None
+                boxer.designBoxIndex(des).duplicates()
+            return run
+        yield 'boxIndex/{}'.format(n), boxIndex
+
+    # The timeline entries recomputed in a design with ten boxes in it, built
+    # as sketches and extrudes, as the same in timeline groups, and as base
+    # features. The stand-in can't say what a recompute costs, so these only
+    # count the entries: the calls are one per entry, and the cost is 0.
+    for mode in ('timeline', 'grouped', 'fastSolid'):
+        def recompute(mode=mode):
+            des = newDesign(boxer)
+            for i in range(10):
+                inputs = boxInputs(boxer, des, SIZES[i % len(SIZES)],
+                                   THICKNESSES[0], 5)
+                inputs.groupTimeline = mode == 'grouped'
+                inputs.fastSolid = mode == 'fastSolid'
+                boxer.drawBox(inputs)
+            return des.computeAll
+        yield 'recomputeEntries/{}'.format(mode), recompute
+
+    def drawBoxesAgain():
+        # Drawing a batch into a design that already has its boxes reuses
+        # their components.
+        newDesign(boxer)
+        boxer.boxIndex = None
+        specs = batchSpecs(20)
+        boxer.drawBoxes(specs)
+        boxer.boxIndex = None
+        return lambda: boxer.drawBoxes(specs)
+    yield 'drawBoxes/again', drawBoxesAgain
+
+    def exportBoxes():
+        # Ten boxes, five of them copies, with dividers in some.
+        newDesign(boxer)
+        boxer.boxIndex = None
+        specs = [s._replace(dividersX=i % 3) for i, s in
+                 enumerate(batchSpecs(10))]
+        boxer.drawBoxes(specs)
+        folder = tempfile.mkdtemp(prefix='boxer-bench-')
+        return lambda: boxer.exportBoxes(folder)
+    yield 'exportBoxes/10', exportBoxes
+
+    for n in (10, 30):
+        def findContainedProfilesBBox(n=n):
+            des = newDesign(boxer)
+            comp = des.rootComponent
+            sk = comp.sketches.addWithoutEdges(comp.xYConstructionPlane)
+            boxer.sketchRects(sk, [(i, j, i + 0.5, j + 0.5)
+                                   for i in range(n) for j in range(n)])
+            sk.profiles
+            queries = [adsk.core.BoundingBox3D(
+                adsk.core.Point3D(i - 0.1, j - 0.1, 0),
+                adsk.core.Point3D(i + 2.6, j + 2.6, 0))
+                for i in range(0, n, 3) for j in range(0, n, 3)]
+
+            def run():
+                for q in queries:
+                    boxer.findContainedProfilesBBox(sk, q)
+            return run
+        yield 'findContainedProfilesBBox/{}x{}'.format(n, n), \
+            findContainedProfilesBBox
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--update', action='store_true',
+                        help='record baselines for new cases, and new call '
+                             'counts and costs for cases whose calls changed')
+    parser.add_argument('--update-times', action='store_true',
+                        help='with --update, record the wall times as well')
+    parser.add_argument('--filter', default='',
+                        help='only run cases whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs per case; the best time is used')
+    parser.add_argument('--time-tolerance', type=float, default=1.0,
+                        help='allowed fractional increase in wall time')
+    args = parser.parse_args(argv)
+
+    boxer = loadBoxer()
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    results = {}
+    failures = []
+    print('{:<48} {:>7} {:>10} {:>10}'.format('case', 'calls', 'cost ms',
+                                              'time ms'))
+    for name, fn in cases(boxer):
+        if args.filter not in name:
+            continue
+        calls, cost, seconds = measure(fn, args.repeat)
+        results[name] = {'calls': calls, 'cost': round(cost, 3),
+                         'time': seconds}
+        problems = []
+        base = baselines.get(name)
+        if base and not args.update:
+            if calls > base['calls']:
+                problems.append('calls {} > {}'.format(calls, base['calls']))
+            if cost > base['cost'] + 1e-3:
+                problems.append('cost {:.3f} > {:.3f}'.format(
+                    cost, base['cost']))
+            # Allow a couple of milliseconds of noise on very quick cases.
+            if seconds > base['time'] * (1 + args.time_tolerance) + 0.002:
+                problems.append('time {:.2f}ms > {:.2f}ms'.format(
+                    seconds * 1000, base['time'] * 1000))
+        print('{:<48} {:>7} {:>10.1f} {:>10.2f} {}'.format(
+            name, calls, cost, seconds * 1000, '; '.join(problems)))
+        if problems:
+            failures.append(name)
+
+    if args.update:
+        # Wall times are noisy, so only replace them when asked to; call
+        # count and cost changes are listed, for the commit message.
+        changed = 0
+        for name, result in sorted(results.items()):
+            base = baselines.get(name)
+            if base is None:
+                print('new: {}'.format(name))
+            elif (result['calls'], result['cost']) != (base['calls'],
+                                                         base['cost']):
+                print('changed: {}: calls {} -> {}, cost {:.3f} -> '
+                      '{:.3f}'.format(name, base['calls'], result['calls'],
+                                      base['cost'], result['cost']))
+            elif not args.update_times:
+                continue
+            if base is not None and not args.update_times:
+                result['time'] = base['time']
+            baselines[name] = result
+            changed += 1
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print('wrote {} baselines'.format(changed))
+        return 0
+    if failures:
+        print('{} cases regressed'.format(len(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
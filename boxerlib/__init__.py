@@ -0,0 +1,5 @@
+"""boxerlib holds the parts of Boxer that don't need Fusion 360: finger
+layout, panel geometry and the tools built on top of them. Nothing in this
+package may import adsk, so that it can be used (and measured) outside of
+Fusion.
+"""
@@ -0,0 +1,216 @@
+"""Tracing of Fusion API calls, for finding out where a real build spends its
+time. The stand-in adsk package in bench/ can only guess at what Fusion's
+calls cost; a Tracer measures them in a live session.
+
+A Tracer wraps an API object, usually the adsk package itself, in a thin
+proxy. Every attribute read, method call and attribute write made through the
+proxy is timed, and anything API-like it returns is wrapped in turn, so
+everything reached from the package is traced. Proxies passed back into the
+API are unwrapped first. Each call is charged to the stack of Python functions
+that made it, trimmed to start at the outermost of a set of root functions;
+calls made outside of those aren't recorded.
+
+The results are written as collapsed stacks, the format read by flamegraph.pl
+and speedscope: one line per distinct stack, with the frames separated by
+semicolons and followed by the number of microseconds spent in it.
+
+This module doesn't import adsk; an object is treated as part of the API if
+its type (or, for classes and modules, the object itself) comes from a module
+in the API package.
+"""
+
+import collections
+import os
+import sys
+import time
+import types
+
+
+class Tracer:
+    def __init__(self, roots, sourceFiles, apiPackage='adsk'):
+        # The names of the functions a stack has to pass through to be
+        # recorded, and the files whose functions appear in the stacks.
+        self.roots = frozenset(roots)
+        self.sourceFiles = frozenset(os.path.normcase(os.path.abspath(f))
+                                     for f in sourceFiles)
+        self.apiPackage = apiPackage
+        self.seconds = collections.defaultdict(float)
+        self.calls = collections.Counter()
+
+    def clear(self):
+        self.seconds.clear()
+        self.calls.clear()
+
+    def isApi(self, obj):
+        if isinstance(obj, types.ModuleType):
+            module = obj.__name__
+        elif isinstance(obj, type):
+            module = obj.__module__
+        else:
+            module = type(obj).__module__
+        return module.split('.')[0] == self.apiPackage
+
+    def wrap(self, obj):
+        """Returns obj wrapped in a proxy if it's part of the API, and obj
+        itself otherwise. Lists and tuples have their items wrapped."""
+        if isinstance(obj, _Proxy):
+            return obj
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self.wrap(item) for item in obj)
+        if self.isApi(obj):
+            return _Proxy(self, obj)
+        return obj
+
+    def _stack(self):
+        """Returns the names of the traced functions on the stack, outermost
+        first, starting at the outermost root, or None if there isn't a root
+        on the stack."""
+        names = []
+        frame = sys._getframe(1)
+        while frame is not None:
+            code = frame.f_code
+            if os.path.normcase(code.co_filename) in self.sourceFiles:
+                names.append(code)
+            frame = frame.f_back
+        names.reverse()
+        for i, code in enumerate(names):
+            if code.co_name in self.roots:
+                return [getattr(c, 'co_qualname', c.co_name)
+                        for c in names[i:]]
+        return None
+
+    def _record(self, label, seconds):
+        stack = self._stack()
+        if stack is None:
+            return
+        stack.append(label)
+        key = ';'.join(stack)
+        self.seconds[key] += seconds
+        self.calls[label] += 1
+
+    def _call(self, label, fn, args, kwargs):
+        args = [unwrap(a) for a in args]
+        kwargs = {k: unwrap(v) for k, v in kwargs.items()}
+        start = time.perf_counter()
+        try:
+            return self.wrap(fn(*args, **kwargs))
+        finally:
+            self._record(label, time.perf_counter() - start)
+
+    def totals(self):
+        """Returns the total seconds spent in each API call, across all the
+        stacks it appears in, as (label, seconds, calls) tuples, slowest
+        first."""
+        byLabel = collections.defaultdict(float)
+        for key, seconds in self.seconds.items():
+            byLabel[key.rsplit(';', 1)[-1]] += seconds
+        return sorted(((label, seconds, self.calls[label])
+                       for label, seconds in byLabel.items()),
+                      key=lambda t: -t[1])
+
+    def report(self, top=20):
+        """Returns a plain-text table of the slowest API calls."""
+        lines = ['{:<44} {:>8} {:>10}'.format('call', 'count', 'ms')]
+        for label, seconds, calls in self.totals()[:top]:
+            lines.append('{:<44} {:>8} {:>10.1f}'.format(
+                label, calls, seconds * 1000))
+        return '\n'.join(lines)
+
+    def collapsedStacks(self):
+        """Returns the recorded stacks in the collapsed stack format."""
+        return ''.join('{} {}\n'.format(key, max(1, round(seconds * 1e6)))
+                       for key, seconds in sorted(self.seconds.items()))
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsedStacks())
+
+
+def unwrap(obj):
+    """Returns the API object behind a proxy. Lists and tuples have their
+    items unwrapped; anything else is returned as it is."""
+    if isinstance(obj, _Proxy):
+        return object.__getattribute__(obj, '_target')
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(unwrap(item) for item in obj)
+    return obj
+
+
+class _Proxy:
+    """Stands in for an API object, timing everything done through it."""
+
+    __slots__ = ('_tracer', '_target', '_name')
+
+    def __init__(self, tracer, target):
+        object.__setattr__(self, '_tracer', tracer)
+        object.__setattr__(self, '_target', target)
+        if isinstance(target, types.ModuleType):
+            name = target.__name__
+        elif isinstance(target, type):
+            name = target.__name__
+        else:
+            name = type(target).__name__
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        tracer = object.__getattribute__(self, '_tracer')
+        target = object.__getattribute__(self, '_target')
+        label = '{}.{}'.format(object.__getattribute__(self, '_name'), attr)
+        # Reading an object's property is an API call in its own right, but
+        # looking up a method isn't; its time is charged when it's called.
+        # Nor is looking up a class in a module, or a constant in a class.
+        start = time.perf_counter()
+        value = getattr(target, attr)
+        elapsed = time.perf_counter() - start
+        if tracer.isApi(value) or not callable(value):
+            if not isinstance(target, (types.ModuleType, type)):
+                tracer._record(label, elapsed)
+            return tracer.wrap(value)
+
+        def traced(*args, **kwargs):
+            return tracer._call(label, value, args, kwargs)
+        return traced
+
+    def __setattr__(self, attr, value):
+        tracer = object.__getattribute__(self, '_tracer')
+        target = object.__getattribute__(self, '_target')
+        label = '{}.{}='.format(object.__getattribute__(self, '_name'), attr)
+        tracer._call(label, setattr, (target, attr, value), {})
+
+    def __call__(self, *args, **kwargs):
+        tracer = object.__getattribute__(self, '_tracer')
+        target = object.__getattribute__(self, '_target')
+        return tracer._call(object.__getattribute__(self, '_name'), target,
+                            args, kwargs)
+
+    def __iter__(self):
+        tracer = object.__getattribute__(self, '_tracer')
+        target = object.__getattribute__(self, '_target')
+        return iter(tracer._call(
+            '{}.__iter__'.format(object.__getattribute__(self, '_name')),
+            list, (target,), {}))
+
+    def __len__(self):
+        return len(object.__getattribute__(self, '_target'))
+
+    def __getitem__(self, key):
+        tracer = object.__getattribute__(self, '_tracer')
+        target = object.__getattribute__(self, '_target')
+        return tracer._call(
+            '{}.item'.format(object.__getattribute__(self, '_name')),
+            target.__getitem__, (key,), {})
+
+    def __bool__(self):
+        return bool(object.__getattribute__(self, '_target'))
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, '_target') == unwrap(other)
+
+    def __ne__(self, other):
+        return object.__getattribute__(self, '_target') != unwrap(other)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, '_target'))
+
+    def __repr__(self):
+        return '<traced {!r}>'.format(object.__getattribute__(self, '_target'))
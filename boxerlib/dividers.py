@@ -0,0 +1,71 @@
+"""Divider grids. A box can have dividers running across it in both directions,
+splitting it into a grid of equal compartments. The dividers stand on the base
+and have tabs on their ends that go through slots in the walls. Where two
+dividers cross they're half-lapped: the dividers across the length of the box
+(which are parallel to its sides) are slotted down from the top, and the ones
+across its width are slotted up from the bottom.
+
+This works out where the dividers go and where their tabs are; panels turns
+that into Panels. All dimensions are outer dimensions, in box space.
+"""
+
+import collections
+
+from . import fingerplan
+
+# xs are the x positions of the centers of the dividers that cross the length
+# of the box, and ys those of the ones that cross its width; xPitch and yPitch
+# are the distances between them. spans are the (start, end) heights of the
+# tabs on the ends of every divider, and the slots in the walls they go
+# through. The dividers run from bottom to top, and are half-lapped at middle.
+DividerGrid = collections.namedtuple(
+    'DividerGrid',
+    ['xs', 'ys', 'xPitch', 'yPitch', 'spans', 'bottom', 'middle', 'top'])
+
+
+def positions(start, end, thickness, count):
+    """Returns the centers of count dividers that split the space between start
+    and end into equal compartments, and the distance between them."""
+    pitch = (end - start + thickness) / (count + 1)
+    return (tuple(start - thickness / 2 + pitch * (i + 1)
+                  for i in range(count)), pitch)
+
+
+def compartment(length, thickness, count):
+    """Returns the size of each compartment when an inner length is split by
+    count dividers."""
+    return (length - count * thickness) / (count + 1)
+
+
+def dividerGrid(length, width, height, thickness, drawLid, fingerScale,
+                dividersX, dividersY):
+    """Returns the DividerGrid for a box with dividersX dividers across its
+    length and dividersY across its width. The dividers come up to the lid,
+    or to the top of the walls if there isn't one."""
+    t = thickness
+    bottom = t
+    top = height - t if drawLid else height
+    plan = fingerplan.planFingers2D(top - bottom, t, fingerScale)
+    spans = tuple((bottom + a, bottom + b)
+                  for a, b in fingerplan.fingerSpans(plan))
+    xs, xPitch = positions(t, length - t, t, dividersX)
+    ys, yPitch = positions(t, width - t, t, dividersY)
+    return DividerGrid(xs, ys, xPitch, yPitch, spans, bottom,
+                       (bottom + top) / 2, top)
+
+
+def slots(centers, thickness, spans):
+    """Returns the (u1, v1, u2, v2) slots a wall needs for dividers centered
+    at each of centers along it."""
+    return tuple((c - thickness / 2, a, c + thickness / 2, b)
+                 for c in centers for a, b in spans)
+
+
+def slotPattern(holes):
+    """Splits a wall's slots into a rectangular pattern along u. Returns the
+    slots in the first column, the number of columns, and the distance between
+    them."""
+    columns = sorted(set(h[0] for h in holes))
+    first = [h for h in holes if h[0] == columns[0]]
+    pitch = columns[1] - columns[0] if len(columns) > 1 else 0.0
+    return first, len(columns), pitch
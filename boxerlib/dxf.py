@@ -0,0 +1,49 @@
+"""A small streaming DXF writer. It writes R12 DXF, which is about as simple as
+DXF gets and which every laser cutter's software can read. Entities are
+written out as they're added, so nothing is held in memory.
+"""
+
+# $INSUNITS values for the units we're likely to be asked for.
+UNITS = {'in': 1, 'mm': 4, 'cm': 5}
+
+
+class DxfWriter:
+    """Writes closed polylines to a DXF file. Use it as a context manager, or
+    call close() when done."""
+
+    def __init__(self, f, units='mm', layer='0'):
+        self.f = f
+        self.layer = layer
+        self._group(0, 'SECTION')
+        self._group(2, 'HEADER')
+        self._group(9, '$INSUNITS')
+        self._group(70, UNITS[units])
+        self._group(0, 'ENDSEC')
+        self._group(0, 'SECTION')
+        self._group(2, 'ENTITIES')
+
+    def _group(self, code, value):
+        self.f.write('{}\n{}\n'.format(code, value))
+
+    def polyline(self, points, closed=True):
+        """Writes a polyline through a list of (x, y) points."""
+        self._group(0, 'POLYLINE')
+        self._group(8, self.layer)
+        self._group(66, 1)
+        self._group(70, 1 if closed else 0)
+        for x, y in points:
+            self._group(0, 'VERTEX')
+            self._group(8, self.layer)
+            self._group(10, '{:.6f}'.format(x))
+            self._group(20, '{:.6f}'.format(y))
+        self._group(0, 'SEQEND')
+
+    def close(self):
+        self._group(0, 'ENDSEC')
+        self._group(0, 'EOF')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,98 @@
+"""Bulk export of panel files. Fusion has to write each panel's DXF itself, on
+its main thread, but that's all it has to do: the files are written to a
+staging folder, and a pool of worker threads copies them to where they're
+going, compressing them on the way if asked, while Fusion carries on with the
+next panel. Each file gets an entry in a manifest, with how long each step
+took, which is written next to the files.
+"""
+
+import concurrent.futures
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def fileName(*parts, ext='.dxf'):
+    """Returns a file name made of parts joined with dashes, with anything
+    that isn't safe in a file name replaced."""
+    return '-'.join(re.sub(r'[^A-Za-z0-9_.]+', '_', p).strip('_')
+                    for p in parts) + ext
+
+
+class FileWriter:
+    """Moves staged files into folder on a pool of worker threads, gzipping
+    them on the way if compress is set. Leaving it as a context manager waits
+    for every file to be written. entries holds the manifest entry of each
+    file, in the order they were submitted."""
+
+    def __init__(self, folder, compress=False, workers=4):
+        self.folder = folder
+        self.compress = compress
+        self.entries = []
+        self._names = set()
+        self._pool = concurrent.futures.ThreadPoolExecutor(workers)
+        self._futures = []
+
+    def fileName(self, *parts):
+        """Returns a file name made from parts, like fileName, that no other
+        file written by this writer has."""
+        name = fileName(*parts)
+        stem, ext = os.path.splitext(name)
+        n = 1
+        while name in self._names:
+            n += 1
+            name = '{}-{}{}'.format(stem, n, ext)
+        self._names.add(name)
+        return name
+
+    def submit(self, staged, name, entry):
+        """Queues the staged file to be written to the folder as name. entry
+        is the file's manifest entry, a dict; the file's name, its size and
+        the time taken to write it are added to it once it's written."""
+        if self.compress:
+            name += '.gz'
+        entry['file'] = name
+        self.entries.append(entry)
+        self._futures.append(self._pool.submit(
+            self._write, staged, os.path.join(self.folder, name), entry))
+
+    def _write(self, staged, path, entry):
+        start = time.perf_counter()
+        if self.compress:
+            with open(staged, 'rb') as src, gzip.open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(staged)
+        else:
+            shutil.move(staged, path)
+        entry['bytes'] = os.path.getsize(path)
+        entry['writeSeconds'] = time.perf_counter() - start
+
+    def close(self):
+        """Waits for every file to be written. Raises the first error any of
+        them hit."""
+        self._pool.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, tb):
+        if excType is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True)
+
+
+def writeManifest(folder, entries, **info):
+    """Writes the manifest for a set of exported files to folder, and returns
+    it. info is added to the manifest alongside the files' entries."""
+    manifest = dict(info, files=entries)
+    with open(os.path.join(folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
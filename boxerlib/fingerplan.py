@@ -0,0 +1,120 @@
+"""The finger-plan kernel. A finger plan describes the fingers along one edge
+as four numbers instead of a list of points:
+
+    offset    - where the first finger slot starts along the edge
+    pitch     - the length of each finger slot
+    count     - the number of slots; the odd-numbered slots are the fingers
+    thickness - the material thickness, i.e. the depth of each finger
+
+Plans are cheap to compare and hash, and they're memoized, so the dialog's
+validate and preview handlers can ask for the same plan over and over without
+recomputing it. Points are only generated from a plan when something actually
+needs to be drawn.
+"""
+
+import collections
+import functools
+import math
+
+FingerPlan = collections.namedtuple(
+    'FingerPlan', ['offset', 'pitch', 'count', 'thickness'])
+
+
+def emptyPlan(thickness):
+    """Returns a plan with no fingers."""
+    return FingerPlan(0.0, 0.0, 0, thickness)
+
+
+def planFingers2D(edgeLen, thickness, factor=5):
+    """Returns the finger plan for an edge of a box. The fingers are about
+    factor times longer than the material thickness; see calcFingers2D in
+    Boxer.py for the rules used. If the edge is too short for fingers, the plan
+    will have a count of 0. Raises ValueError if factor isn't a whole number.
+    """
+    return _planFingers2D(float(edgeLen), float(thickness),
+                          checkFactor(factor))
+
+
+def checkFactor(factor):
+    """Returns a finger scale as an int. Raises ValueError if it isn't a whole
+    number, rather than planning a different scale to the one asked for."""
+    if factor != int(factor):
+        raise ValueError(
+            'the finger scale must be a whole number, not {}'.format(factor))
+    return int(factor)
+
+
+@functools.lru_cache(maxsize=1024)
+def _planFingers2D(edgeLen, thickness, factor):
+    if 3 * thickness > edgeLen:
+        return emptyPlan(thickness)
+    flen = factor * thickness
+    fcount = math.floor(edgeLen/flen)
+    while fcount == 0:
+        factor -= 1
+        if factor == 0:
+            return emptyPlan(thickness)
+        flen = factor * thickness
+        fcount = math.floor(edgeLen/flen)
+    if fcount < 3:
+        # shorten the fingers so there are at least 3.
+        flen = edgeLen / 3
+        fcount = math.floor(edgeLen/flen)
+    if fcount % 2 == 0:
+        # lengthen the fingers so there's one less
+        flen += flen/fcount
+        fcount = math.floor(edgeLen/flen)
+
+    return FingerPlan((edgeLen - fcount * flen) / 2, flen, fcount, thickness)
+
+
+def planFingers(edgeLen, thickness):
+    """Returns the finger plan used when jointing two existing bodies. The
+    fingers are about 8x the material thickness, and are laid out on the part
+    of the edge that doesn't overlap the material of the other body. Raises
+    ValueError if the edge is too short.
+    """
+    return _planFingers(float(edgeLen), float(thickness))
+
+
+@functools.lru_cache(maxsize=1024)
+def _planFingers(edgeLen, thickness):
+    innerHeight = edgeLen - thickness * 2
+
+    # we'll create fingers about the length of 8 * the thickness of the stock.
+    flen = 8 * thickness
+    fcount = math.floor(innerHeight/flen)
+    if fcount == 0:
+        raise ValueError('edge is too short for finger joints')
+    if fcount < 3:
+        # shorten the fingers so there are at least 3.
+        flen = innerHeight / 3
+        fcount = math.floor(innerHeight/flen)
+    if fcount % 2 == 0:
+        # lengthen the fingers so there's one less.
+        flen += flen/fcount
+        fcount = math.floor(innerHeight/flen)
+
+    return FingerPlan((edgeLen - fcount * flen) / 2, flen, fcount, thickness)
+
+
+def fingerSpans(plan):
+    """Returns the (start, end) positions of each finger along the edge."""
+    offset, pitch, count, _ = plan
+    return tuple((offset + i * pitch, offset + (i + 1) * pitch)
+                 for i in range(1, count, 2))
+
+
+def fingerRects(plan):
+    """Returns the fingers as (x1, y1, x2, y2) rectangles, with the edge
+    running along the y axis and the fingers extending from x = 0 to x =
+    thickness.
+    """
+    t = plan.thickness
+    return [(0.0, start, t, end) for start, end in fingerSpans(plan)]
+
+
+def swapXY(rects):
+    """Swaps the x and y coordinates of a list of rectangles, turning fingers
+    for a y axis edge into fingers for an x axis edge."""
+    return [(y1, x1, y2, x2) for x1, y1, x2, y2 in rects]
@@ -0,0 +1,281 @@
+"""Flat patterns for laser cutting, generated straight from the panel kernel
+without Fusion. Each panel of a box is laid flat, and the panels are written
+to a DXF or SVG file side by side.
+
+This can be run from the command line, either for a single box:
+
+    python -m boxerlib.flatpattern --length 200 --width 150 --height 80 \\
+        --thickness 3 --lid -o box.dxf
+
+or for every box in a spec file (see boxerlib/spec.py):
+
+    python -m boxerlib.flatpattern --specs boxes.csv --outdir cuts --format svg
+
+Each box is written to a file of its own, unless --sheet is given, in which
+case the panels of all the boxes are nested onto sheets of that size (see
+boxerlib/nesting.py) and each sheet is written to a file:
+
+    python -m boxerlib.flatpattern --specs boxes.csv --sheet 600x400
+
+All lengths are in millimeters. The contours are put in cutting order (see
+boxerlib/toolpath.py) unless --no-order is given, and --report prints the
+estimated cut length and laser travel, compared to cutting the panels as the
+separate rectangles they used to be sketched from.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from . import nesting, panels, spec, toolpath
+from .dxf import DxfWriter
+from .svg import SvgWriter
+
+FORMATS = ('dxf', 'svg')
+
+
+def panelContours(panel):
+    """Returns the closed contours to cut for a panel, in its (u, v) space:
+    its outline, then its holes and hinge slits."""
+    return [panel.outline] + [panels.holeOutline(h)
+                              for h in panel.holes + panel.slits]
+
+
+def rectContours(panel):
+    """Returns a panel as the separate rectangles (core, tabs and notches) it's
+    built from, the way the panels used to be sketched. This is only used as a
+    baseline for comparing toolpaths."""
+    return [[(r[0], r[1]), (r[2], r[1]), (r[2], r[3]), (r[0], r[3])]
+            for r in (panel.core,) + panel.tabs + panel.notches +
+            panel.holes + panel.slits]
+
+
+def contourBounds(contours):
+    """Returns the (minX, minY, maxX, maxY) bounds of a list of contours."""
+    xs = [x for c in contours for x, _ in c]
+    ys = [y for c in contours for _, y in c]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def rowLayout(boxPanels, gap, contoursFor=panelContours):
+    """Lays a box's panels out flat in a row, gap apart. Returns the list of
+    contours to cut and the (width, height) of the layout."""
+    contours = []
+    x = 0.0
+    height = 0.0
+    for panel in boxPanels:
+        pc = contoursFor(panel)
+        minX, minY, maxX, maxY = contourBounds(pc)
+        for c in pc:
+            contours.append([(u - minX + x, v - minY) for u, v in c])
+        x += maxX - minX + gap
+        height = max(height, maxY - minY)
+    return contours, (max(x - gap, 0.0), height)
+
+
+def placeContours(contours, placement):
+    """Moves contours to where a nesting placement puts them, turning them a
+    quarter turn counter-clockwise if it's rotated."""
+    minX, minY, _, maxY = contourBounds(contours)
+    x, y = placement.x, placement.y
+    if placement.rotated:
+        return [[(x + maxY - v, y + u - minX) for u, v in c]
+                for c in contours]
+    return [[(x + u - minX, y + v - minY) for u, v in c] for c in contours]
+
+
+def nestSheets(specs, sheetWidth, sheetHeight, gap=5.0, rotate=True):
+    """Nests the panels of every box in specs onto sheetWidth by sheetHeight
+    sheets, gap apart. Returns a list of the sheets, each a list of the
+    (box, panel, placement) of the panels on it, where box is the index of
+    the panel's box in specs."""
+    parts = []
+    sizes = []
+    for box, s in enumerate(specs):
+        for panel in spec.specPanels(s):
+            minX, minY, maxX, maxY = contourBounds((panel.outline,))
+            parts.append((box, panel))
+            sizes.append((maxX - minX, maxY - minY))
+    placements = nesting.nest(sizes, sheetWidth, sheetHeight, gap, rotate)
+    sheets = [[] for _ in range(nesting.sheetCount(placements))]
+    for (box, panel), placement in zip(parts, placements):
+        sheets[placement.sheet].append((box, panel, placement))
+    return sheets
+
+
+def sheetContours(sheet):
+    """Returns the contours to cut for a sheet returned by nestSheets."""
+    contours = []
+    for _, panel, placement in sheet:
+        contours += placeContours(panelContours(panel), placement)
+    return contours
+
+
+def writeContours(f, fmt, contours, size):
+    """Writes contours to an open file in the given format."""
+    if fmt == 'dxf':
+        writer = DxfWriter(f)
+    elif fmt == 'svg':
+        writer = SvgWriter(f, *size)
+    else:
+        raise ValueError('unknown format {}'.format(fmt))
+    with writer:
+        for c in contours:
+            writer.polyline(c)
+
+
+def exportBox(boxSpec, path, fmt=None, gap=5.0, order=True):
+    """Writes the flat pattern for a box to a file. If fmt isn't given, it's
+    taken from the file's extension. If order is True, the contours are put in
+    cutting order. Returns the contours written."""
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    contours, size = rowLayout(spec.specPanels(boxSpec), gap)
+    if order:
+        contours = toolpath.orderContours(contours)
+    with open(path, 'w') as f:
+        writeContours(f, fmt, contours, size)
+    return contours
+
+
+def exportSheets(specs, outdir, sheetWidth, sheetHeight, fmt='dxf', gap=5.0,
+                 order=True, rotate=True):
+    """Nests the panels of every box in specs onto sheets, and writes each
+    sheet to a file in outdir. Returns a list of the (path, contours) of the
+    files written."""
+    written = []
+    sheets = nestSheets(specs, sheetWidth, sheetHeight, gap, rotate)
+    for i, sheet in enumerate(sheets, 1):
+        contours = sheetContours(sheet)
+        if order:
+            contours = toolpath.orderContours(contours)
+        path = os.path.join(outdir, 'sheet-{:04d}.{}'.format(i, fmt))
+        with open(path, 'w') as f:
+            writeContours(f, fmt, contours, (sheetWidth, sheetHeight))
+        written.append((path, contours))
+    return written
+
+
+def parseSheet(s):
+    """Parses a sheet size given as WIDTHxHEIGHT."""
+    try:
+        width, height = (float(v) for v in s.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected WIDTHxHEIGHT, not {!r}'.format(s))
+    return width, height
+
+
+def baselineToolpath(boxSpec, gap=5.0):
+    """Returns the toolpath Report for cutting a box's panels as separate
+    rectangles, in the order they're generated, with the edges they share
+    cut twice."""
+    contours, _ = rowLayout(spec.specPanels(boxSpec), gap, rectContours)
+    return toolpath.measure(contours)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m boxerlib.flatpattern',
+        description='Write flat patterns of finger-jointed boxes for laser '
+                    'cutting. All lengths are in millimeters.')
+    parser.add_argument('--specs', help='CSV or JSON spec file of boxes')
+    parser.add_argument('--length', type=float)
+    parser.add_argument('--width', type=float)
+    parser.add_argument('--height', type=float)
+    parser.add_argument('--thickness', type=float)
+    parser.add_argument('--lid', action='store_true', help='add a lid')
+    parser.add_argument('--inner', action='store_true',
+                        help='the dimensions are inner dimensions')
+    parser.add_argument('--finger-scale', type=int, default=5)
+    parser.add_argument('--dividers-x', type=int, default=0,
+                        help='dividers across the length of the box')
+    parser.add_argument('--dividers-y', type=int, default=0,
+                        help='dividers across the width of the box')
+    parser.add_argument('--hinges', nargs='+', default=(),
+                        choices=panels.PANEL_NAMES, metavar='PANEL',
+                        help='panels to cut living hinges in: any of ' +
+                             ', '.join(panels.PANEL_NAMES))
+    parser.add_argument('--gap', type=float, default=5.0,
+                        help='space between panels')
+    parser.add_argument('--sheet', type=parseSheet,
+                        help='nest the panels onto sheets of this size, '
+                             'given as WIDTHxHEIGHT')
+    parser.add_argument('--no-rotate', action='store_true',
+                        help="don't turn panels to nest them")
+    parser.add_argument('--format', choices=FORMATS,
+                        help='file format; by default, taken from the -o '
+                             'file name, or dxf')
+    parser.add_argument('--no-order', action='store_true',
+                        help="don't reorder the contours for cutting")
+    parser.add_argument('--report', action='store_true',
+                        help='print the cut length and travel for each file')
+    parser.add_argument('-o', '--output',
+                        help='output file, for a single box')
+    parser.add_argument('--outdir', default='.',
+                        help='output directory, for a spec file or sheets')
+    args = parser.parse_args(argv)
+    fmt = args.format
+    if fmt is None:
+        ext = os.path.splitext(args.output or '')[1].lstrip('.').lower()
+        fmt = ext if ext in FORMATS else 'dxf'
+
+    if args.specs:
+        specs = spec.loadSpecs(args.specs)
+    else:
+        missing = [name for name in spec.LENGTH_FIELDS
+                   if getattr(args, name) is None]
+        if missing:
+            parser.error('missing --{} (or use --specs)'.format(
+                ', --'.join(missing)))
+        specs = [spec.BoxSpec(args.length, args.width, args.height,
+                              args.thickness, args.lid, args.finger_scale,
+                              not args.inner, args.dividers_x,
+                              args.dividers_y, tuple(args.hinges), None)]
+
+    if args.sheet:
+        os.makedirs(args.outdir, exist_ok=True)
+        start = time.perf_counter()
+        try:
+            written = exportSheets(specs, args.outdir, *args.sheet,
+                                   fmt=fmt, gap=args.gap,
+                                   order=not args.no_order,
+                                   rotate=not args.no_rotate)
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = time.perf_counter() - start
+        if args.report:
+            for path, contours in written:
+                report = toolpath.measure(contours)
+                print('{}: cut {:.1f}, travel {:.1f}'.format(
+                    path, report.cutLength, report.travel))
+        print('wrote {} sheets in {:.3f}s'.format(len(written), elapsed),
+              file=sys.stderr)
+        return 0
+
+    if args.specs:
+        os.makedirs(args.outdir, exist_ok=True)
+        jobs = [(s, os.path.join(args.outdir, 'box-{:04d}.{}'.format(
+            i, fmt))) for i, s in enumerate(specs, 1)]
+    else:
+        jobs = [(specs[0], args.output or 'box.{}'.format(fmt))]
+
+    start = time.perf_counter()
+    for s, path in jobs:
+        contours = exportBox(s, path, fmt, args.gap,
+                             not args.no_order)
+        if args.report:
+            before = baselineToolpath(s, args.gap)
+            after = toolpath.measure(contours)
+            print('{}: cut {:.1f} -> {:.1f}, travel {:.1f} -> {:.1f}'.format(
+                path, before.cutLength, after.cutLength, before.travel,
+                after.travel))
+    elapsed = time.perf_counter() - start
+    print('wrote {} files in {:.3f}s'.format(len(jobs), elapsed),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
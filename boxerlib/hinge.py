@@ -0,0 +1,121 @@
+"""Living hinges. A living hinge is a field of staggered slits cut through a
+panel, which leaves it thin strips joined by short bridges, so that the panel
+can bend. The slits run along the panel's v axis, in lines stepped along u;
+every other line is shifted by half a slit, so each bridge is backed by the
+middle of a slit in the lines either side of it.
+
+The hinge fills the panel's core, kept clear of its edges so the fingers and
+notches are left whole, and the slits are cut short where they'd come too
+close to any of the panel's holes. All sizes are multiples of the material
+thickness.
+"""
+
+import collections
+import math
+
+# The length of each slit, the bridge left between slits in a line, the
+# distance between lines, and the width of the slits.
+SLIT_LENGTH = 8.0
+BRIDGE = 1.0
+SPACING = 0.6
+SLIT_WIDTH = 0.1
+# How far the hinge stays inside the edges of a panel's core.
+MARGIN = 2.0
+
+# Lengths closer than this are taken to be the same.
+EPSILON = 1e-9
+
+
+def hingeRegion(core, thickness):
+    """Returns the (u1, v1, u2, v2) rectangle of a panel's core that a hinge
+    can fill, or None if there's no room for one line of full-length slits."""
+    m = MARGIN * thickness
+    u1, v1, u2, v2 = core[0] + m, core[1] + m, core[2] - m, core[3] - m
+    if (u2 - u1 < SLIT_WIDTH * thickness or
+            v2 - v1 < SLIT_LENGTH * thickness):
+        return None
+    return u1, v1, u2, v2
+
+
+def hingeSlits(core, thickness, holes=()):
+    """Returns the slits of a living hinge filling a panel's core, as
+    (u1, v1, u2, v2) rectangles, line by line. The slits are kept a bridge's
+    length from any of holes. Returns () if the core is too small for a
+    hinge."""
+    region = hingeRegion(core, thickness)
+    if region is None:
+        return ()
+    u1, v1, u2, v2 = region
+    length = SLIT_LENGTH * thickness
+    bridge = BRIDGE * thickness
+    spacing = SPACING * thickness
+    width = SLIT_WIDTH * thickness
+    period = length + bridge
+
+    # Center the lines across the region, and the slits in the unshifted
+    # lines along it. There's an even number of lines, if there's more than
+    # one, so that the hinge is a pair of lines repeated.
+    lines = int(math.floor((u2 - u1 - width) / spacing)) + 1
+    if lines > 1:
+        lines -= lines % 2
+    uStart = u1 + (u2 - u1 - width - (lines - 1) * spacing) / 2
+    count = int(math.floor((v2 - v1 + bridge) / period))
+    vStart = v1 + (v2 - v1 - (count * period - bridge)) / 2
+    full = [(vStart + i * period, vStart + i * period + length)
+            for i in range(count)]
+    # The shifted lines have a slit more, cut short at each end.
+    shifted = [(max(a, v1), min(b, v2)) for a, b in
+               ((vStart - period / 2 + i * period,
+                 vStart - period / 2 + i * period + length)
+                for i in range(count + 1))]
+    shifted = [(a, b) for a, b in shifted if b - a >= bridge]
+
+    slits = []
+    for line in range(lines):
+        su1 = uStart + line * spacing
+        su2 = su1 + width
+        spans = shifted if line % 2 else full
+        blocked = [(hv1 - bridge, hv2 + bridge)
+                   for hu1, hv1, hu2, hv2 in holes
+                   if hu1 - bridge < su2 and su1 < hu2 + bridge]
+        if blocked:
+            spans = clipSpans(spans, blocked, bridge)
+        slits += [(su1, a, su2, b) for a, b in spans]
+    return tuple(slits)
+
+
+def clipSpans(spans, blocked, shortest):
+    """Returns the parts of (start, end) spans that aren't in any of the
+    blocked spans, leaving out any shorter than shortest."""
+    for lo, hi in blocked:
+        clipped = []
+        for a, b in spans:
+            if b <= lo or hi <= a:
+                clipped.append((a, b))
+                continue
+            if lo - a >= shortest:
+                clipped.append((a, lo))
+            if b - hi >= shortest:
+                clipped.append((hi, b))
+        spans = clipped
+    return spans
+
+
+def linePattern(slits):
+    """Splits a hinge's slits into a pair of lines that's repeated along u.
+    Returns the slits in the first pair, the number of pairs, and the distance
+    between them, or None if the lines don't repeat, because some of the
+    slits have been cut short by holes."""
+    lines = collections.defaultdict(list)
+    for slit in slits:
+        lines[slit[0]].append(slit)
+    us = sorted(lines)
+    if len(us) < 2 or len(us) % 2:
+        return None
+    pitch = us[2] - us[0] if len(us) > 2 else 0.0
+    for k, u in enumerate(us):
+        first = lines[us[k % 2]]
+        if (abs(u - us[k % 2] - k // 2 * pitch) > EPSILON or
+                [s[1:4:2] for s in lines[u]] != [s[1:4:2] for s in first]):
+            return None
+    return lines[us[0]] + lines[us[1]], len(us) // 2, pitch
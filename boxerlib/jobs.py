@@ -0,0 +1,83 @@
+"""Background jobs. Planning boxes is plain Python, so it can be done on a
+worker thread while Fusion's UI stays responsive; only the Fusion API calls
+that build the boxes have to be made on the main thread. A Job runs a function
+over a list of items on a worker thread and queues up the results, calling
+notify after each one so that the main thread can be told to collect them.
+"""
+
+import queue
+import threading
+import traceback
+
+
+class Cancelled(Exception):
+    """Raised to stop work that's been cancelled."""
+
+
+class Job:
+    """Job applies fn to each of items on a worker thread. notify is called on
+    the worker thread after each result is queued, and once more when the job
+    finishes; it mustn't touch anything that isn't thread-safe. If fn raises,
+    the job stops, and the traceback is kept in error."""
+
+    def __init__(self, fn, items, notify=None):
+        self.fn = fn
+        self.items = list(items)
+        self.notify = notify
+        self.error = None
+        self.finished = False
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stops the job after the item it's working on."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _run(self):
+        try:
+            for i, item in enumerate(self.items):
+                if self.cancelled:
+                    break
+                self._results.put((i, self.fn(item)))
+                if self.notify is not None:
+                    self.notify()
+        except Exception:
+            self.error = traceback.format_exc()
+        finally:
+            # None marks the end of the results.
+            self._results.put(None)
+            if self.notify is not None:
+                self.notify()
+
+    def ready(self, timeout=0):
+        """Returns the (index, result) pairs that have been queued since the
+        last call. If there are none, waits up to timeout seconds for one, but
+        never for more than that. Sets finished once the last of them has been
+        taken."""
+        results = []
+        while True:
+            try:
+                if timeout:
+                    result = self._results.get(timeout=timeout)
+                    timeout = 0
+                else:
+                    result = self._results.get_nowait()
+            except queue.Empty:
+                return results
+            if result is None:
+                self.finished = True
+            else:
+                results.append(result)
+
+    def wait(self, timeout=None):
+        """Waits for the worker thread to finish."""
+        self._thread.join(timeout)
@@ -0,0 +1,441 @@
+"""Joint checking. Every joint in a box is planned in closed form, so whether
+the panels fit together can be worked out from the plans, before there's any
+geometry to run an interference check on.
+
+Where two panels meet, the joint is where their bounding boxes cross, right
+through the thickness of both, so a panel missing the fingers that should go
+into the other one still has a joint with it. Along the edge the two panels
+share, each point of the joint has to be filled right through by exactly one
+of them: where both are there, they interfere, and where neither is, there's
+a hole in the box. A panel that only fills part of the joint's depth
+somewhere, like a finger that's too short, is a problem too. The corners of a
+joint, past the ends of either panel's core, belong to a third panel, and are
+checked with that one instead.
+
+Panels that only touch face to face, like the dividers standing on the base,
+pass, since only one of them fills the joint between them. Panels that are
+parallel can't have a joint, so if they share any room at all they interfere.
+
+The hinge slits are left out, since hinges are kept well inside their panels'
+cores.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import os
+import random
+import sys
+import time
+
+from . import spatial, spec, validate
+
+# A problem with the joint between panels a and b, named by the panels, along
+# box axis 'axis' from start to end. kind is 'overlap' where both panels are,
+# 'gap' where neither is, or 'partial' where a panel only fills part of the
+# joint's depth.
+Problem = collections.namedtuple(
+    'Problem', ['a', 'b', 'kind', 'axis', 'start', 'end'])
+
+# The default tolerance: Fusion's point tolerance, in cm.
+TOLERANCE = 1e-8
+
+AXIS_NAMES = 'xyz'
+
+# What fills a stretch of a joint.
+EMPTY, FULL, PARTIAL = 0, 1, 2
+
+
+def checkJoints(boxPanels, tolerance=TOLERANCE):
+    """Checks that the panels of a box fit together. Returns a list of
+    Problems; the box is sound if it's empty. Stretches shorter than
+    tolerance are ignored."""
+    bands = [panelBands(p) for p in boxPanels]
+    extents = [(panelBox(p, b), coreBox(p)) for p, b in zip(boxPanels, bands)]
+    # Panels whose boxes don't at least touch can't meet.
+    boxes = [tuple(zip(*box)) for box, core in extents]
+    problems = []
+    for i, j in spatial.sweepPairs(boxes, tolerance):
+        a, b = boxPanels[i], boxPanels[j]
+        (aBox, aCore), (bBox, bCore) = extents[i], extents[j]
+        joint = [(max(aBox[k][0], bBox[k][0]), min(aBox[k][1], bBox[k][1]))
+                 for k in range(3)]
+        aw, bw = a.axes[2], b.axes[2]
+        if aw != bw:
+            # The joint goes right through both panels, even if one of them
+            # doesn't reach into the other.
+            joint[aw] = aBox[aw]
+            joint[bw] = bBox[bw]
+        if any(hi - lo <= tolerance for lo, hi in joint):
+            continue
+        if aw == bw:
+            lo, hi = joint[aw]
+            problems.append(Problem(a.name, b.name, 'overlap', aw, lo, hi))
+            continue
+        problems += checkJoint(a, b, joint, aCore, bCore, tolerance,
+                               bands[i], bands[j])
+    return problems
+
+
+# The problems checkPlan has found in the last few boxes it's checked, by the
+# signature of their spec and the tolerance, oldest first. The panels
+# themselves would be slow to use as a key, since a hinge can have thousands
+# of slits.
+_planProblems = collections.OrderedDict()
+PLAN_CACHE_SIZE = 256
+
+
+def checkPlan(boxSpec, boxPanels, tolerance=TOLERANCE):
+    """Like checkJoints, for boxPanels planned from boxSpec, but returns a
+    tuple, and remembers the last few specs checked, so that drawing the same
+    box again doesn't check it again."""
+    key = (spec.signature(boxSpec), tolerance)
+    problems = _planProblems.get(key)
+    if problems is None:
+        problems = tuple(checkJoints(boxPanels, tolerance))
+        _planProblems[key] = problems
+        if len(_planProblems) > PLAN_CACHE_SIZE:
+            _planProblems.popitem(last=False)
+    else:
+        _planProblems.move_to_end(key)
+    return problems
+
+
+def clearPlanCache():
+    """Forgets the boxes checkPlan has checked."""
+    _planProblems.clear()
+
+
+def checkJoint(a, b, joint, aCore, bCore, tolerance=TOLERANCE, aBands=None,
+               bBands=None):
+    """Checks the joint between two panels that cross. joint is the box it's
+    in, as a (low, high) range along each box axis, and aCore and bCore are
+    the boxes around the panels' cores, as returned by coreBox. aBands and
+    bBands are passed on to fill."""
+    axis = 3 - a.axes[2] - b.axes[2]
+    start = max(joint[axis][0], aCore[axis][0], bCore[axis][0])
+    end = min(joint[axis][1], aCore[axis][1], bCore[axis][1])
+    if end - start <= tolerance:
+        return []
+    aFill = fill(a, axis, start, end, joint[b.axes[2]], tolerance, aBands)
+    bFill = fill(b, axis, start, end, joint[a.axes[2]], tolerance, bBands)
+
+    problems = []
+    i = k = 0
+    pos = start
+    while pos < end - tolerance:
+        aEnd, aState = aFill[i]
+        bEnd, bState = bFill[k]
+        stop = min(aEnd, bEnd)
+        if PARTIAL in (aState, bState):
+            kind = 'partial'
+        elif aState == bState:
+            kind = 'overlap' if aState == FULL else 'gap'
+        else:
+            kind = None
+        if kind is not None and stop - pos > tolerance:
+            if (problems and problems[-1].kind == kind and
+                    problems[-1].end >= pos - tolerance):
+                problems[-1] = problems[-1]._replace(end=stop)
+            else:
+                problems.append(Problem(a.name, b.name, kind, axis, pos,
+                                        stop))
+        if aEnd <= stop:
+            i += 1
+        if bEnd <= stop:
+            k += 1
+        pos = stop
+    return problems
+
+
+def fill(panel, axis, start, end, depth, tolerance=TOLERANCE, bands=None):
+    """Returns how much of a joint's depth a panel fills, from start to end
+    along the box axis 'axis', which has to be one of the panel's u and v
+    axes. depth is the joint's (low, high) range along the panel's other
+    axis. The result is a list of (end, state) stretches, in order, where
+    state is EMPTY, FULL or PARTIAL; neighboring stretches have different
+    states. bands are the panel's panelBands, if they've been worked out
+    already."""
+    e = panel.axes.index(axis)
+    d = 1 - e
+    d1, d2 = depth
+    dLo = d1 + tolerance
+    dHi = d2 - tolerance
+    if bands is None:
+        bands = panelBands(panel)
+    # The solid and cut rectangles in the joint, and whether they all go
+    # right through it.
+    solid = []
+    cut = []
+    through = True
+    for (lo, hi), (s, c) in bands[d].items():
+        if lo < dHi and hi > dLo:
+            solid += s
+            cut += c
+            if lo > dLo or hi < dHi:
+                through = False
+
+    if through:
+        # As they do unless something's wrong, so the joint is full wherever
+        # there's solid that hasn't been cut away.
+        stretches = []
+        pos = start
+        spans = _union([(r[e], r[e + 2]) for r in solid])
+        if cut:
+            spans = _subtract(spans, _union([(r[e], r[e + 2]) for r in cut]))
+        for a, b in spans:
+            if a < start:
+                a = start
+            if b > end:
+                b = end
+            if b - a <= tolerance:
+                continue
+            if a - pos > tolerance:
+                stretches.append((a, EMPTY))
+            if stretches and stretches[-1][1] == FULL:
+                stretches[-1] = (b, FULL)
+            else:
+                stretches.append((b, FULL))
+            pos = b
+        if end - pos > tolerance or not stretches:
+            stretches.append((end, EMPTY))
+        else:
+            stretches[-1] = (end, FULL)
+        return stretches
+
+    eLo = start + tolerance
+    eHi = end - tolerance
+    solid = [(r[e], r[e + 2], max(r[d], d1), min(r[d + 2], d2))
+             for r in solid if r[e] < eHi and r[e + 2] > eLo]
+    cut = [(r[e], r[e + 2], max(r[d], d1), min(r[d + 2], d2))
+           for r in cut if r[e] < eHi and r[e + 2] > eLo]
+    stops = sorted(set([end] + [x for r in solid + cut for x in r[:2]
+                                if start < x < end]))
+    stretches = []
+    pos = start
+    for stop in stops:
+        if stop - pos <= tolerance:
+            continue
+        mid = (pos + stop) / 2
+        filled = _length(
+            [r[2:] for r in solid if r[0] < mid < r[1]],
+            [r[2:] for r in cut if r[0] < mid < r[1]])
+        if filled <= tolerance:
+            state = EMPTY
+        elif filled >= d2 - d1 - tolerance:
+            state = FULL
+        else:
+            state = PARTIAL
+        if stretches and stretches[-1][1] == state:
+            stretches[-1] = (stop, state)
+        else:
+            stretches.append((stop, state))
+        pos = stop
+    if stretches:
+        stretches[-1] = (end, stretches[-1][1])
+    else:
+        stretches.append((end, EMPTY))
+    return stretches
+
+
+def panelBands(panel):
+    """Sorts a panel's rectangles into bands: the ones that are the same
+    width along u, and then along v. Fingers on the same edge are all in the
+    same band, so the rectangles in a joint can be found without looking at
+    every finger on the panel. Returns a dict for each of u and v, mapping
+    each band's (low, high) range to the lists of solid and cut rectangles
+    in it."""
+    uBands, vBands = bands = ({}, {})
+    for k, rects in ((0, (panel.core,) + panel.tabs),
+                     (1, panel.notches + panel.holes)):
+        for r in rects:
+            band = uBands.get((r[0], r[2]))
+            if band is None:
+                band = uBands[r[0], r[2]] = ([], [])
+            band[k].append(r)
+            band = vBands.get((r[1], r[3]))
+            if band is None:
+                band = vBands[r[1], r[3]] = ([], [])
+            band[k].append(r)
+    return bands
+
+
+def _length(spans, cuts):
+    """Returns the total length of the union of spans, less any of it that's
+    in cuts."""
+    total = 0.0
+    cuts = _union(cuts)
+    for a, b in _union(spans):
+        total += b - a
+        for c, d in cuts:
+            total -= max(0.0, min(b, d) - max(a, c))
+    return total
+
+
+def _subtract(spans, cuts):
+    """Returns the parts of spans that aren't in cuts. Both have to be sorted
+    and not overlap, as returned by _union."""
+    result = []
+    k = 0
+    for a, b in spans:
+        while k < len(cuts) and cuts[k][1] <= a:
+            k += 1
+        j = k
+        while j < len(cuts) and cuts[j][0] < b:
+            c, d = cuts[j]
+            if c > a:
+                result.append((a, c))
+            a = max(a, d)
+            j += 1
+        if a < b:
+            result.append((a, b))
+    return result
+
+
+def _union(spans):
+    merged = []
+    for a, b in sorted(spans):
+        if merged and a <= merged[-1][1]:
+            if b > merged[-1][1]:
+                merged[-1] = (merged[-1][0], b)
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def panelBox(panel, bands=None):
+    """Returns the box around a panel, tabs and all, as a (low, high) range
+    along each box axis. bands are the panel's panelBands, if they've been
+    worked out already."""
+    if bands is None:
+        bands = panelBands(panel)
+    u, v = [(min(lo for (lo, hi), (s, c) in b.items() if s),
+             max(hi for (lo, hi), (s, c) in b.items() if s)) for b in bands]
+    return _toBox(panel, u, v)
+
+
+def coreBox(panel):
+    """Returns the box around a panel's core, like panelBox."""
+    u1, v1, u2, v2 = panel.core
+    return _toBox(panel, (u1, u2), (v1, v2))
+
+
+def _toBox(panel, u, v):
+    box = [None, None, None]
+    box[panel.axes[0]] = u
+    box[panel.axes[1]] = v
+    box[panel.axes[2]] = (panel.offset, panel.offset + panel.thickness)
+    return box
+
+
+def describe(problem):
+    """Returns a problem as a line of text."""
+    what = {'overlap': 'overlap', 'gap': 'leave a gap',
+            'partial': "don't fill the joint"}[problem.kind]
+    return 'The {} and {} {} from {} = {:g} to {:g}.'.format(
+        problem.a, problem.b, what, AXIS_NAMES[problem.axis], problem.start,
+        problem.end)
+
+
+def randomSpec(rng):
+    """Returns a random BoxSpec, for checking lots of boxes. The boxes have
+    no hinges, since the check leaves the hinge slits out anyway."""
+    thickness = rng.choice((0.3, 0.4, 0.5, 0.6, 1.0, 1.2, 1.8))
+    dims = [rng.uniform(3 * thickness, 100 * thickness) for _ in range(3)]
+    return spec.BoxSpec(dims[0], dims[1], dims[2], thickness,
+                        rng.random() < 0.5, rng.randint(1, 12),
+                        rng.random() < 0.5, rng.choice((0, 0, 1, 2, 5)),
+                        rng.choice((0, 0, 1, 3)), (), None)
+
+
+def checkSpecs(specs, tolerance=TOLERANCE, show=10):
+    """Checks the boxes made from specs, leaving out any that don't pass
+    validation, since those aren't expected to fit. Boxes with the same
+    signature are only checked once. Returns the number of boxes checked, the
+    number left out, the number with problems, and the first show of those
+    as (spec, problems) pairs."""
+    validator = validate.Validator()
+    checked = skipped = bad = 0
+    shown = []
+    # The problems with each signature checked so far, or None if it didn't
+    # pass validation.
+    results = {}
+    for s in specs:
+        sig = spec.signature(s)
+        if sig not in results:
+            results[sig] = None if validator.validate(s) else checkJoints(
+                spec.specPanels(s), tolerance)
+        problems = results[sig]
+        if problems is None:
+            skipped += 1
+            continue
+        checked += 1
+        if problems:
+            bad += 1
+            if len(shown) < show:
+                shown.append((s, problems))
+    return checked, skipped, bad, shown
+
+
+def checkRandom(seed, chunk, count, tolerance=TOLERANCE, show=10):
+    """Checks count random boxes, like checkSpecs. The boxes depend only on
+    seed and chunk, so a run gives the same boxes however it's split up."""
+    rng = random.Random('{}/{}'.format(seed, chunk))
+    return checkSpecs((randomSpec(rng) for _ in range(count)), tolerance,
+                      show)
+
+
+# The number of random boxes each worker checks at a time.
+CHUNK = 10000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m boxerlib.jointcheck',
+        description='Check that the panels of boxes fit together.')
+    parser.add_argument('--specs', help='CSV or JSON spec file of boxes')
+    parser.add_argument('--random', type=int, default=0, metavar='N',
+                        help='check N random boxes')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the random boxes')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='processes to check random boxes in; by '
+                        'default, one for each CPU')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--show', type=int, default=10, metavar='N',
+                        help='print the problems of the first N bad boxes')
+    args = parser.parse_args(argv)
+    if not args.specs and not args.random:
+        parser.error('give --specs or --random')
+
+    start = time.perf_counter()
+    if args.specs:
+        results = [checkSpecs(spec.loadSpecs(args.specs, check=False),
+                              args.tolerance, args.show)]
+    else:
+        chunks = range((args.random + CHUNK - 1) // CHUNK)
+        counts = [min(CHUNK, args.random - i * CHUNK) for i in chunks]
+        tasks = ([args.seed] * len(counts), chunks, counts,
+                 [args.tolerance] * len(counts), [args.show] * len(counts))
+        if args.jobs > 1:
+            with concurrent.futures.ProcessPoolExecutor(args.jobs) as pool:
+                results = list(pool.map(checkRandom, *tasks))
+        else:
+            results = list(map(checkRandom, *tasks))
+    elapsed = time.perf_counter() - start
+
+    checked, skipped, bad = [sum(r[k] for r in results) for k in range(3)]
+    shown = [pair for r in results for pair in r[3]][:args.show]
+    for s, problems in shown:
+        print(spec.specToDict(s))
+        for problem in problems:
+            print('  ' + describe(problem))
+    print('checked {} boxes in {:.3f}s ({:.0f} boxes/s), {} with problems; '
+          'skipped {} invalid boxes'.format(
+              checked, elapsed, (checked + skipped) / elapsed, bad, skipped),
+          file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Nesting of panels onto sheets of material. Each panel is treated as the
+rectangle that bounds it, fingers and all, and the rectangles are packed onto
+as many sheets of a fixed size as it takes, with a skyline packer.
+
+A skyline is the outline of the tops of the rectangles placed on a sheet so
+far, kept as a list of horizontal segments running from one side of the sheet
+to the other. Each rectangle goes where its top would be lowest, resting on
+the skyline, and the skyline is raised over it; any space left under the
+skyline is given up. It's a simple packer, but a fast one, and with the
+rectangles placed tallest first it packs boxes' panels, which come in a few
+repeated sizes, well.
+
+The rectangles are placed on the first sheet they fit on, so earlier sheets
+are filled up by smaller panels that come later, and may be turned a quarter
+turn to fit.
+"""
+
+import bisect
+import collections
+
+# Where a rectangle was put: the sheet it's on, counting from 0, the position
+# of its lower left corner, and its size as placed. rotated is True if it was
+# turned a quarter turn, in which case width and height are its height and
+# width.
+Placement = collections.namedtuple(
+    'Placement', ['sheet', 'x', 'y', 'width', 'height', 'rotated'])
+
+# Lengths closer than this are taken to be the same.
+EPSILON = 1e-9
+
+
+class Skyline:
+    """The skyline of a sheet, as parallel lists of the segments' starting x,
+    height and width."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.xs = [0.0]
+        self.ys = [0.0]
+        self.ws = [width]
+        self.findRoom()
+
+    def findRoom(self):
+        """Works out the largest empty rectangles that stand on the skyline
+        and reach the top of the sheet. A rectangle fits on the sheet if it
+        fits in one of them, so the sheets a rectangle doesn't fit on can be
+        passed over without searching them. They're kept as a list of their
+        heights, lowest first, and the list of their widths, which get
+        narrower as they get taller; the ones that are no taller and no
+        wider than another are left out."""
+        xs, ys, ws = self.xs, self.ys, self.ws
+        n = len(xs)
+        room = []
+        for i in range(n):
+            y = ys[i]
+            lo = i
+            while lo > 0 and ys[lo - 1] <= y:
+                lo -= 1
+            hi = i
+            while hi + 1 < n and ys[hi + 1] <= y:
+                hi += 1
+            room.append((self.height - y, xs[hi] + ws[hi] - xs[lo]))
+        room.sort(reverse=True)
+        heights = []
+        widths = []
+        for h, w in room:
+            if not widths or w > widths[-1]:
+                heights.append(h)
+                widths.append(w)
+        heights.reverse()
+        widths.reverse()
+        self.roomHeights = heights
+        self.roomWidths = widths
+
+    def fits(self, w, h):
+        """Returns whether a w by h rectangle fits on the sheet."""
+        k = bisect.bisect_left(self.roomHeights, h - EPSILON)
+        return k < len(self.roomWidths) and w <= self.roomWidths[k] + EPSILON
+
+    def find(self, w, h):
+        """Returns the (top, x, segment) of the lowest place for a w by h
+        rectangle, or None if it doesn't fit."""
+        xs, ys, ws = self.xs, self.ys, self.ws
+        limit = self.width + EPSILON
+        best = None
+        for i in range(len(xs)):
+            x = xs[i]
+            if x + w > limit:
+                break
+            y = ys[i]
+            j = i
+            covered = ws[i]
+            while covered < w - EPSILON:
+                j += 1
+                covered += ws[j]
+                if ys[j] > y:
+                    y = ys[j]
+            top = y + h
+            if top <= self.height + EPSILON and (best is None or
+                                                 top < best[0] - EPSILON):
+                best = (top, x, i)
+        return best
+
+    def place(self, i, x, w, top):
+        """Raises the skyline to top over a rectangle w wide at x, which
+        starts on segment i."""
+        xs, ys, ws = self.xs, self.ys, self.ws
+        end = x + w
+        # Drop the segments the rectangle covers completely, and trim the
+        # one it covers part of.
+        j = i
+        while j < len(xs) and xs[j] + ws[j] <= end + EPSILON:
+            j += 1
+        if j < len(xs) and xs[j] < end:
+            ws[j] -= end - xs[j]
+            xs[j] = end
+        xs[i:j] = [x]
+        ys[i:j] = [top]
+        ws[i:j] = [w]
+        # Merge it with its neighbors if they're the same height.
+        if i + 1 < len(xs) and abs(ys[i + 1] - top) <= EPSILON:
+            ws[i] += ws[i + 1]
+            del xs[i + 1], ys[i + 1], ws[i + 1]
+        if i > 0 and abs(ys[i - 1] - top) <= EPSILON:
+            ws[i - 1] += ws[i]
+            del xs[i], ys[i], ws[i]
+        self.findRoom()
+
+    def add(self, w, h, rotate):
+        """Places a w by h rectangle as low as it'll go, turning it if rotate
+        is True and that puts it lower. Returns its (x, y, rotated), or None
+        if it doesn't fit."""
+        best = self.find(w, h) if self.fits(w, h) else None
+        rotated = False
+        if rotate and abs(w - h) > EPSILON and self.fits(h, w):
+            turned = self.find(h, w)
+            if turned is not None and (best is None or
+                                       turned[0] < best[0] - EPSILON):
+                best = turned
+                rotated = True
+        if best is None:
+            return None
+        top, x, i = best
+        pw, ph = (h, w) if rotated else (w, h)
+        self.place(i, x, pw, top)
+        return x, top - ph, rotated
+
+
+def nest(sizes, sheetWidth, sheetHeight, gap=0.0, rotate=True):
+    """Packs rectangles onto sheetWidth by sheetHeight sheets. sizes is a
+    list of the rectangles' (width, height). The rectangles are kept gap
+    apart, and gap in from the edges of the sheets; if rotate is True, they
+    can be turned a quarter turn. Returns a Placement for each rectangle, in
+    the order of sizes. Raises ValueError if a rectangle is too big for a
+    sheet."""
+    # Everything is packed gap bigger into a sheet gap smaller, which leaves
+    # a gap after each rectangle, and then moved in by gap.
+    innerWidth = sheetWidth - gap
+    innerHeight = sheetHeight - gap
+    parts = []
+    for i, (w, h) in enumerate(sizes):
+        w = float(w) + gap
+        h = float(h) + gap
+        if rotate and h > w:
+            # Lay it flat to start with, so the tallest are placed first.
+            w, h = h, w
+            turned = True
+        else:
+            turned = False
+        fits = w <= innerWidth + EPSILON and h <= innerHeight + EPSILON
+        if rotate and not fits:
+            fits = h <= innerWidth + EPSILON and w <= innerHeight + EPSILON
+        if not fits:
+            raise ValueError(
+                '{:g} x {:g} is too big for a {:g} x {:g} sheet'.format(
+                    sizes[i][0], sizes[i][1], sheetWidth, sheetHeight))
+        parts.append((h, w, i, turned))
+    parts.sort(key=lambda p: (-p[0], -p[1], p[2]))
+
+    sheets = []
+    placements = [None] * len(parts)
+    # The first sheet that a rectangle of each size might still fit on. The
+    # sheets only fill up, so the ones before it never will, and boxes have
+    # lots of panels the same size.
+    firstSheet = {}
+    for h, w, i, turned in parts:
+        for sheet in range(firstSheet.get((w, h), 0), len(sheets)):
+            where = sheets[sheet].add(w, h, rotate)
+            if where is not None:
+                break
+        else:
+            sheet = len(sheets)
+            sheets.append(Skyline(innerWidth, innerHeight))
+            where = sheets[sheet].add(w, h, rotate)
+        firstSheet[w, h] = sheet
+        x, y, rotated = where
+        if rotated:
+            w, h = h, w
+        placements[i] = Placement(sheet, x + gap, y + gap, w - gap, h - gap,
+                                  rotated != turned)
+    return placements
+
+
+def sheetCount(placements):
+    return max((p.sheet for p in placements), default=-1) + 1
+
+
+def utilization(placements, sheetWidth, sheetHeight):
+    """Returns the fraction of the area of the sheets used that's covered by
+    the rectangles."""
+    count = sheetCount(placements)
+    if not count:
+        return 0.0
+    return (sum(p.width * p.height for p in placements) /
+            (count * sheetWidth * sheetHeight))
@@ -0,0 +1,250 @@
+"""Panel geometry for a finger-jointed box. This turns the user's box
+parameters into the six flat panels of the box (base, lid, front, back, left
+and right), plus any dividers, each described by a closed outline that already
+includes its fingers and notches. Any of the six can have a living hinge cut
+in it (see hinge.py).
+
+Coordinates are in "box space": x runs along the length of the box, y along
+its width and z up its height, with the origin at the outside corner of the
+base. Each panel is drawn in its own 2D (u, v) space; 'axes' gives the box
+axes that u, v and the panel's thickness (w) run along, so that (u, v, w)
+maps to box space as p[axes[0]] = u, p[axes[1]] = v, p[axes[2]] = w.
+"""
+
+import collections
+import functools
+
+from . import dividers, fingerplan, hinge
+
+# core, tabs and notches are (u1, v1, u2, v2) rectangles. The panel is the core
+# rectangle plus the tabs, minus the notches; outline is the same shape as a
+# closed list of (u, v) points in counter-clockwise order. holes are
+# rectangles cut right through the panel, inside its outline, like the slots
+# that dividers go through. slits are the rectangles of a living hinge, which
+# are also cut through the panel, but are kept apart from holes because there
+# can be thousands of them.
+Panel = collections.namedtuple(
+    'Panel',
+    ['name', 'axes', 'offset', 'thickness', 'core', 'tabs', 'notches',
+     'outline', 'holes', 'slits'],
+    defaults=((), ()))
+
+PANEL_NAMES = ('base', 'lid', 'front', 'back', 'left', 'right')
+
+# Dividers are named after the axis they're spaced along, and numbered from 1:
+# dividerX1, dividerX2, ..., dividerY1, ...
+DIVIDER_PREFIX = 'divider'
+
+
+def outerDimensions(length, width, height, thickness, drawLid, dimsOuter):
+    """Returns the outer (length, width, height) of a box. If the dimensions
+    given are inner dimensions, the material thickness is added to them."""
+    if not dimsOuter:
+        length += 2*thickness
+        width += 2*thickness
+        height += thickness
+        if drawLid:
+            height += thickness
+    return length, width, height
+
+
+def boxPanels(length, width, height, thickness, drawLid, fingerScale,
+              dimsOuter=True, dividersX=0, dividersY=0, hinges=()):
+    """Returns the panels for a box as a tuple of Panels, in the order of
+    PANEL_NAMES, followed by the dividers across its length and then those
+    across its width. The lid is left out if drawLid is False. hinges names
+    the panels that have living hinges cut in them. The results are
+    memoized, so this is cheap to call repeatedly with the same parameters.
+    """
+    return _boxPanels(*outerDimensions(float(length), float(width),
+                                       float(height), float(thickness),
+                                       bool(drawLid), dimsOuter),
+                      float(thickness), bool(drawLid),
+                      fingerplan.checkFactor(fingerScale),
+                      int(dividersX), int(dividersY), hingeNames(hinges))
+
+
+def isDivider(panel):
+    return panel.name.startswith(DIVIDER_PREFIX)
+
+
+def hingeNames(hinges):
+    """Returns the names in hinges that are the names of a box's six panels,
+    in the order of PANEL_NAMES."""
+    return tuple(name for name in PANEL_NAMES if name in hinges)
+
+
+def isPanelName(name):
+    """Returns whether name is the name of one of a box's panels."""
+    return name in PANEL_NAMES or name.startswith(DIVIDER_PREFIX)
+
+
+@functools.lru_cache(maxsize=256)
+def _boxPanels(length, width, height, thickness, drawLid, fingerScale,
+               dividersX, dividersY, hinges):
+    t = thickness
+    lenSpans = fingerplan.fingerSpans(
+        fingerplan.planFingers2D(length, t, fingerScale))
+    widSpans = fingerplan.fingerSpans(
+        fingerplan.planFingers2D(width, t, fingerScale))
+    hgtSpans = fingerplan.fingerSpans(
+        fingerplan.planFingers2D(height, t, fingerScale))
+    topSpans = lenSpans if drawLid else ()
+    sideTopSpans = widSpans if drawLid else ()
+
+    # The base and lid have fingers on all four edges, and stop short of the
+    # sides by the material thickness.
+    baseEdges = {'bottom': (lenSpans, t), 'right': (widSpans, t),
+                 'top': (lenSpans, t), 'left': (widSpans, t)}
+    # The front and back have fingers on their ends that go into the sides,
+    # and are notched where the base and lid fingers go into them.
+    frontEdges = {'bottom': (lenSpans, -t), 'right': (hgtSpans, t),
+                  'top': (topSpans, -t), 'left': (hgtSpans, t)}
+    # The sides run the full width and height of the box, and are notched
+    # everywhere the other panels' fingers go into them.
+    sideEdges = {'bottom': (widSpans, -t), 'right': (hgtSpans, -t),
+                 'top': (sideTopSpans, -t), 'left': (hgtSpans, -t)}
+
+    baseCore = (t, t, length - t, width - t)
+    frontCore = (t, 0.0, length - t, height)
+    sideCore = (0.0, 0.0, width, height)
+
+    frontSlots = sideSlots = ()
+    if dividersX or dividersY:
+        grid = dividers.dividerGrid(length, width, height, t, drawLid,
+                                    fingerScale, dividersX, dividersY)
+        frontSlots = dividers.slots(grid.xs, t, grid.spans)
+        sideSlots = dividers.slots(grid.ys, t, grid.spans)
+
+    panels = [makePanel('base', (0, 1, 2), 0.0, t, baseCore, baseEdges)]
+    if drawLid:
+        panels.append(makePanel('lid', (0, 1, 2), height - t, t, baseCore,
+                                baseEdges))
+    panels += [
+        makePanel('front', (0, 2, 1), 0.0, t, frontCore, frontEdges,
+                  frontSlots),
+        makePanel('back', (0, 2, 1), width - t, t, frontCore, frontEdges,
+                  frontSlots),
+        makePanel('left', (1, 2, 0), 0.0, t, sideCore, sideEdges, sideSlots),
+        makePanel('right', (1, 2, 0), length - t, t, sideCore, sideEdges,
+                  sideSlots),
+    ]
+    panels = [p._replace(slits=hinge.hingeSlits(p.core, t, p.holes))
+              if p.name in hinges else p for p in panels]
+    if dividersX or dividersY:
+        panels += dividerPanels(length, width, grid, t)
+    return tuple(panels)
+
+
+def dividerPanels(length, width, grid, thickness):
+    """Returns the panels for the dividers in a DividerGrid."""
+    t = thickness
+    # Dividers across the length are slotted from the top where the ones
+    # across the width cross them, and those are slotted from the bottom.
+    xLaps = tuple((y - t / 2, y + t / 2) for y in grid.ys)
+    yLaps = tuple((x - t / 2, x + t / 2) for x in grid.xs)
+    xEdges = {'left': (grid.spans, t), 'right': (grid.spans, t),
+              'top': (xLaps, grid.middle - grid.top)}
+    yEdges = {'left': (grid.spans, t), 'right': (grid.spans, t),
+              'bottom': (yLaps, grid.bottom - grid.middle)}
+    xCore = (t, grid.bottom, width - t, grid.top)
+    yCore = (t, grid.bottom, length - t, grid.top)
+
+    panels = []
+    for i, x in enumerate(grid.xs, 1):
+        panels.append(makePanel('{}X{}'.format(DIVIDER_PREFIX, i), (1, 2, 0),
+                                x - t / 2, t, xCore, xEdges))
+    for i, y in enumerate(grid.ys, 1):
+        panels.append(makePanel('{}Y{}'.format(DIVIDER_PREFIX, i), (0, 2, 1),
+                                y - t / 2, t, yCore, yEdges))
+    return panels
+
+
+def makePanel(name, axes, offset, thickness, core, edges, holes=()):
+    """Builds a Panel from its core rectangle and a dict describing each of its
+    edges ('bottom', 'right', 'top' and 'left'). Each edge is a (spans, depth)
+    pair: spans are (start, end) positions along the edge, and depth is how far
+    each span sticks out from the core (for tabs) or, if it's negative, how far
+    it's cut into the core (for notches). holes are rectangles to cut out of
+    the middle of the panel.
+    """
+    tabs = []
+    notches = []
+    for side in ('bottom', 'right', 'top', 'left'):
+        spans, depth = edges.get(side, ((), 0.0))
+        for a, b in spans:
+            rect = edgeRect(core, side, a, b, depth)
+            if depth > 0:
+                tabs.append(rect)
+            else:
+                notches.append(rect)
+    return Panel(name, axes, offset, thickness, core, tuple(tabs),
+                 tuple(notches), notchedOutline(core, edges), tuple(holes))
+
+
+def edgeRect(core, side, a, b, depth):
+    """Returns the rectangle for a single tab or notch on one edge of a core
+    rectangle. See makePanel for the meaning of depth."""
+    u0, v0, u1, v1 = core
+    d = abs(depth)
+    if side == 'bottom':
+        return (a, v0 - d, b, v0) if depth > 0 else (a, v0, b, v0 + d)
+    if side == 'top':
+        return (a, v1, b, v1 + d) if depth > 0 else (a, v1 - d, b, v1)
+    if side == 'left':
+        return (u0 - d, a, u0, b) if depth > 0 else (u0, a, u0 + d, b)
+    if side == 'right':
+        return (u1, a, u1 + d, b) if depth > 0 else (u1 - d, a, u1, b)
+    raise ValueError('unknown edge {}'.format(side))
+
+
+def notchedOutline(core, edges):
+    """Returns the closed outline of a core rectangle with tabs and notches on
+    its edges, as a tuple of (u, v) points in counter-clockwise order. See
+    makePanel for the format of edges."""
+    u0, v0, u1, v1 = core
+    pts = [(u0, v0)]
+    spans, d = edges.get('bottom', ((), 0.0))
+    for a, b in sorted(spans):
+        pts += [(a, v0), (a, v0 - d), (b, v0 - d), (b, v0)]
+    pts.append((u1, v0))
+    spans, d = edges.get('right', ((), 0.0))
+    for a, b in sorted(spans):
+        pts += [(u1, a), (u1 + d, a), (u1 + d, b), (u1, b)]
+    pts.append((u1, v1))
+    spans, d = edges.get('top', ((), 0.0))
+    for a, b in sorted(spans, reverse=True):
+        pts += [(b, v1), (b, v1 + d), (a, v1 + d), (a, v1)]
+    pts.append((u0, v1))
+    spans, d = edges.get('left', ((), 0.0))
+    for a, b in sorted(spans, reverse=True):
+        pts += [(u0, b), (u0 - d, b), (u0 - d, a), (u0, a)]
+    return tuple(pts)
+
+
+def toBox(panel, u, v, w):
+    """Converts a point in a panel's (u, v, w) space to box space."""
+    p = [0.0, 0.0, 0.0]
+    p[panel.axes[0]] = u
+    p[panel.axes[1]] = v
+    p[panel.axes[2]] = w
+    return tuple(p)
+
+
+def holeOutline(rect):
+    """Returns a hole's rectangle as a closed outline, like Panel.outline."""
+    u1, v1, u2, v2 = rect
+    return ((u1, v1), (u2, v1), (u2, v2), (u1, v2))
+
+
+def panelLoops(panel):
+    """Returns the outline of a panel as two closed loops of box space points,
+    one on each face of the panel, followed by a pair of loops for each of its
+    holes. The first point of each loop is repeated at its end."""
+    loops = []
+    for outline in [panel.outline] + [holeOutline(h) for h in panel.holes]:
+        for w in (panel.offset, panel.offset + panel.thickness):
+            loop = [toBox(panel, u, v, w) for u, v in outline]
+            loop.append(loop[0])
+            loops.append(loop)
+    return loops
@@ -0,0 +1,96 @@
+"""Line segment helpers for writing sketch geometry in bulk. Rectangles that
+share an edge, like a finger and the panel it sticks out of, would otherwise
+put two overlapping lines into the sketch; uniqueSegments breaks the geometry
+up so that every piece of every edge is drawn exactly once.
+
+Points are (x, y) tuples and segments are (point, point) tuples.
+"""
+
+import collections
+
+# Coordinates are rounded to this many decimal places before they're compared,
+# so that points that differ only by floating point noise are merged.
+PRECISION = 9
+
+
+def rectSegments(rect):
+    """Returns the four segments of an (x1, y1, x2, y2) rectangle."""
+    x1, y1, x2, y2 = rect
+    return [((x1, y1), (x2, y1)), ((x2, y1), (x2, y2)),
+            ((x2, y2), (x1, y2)), ((x1, y2), (x1, y1))]
+
+
+def outlineSegments(outline):
+    """Returns the segments of a closed outline given as a list of points."""
+    return [(outline[i], outline[(i + 1) % len(outline)])
+            for i in range(len(outline))]
+
+
+def offsetRects(rects, dx, dy):
+    """Returns a copy of a list of rectangles, moved by dx, dy."""
+    return [(x1 + dx, y1 + dy, x2 + dx, y2 + dy) for x1, y1, x2, y2 in rects]
+
+
+def uniqueSegments(segments):
+    """Returns the segments with overlapping and duplicate pieces removed.
+    Horizontal and vertical segments are merged with any others on the same
+    line and then split wherever another segment starts or ends on that line,
+    so the result has no overlaps and shares end points wherever the input
+    geometry touches. Any other segments are only de-duplicated.
+    """
+    def snap(p):
+        return (round(p[0], PRECISION), round(p[1], PRECISION))
+
+    horiz = collections.defaultdict(list)
+    vert = collections.defaultdict(list)
+    other = set()
+    ends = set()
+    for a, b in segments:
+        a, b = snap(a), snap(b)
+        if a == b:
+            continue
+        ends.add(a)
+        ends.add(b)
+        if a[1] == b[1]:
+            horiz[a[1]].append((min(a[0], b[0]), max(a[0], b[0])))
+        elif a[0] == b[0]:
+            vert[a[0]].append((min(a[1], b[1]), max(a[1], b[1])))
+        else:
+            other.add((a, b) if a < b else (b, a))
+
+    # Points where segments end, indexed by the lines they could split.
+    endsOnHoriz = collections.defaultdict(list)
+    endsOnVert = collections.defaultdict(list)
+    for x, y in ends:
+        if y in horiz:
+            endsOnHoriz[y].append(x)
+        if x in vert:
+            endsOnVert[x].append(y)
+
+    result = []
+    for y, spans in horiz.items():
+        for x1, x2 in _splitSpans(spans, endsOnHoriz[y]):
+            result.append(((x1, y), (x2, y)))
+    for x, spans in vert.items():
+        for y1, y2 in _splitSpans(spans, endsOnVert[x]):
+            result.append(((x, y1), (x, y2)))
+    result.extend(sorted(other))
+    return result
+
+
+def _splitSpans(spans, cuts):
+    """Merges overlapping (start, end) spans on a line, and splits the result
+    at each of the positions in cuts."""
+    marks = sorted(set([p for span in spans for p in span] + cuts))
+    # Count how many spans cover each interval between consecutive marks.
+    delta = collections.Counter()
+    for a, b in spans:
+        delta[a] += 1
+        delta[b] -= 1
+    result = []
+    depth = 0
+    for i in range(len(marks) - 1):
+        depth += delta[marks[i]]
+        if depth > 0:
+            result.append((marks[i], marks[i + 1]))
+    return result
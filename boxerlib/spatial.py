@@ -0,0 +1,103 @@
+"""Spatial queries over axis-aligned boxes. A box is a (lo, hi) pair of
+points, with as many coordinates as the space has dimensions.
+"""
+
+import math
+
+
+def overlaps(a, b, tol=0.0):
+    """Returns whether boxes a and b overlap or touch, to within tol. A
+    negative tol asks whether they overlap by more than -tol."""
+    return all(alo <= bhi + tol and blo <= ahi + tol
+               for alo, ahi, blo, bhi in zip(a[0], a[1], b[0], b[1]))
+
+
+def contains(outer, inner, tol=0.0):
+    """Returns whether box inner lies within box outer, to within tol."""
+    return all(olo - tol <= ilo and ihi <= ohi + tol
+               for olo, ohi, ilo, ihi in zip(outer[0], outer[1],
+                                             inner[0], inner[1]))
+
+
+def size(box):
+    return tuple(hi - lo for lo, hi in zip(box[0], box[1]))
+
+
+def sweepPairs(boxes, tol=0.0):
+    """Returns the (i, j) index pairs, i < j, of the boxes that overlap or
+    touch, sorted. The boxes are swept along the axis they're most spread out
+    on, so only boxes that share an interval of that axis are compared."""
+    if not boxes:
+        return []
+    dims = len(boxes[0][0])
+    axis = max(range(dims), key=lambda d: (
+        max(b[0][d] for b in boxes) - min(b[0][d] for b in boxes)))
+
+    order = sorted(range(len(boxes)), key=lambda i: boxes[i][0][axis])
+    pairs = []
+    active = []
+    for i in order:
+        box = boxes[i]
+        lo = box[0][axis] - tol
+        active = [j for j in active if boxes[j][1][axis] >= lo]
+        for j in active:
+            if overlaps(boxes[j], box, tol):
+                pairs.append((j, i) if j < i else (i, j))
+        active.append(i)
+    pairs.sort()
+    return pairs
+
+
+class GridIndex:
+    """Indexes boxes by the cells of a uniform grid over their first two axes,
+    so that the boxes inside a query box can be found by looking only at the
+    cells it covers. The cell size defaults to the median size of the boxes.
+    Boxes much bigger than a cell are kept in a list that every query checks,
+    rather than being entered in every cell they cover."""
+
+    # Boxes spanning more cells than this on either axis aren't gridded.
+    MAX_SPAN = 16
+
+    def __init__(self, boxes, cell=None):
+        self.boxes = list(boxes)
+        if cell is None:
+            sizes = sorted(max(size(box)[:2]) for box in self.boxes)
+            cell = sizes[len(sizes) // 2] if sizes else 0.0
+        self.cell = cell if cell > 0.0 else 1.0
+        self.cells = {}
+        self.large = []
+        for i, box in enumerate(self.boxes):
+            (x0, x1), (y0, y1) = self._span(box)
+            if x1 - x0 >= self.MAX_SPAN or y1 - y0 >= self.MAX_SPAN:
+                self.large.append(i)
+                continue
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    self.cells.setdefault((x, y), []).append(i)
+        if self.cells:
+            self.bounds = tuple(
+                (min(k[d] for k in self.cells), max(k[d] for k in self.cells))
+                for d in range(2))
+
+    def _span(self, box):
+        return tuple((math.floor(box[0][d] / self.cell),
+                      math.floor(box[1][d] / self.cell)) for d in range(2))
+
+    def within(self, box, tol=0.0):
+        """Returns the indices, in order, of the boxes that lie inside box, to
+        within tol."""
+        found = set(i for i in self.large
+                    if contains(box, self.boxes[i], tol))
+        if self.cells:
+            # Only the cells that have something in them need to be visited,
+            # however big the query is.
+            (x0, x1), (y0, y1) = [
+                (max(lo - 1, blo), min(hi + 1, bhi)) for (lo, hi), (blo, bhi)
+                in zip(self._span(box), self.bounds)]
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    for i in self.cells.get((x, y), ()):
+                        if i not in found and contains(box, self.boxes[i],
+                                                       tol):
+                            found.add(i)
+        return sorted(found)
@@ -0,0 +1,189 @@
+"""Box specs. A spec is anything with the attributes named in SPEC_FIELDS -
+usually a boxerInputs read from the dialog, or a BoxSpec read from a spec file.
+These are the parameters that decide what a box looks like.
+
+Spec files are either CSV, with a header row naming the fields, or JSON, with a
+list of objects. Each box needs a length, width, height and thickness; the
+other fields are optional. A box can also give its position with x, y and z.
+"""
+
+import collections
+import csv
+import hashlib
+import json
+import os
+import re
+
+from . import fingerplan, panels, segments, validate
+
+SPEC_FIELDS = ('length', 'width', 'height', 'thickness', 'drawLid',
+               'fingerScale', 'dimsOuter', 'dividersX', 'dividersY', 'hinges')
+
+
+def signature(spec):
+    """Returns a normalized tuple of a spec's fields. Two specs with the same
+    signature describe the same box, so the signature can be used as a cache
+    key."""
+    sig = (round(float(spec.length), segments.PRECISION),
+           round(float(spec.width), segments.PRECISION),
+           round(float(spec.height), segments.PRECISION),
+           round(float(spec.thickness), segments.PRECISION),
+           bool(spec.drawLid),
+           int(spec.fingerScale),
+           bool(spec.dimsOuter),
+           int(spec.dividersX),
+           int(spec.dividersY))
+    # Only boxes with hinges have them in their signature, so the hashes of
+    # boxes drawn before there were hinges still match.
+    hinges = panels.hingeNames(spec.hinges)
+    if hinges:
+        sig += (hinges,)
+    return sig
+
+
+def groupSpecs(specs):
+    """Returns lists of the indices of specs that have the same signature, in
+    the order each signature first appears. Only the first spec in each list
+    needs to be planned."""
+    groups = {}
+    for i, spec in enumerate(specs):
+        groups.setdefault(signature(spec), []).append(i)
+    return list(groups.values())
+
+
+def specHash(spec):
+    """Returns a short hex digest of a spec's signature. Unlike the signature
+    it's a plain string, so it can be stored with a box and compared without
+    parsing anything."""
+    return hashlib.sha1(
+        json.dumps(signature(spec)).encode('utf-8')).hexdigest()[:16]
+
+
+def specPanels(spec):
+    """Returns the panels for a spec."""
+    return panels.boxPanels(*[getattr(spec, field) for field in SPEC_FIELDS])
+
+
+# The fields that are lengths, and so need converting between units.
+LENGTH_FIELDS = ('length', 'width', 'height', 'thickness')
+
+# The defaults used for optional fields in spec files.
+DEFAULTS = {'drawLid': False, 'fingerScale': 5, 'dimsOuter': True,
+            'dividersX': 0, 'dividersY': 0, 'hinges': ()}
+
+# position is an (x, y, z) tuple, or None to let the box be placed
+# automatically.
+BoxSpec = collections.namedtuple('BoxSpec', SPEC_FIELDS + ('position',))
+
+
+# The most bad boxes loadSpecs lists in its error.
+MAX_ERRORS = 20
+
+
+def loadSpecs(path, scale=1.0, check=True):
+    """Reads a spec file and returns a list of BoxSpecs. All lengths and
+    positions are multiplied by scale, to convert them from the file's units.
+    If check is set, every box is also checked with validate.Validator, so
+    that a box that can't be built is found before any are. Raises ValueError
+    if the file is malformed or a box fails its check, listing every bad box
+    by its line in a CSV file, or its place in a JSON list."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline='') as f:
+        if ext == '.json':
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise ValueError('{}: expected a list of boxes'.format(path))
+            rows = [('box {}'.format(i), row) for i, row in enumerate(rows, 1)]
+        elif ext == '.csv':
+            reader = csv.DictReader(f)
+            rows = [('line {}'.format(reader.line_num), row)
+                    for row in reader]
+        else:
+            raise ValueError(
+                '{}: spec files must be .csv or .json'.format(path))
+    specs = []
+    errors = []
+    validator = validate.Validator()
+    for where, row in rows:
+        try:
+            s = specFromDict(row, scale)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            errors.append('{}: {}'.format(where, e))
+            continue
+        if check:
+            errors += ['{}: {}'.format(where, e)
+                       for e in validator.validate(s)]
+        specs.append(s)
+    if errors:
+        if len(errors) > MAX_ERRORS:
+            errors[MAX_ERRORS:] = ['and {} more'.format(
+                len(errors) - MAX_ERRORS)]
+        raise ValueError('{}:\n{}'.format(path, '\n'.join(errors)))
+    return specs
+
+
+def specFromDict(d, scale=1.0):
+    """Builds a BoxSpec from a dict of field values, which may be strings."""
+    # CSV files leave empty cells as empty strings; treat them as missing.
+    d = {k.strip(): v for k, v in d.items()
+         if k and v is not None and v != ''}
+    for field in LENGTH_FIELDS:
+        if field not in d:
+            raise ValueError('missing {}'.format(field))
+    values = {}
+    for field in LENGTH_FIELDS:
+        values[field] = float(d[field]) * scale
+    values['drawLid'] = _parseBool(d.get('drawLid', DEFAULTS['drawLid']))
+    values['fingerScale'] = fingerplan.checkFactor(
+        float(d.get('fingerScale', DEFAULTS['fingerScale'])))
+    values['dimsOuter'] = _parseBool(d.get('dimsOuter', DEFAULTS['dimsOuter']))
+    for field in ('dividersX', 'dividersY'):
+        values[field] = int(d.get(field, DEFAULTS[field]))
+    values['hinges'] = parseHinges(d.get('hinges', DEFAULTS['hinges']))
+    position = None
+    if any(axis in d for axis in ('x', 'y', 'z')):
+        position = tuple(float(d.get(axis, 0)) * scale
+                         for axis in ('x', 'y', 'z'))
+    return BoxSpec(position=position, **values)
+
+
+def specToDict(spec):
+    """Returns a spec's fields as a dict."""
+    return {field: getattr(spec, field) for field in SPEC_FIELDS}
+
+
+def parseHinges(v):
+    """Returns the panel names in a hinges field as a tuple. In a spec file
+    they're given as a list, or a string of names separated by spaces,
+    commas, semicolons or plus signs."""
+    if isinstance(v, str):
+        v = re.split(r'[\s,;+]+', v.strip())
+    return tuple(str(name).strip().lower() for name in v if str(name).strip())
+
+
+def _parseBool(v):
+    if isinstance(v, bool):
+        return v
+    s = str(v).strip().lower()
+    if s in ('1', 'true', 'yes', 'y'):
+        return True
+    if s in ('0', 'false', 'no', 'n'):
+        return False
+    raise ValueError('expected true or false, not {!r}'.format(v))
+
+
+def layoutRow(specs, gap):
+    """Returns a position for each spec. Specs that give their own position
+    keep it; the rest are placed in a row along the x axis, gap apart."""
+    positions = []
+    x = 0.0
+    for s in specs:
+        if s.position is not None:
+            positions.append(s.position)
+            continue
+        positions.append((x, 0.0, 0.0))
+        length = panels.outerDimensions(s.length, s.width, s.height,
+                                        s.thickness, s.drawLid,
+                                        s.dimsOuter)[0]
+        x += length + gap
+    return positions
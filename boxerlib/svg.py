@@ -0,0 +1,36 @@
+"""A small streaming SVG writer. The size of the drawing has to be known up
+front, but paths are written out as they're added.
+"""
+
+
+class SvgWriter:
+    """Writes closed polylines to an SVG file, in the given units. SVG's y axis
+    points down, so y coordinates are flipped to keep the drawing the same way
+    up as it is in a DXF. Use it as a context manager, or call close() when
+    done."""
+
+    def __init__(self, f, width, height, units='mm', strokeWidth=0.1):
+        self.f = f
+        self.height = height
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<svg xmlns="http://www.w3.org/2000/svg" '
+                'width="{w:.6f}{u}" height="{h:.6f}{u}" '
+                'viewBox="0 0 {w:.6f} {h:.6f}">\n'.format(
+                    w=width, h=height, u=units))
+        f.write('<g fill="none" stroke="black" stroke-width="{}">\n'.format(
+            strokeWidth))
+
+    def polyline(self, points, closed=True):
+        """Writes a path through a list of (x, y) points."""
+        h = self.height
+        d = ' '.join('{:.6f},{:.6f}'.format(x, h - y) for x, y in points)
+        self.f.write('<path d="M {}{}"/>\n'.format(d, ' Z' if closed else ''))
+
+    def close(self):
+        self.f.write('</g>\n</svg>\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,91 @@
+"""Opt-in timing of Boxer's phases. A Profiler records runs (one call to
+drawBox, say), each broken down into named phases with the time spent in them
+and the number of entities they created. The last few runs are kept in a ring
+buffer so that they can be shown in Fusion or dumped as JSON and compared
+offline.
+
+When the profiler is disabled, run() and span() do nothing, so the
+instrumentation can stay in place.
+"""
+
+import collections
+import contextlib
+import json
+import time
+
+
+class Profiler:
+    def __init__(self, keep=10):
+        self.enabled = False
+        self.runs = collections.deque(maxlen=keep)
+        self._current = None
+        self._phase = None
+
+    @contextlib.contextmanager
+    def run(self, name):
+        """Records a run. If a run is already being recorded, this is recorded
+        as a phase of that run instead."""
+        if not self.enabled:
+            yield
+            return
+        if self._current is not None:
+            with self.span(name):
+                yield
+            return
+        self._current = {'name': name, 'started': time.time(), 'phases': {}}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current['seconds'] = time.perf_counter() - start
+            self.runs.append(self._current)
+            self._current = None
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        """Records the time spent in a phase of the current run. Spans of the
+        same phase are added together."""
+        if self._current is None:
+            yield
+            return
+        outer = self._phase
+        self._phase = self._current['phases'].setdefault(
+            phase, {'seconds': 0.0, 'calls': 0, 'counts': {}})
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phase['seconds'] += time.perf_counter() - start
+            self._phase['calls'] += 1
+            self._phase = outer
+
+    def count(self, what, n=1):
+        """Adds n to the count of entities of some kind created in the current
+        phase."""
+        if self._phase is not None:
+            counts = self._phase['counts']
+            counts[what] = counts.get(what, 0) + n
+
+    def clear(self):
+        self.runs.clear()
+
+    def report(self):
+        """Returns a plain text report of the recorded runs, newest first."""
+        if not self.runs:
+            return 'No runs recorded.'
+        lines = []
+        for r in reversed(self.runs):
+            lines.append('{} - {:.3f}s - {}'.format(
+                r['name'], r['seconds'],
+                time.strftime('%H:%M:%S', time.localtime(r['started']))))
+            phases = sorted(r['phases'].items(),
+                            key=lambda kv: -kv[1]['seconds'])
+            for phase, p in phases:
+                counts = ', '.join('{} {}'.format(n, what) for what, n in
+                                   sorted(p['counts'].items()))
+                lines.append('  {:<12} {:8.3f}s  x{:<3} {}'.format(
+                    phase, p['seconds'], p['calls'], counts))
+        return '\n'.join(lines)
+
+    def toJSON(self):
+        return json.dumps(list(self.runs), indent=1)
@@ -0,0 +1,233 @@
+"""Toolpath ordering for laser cutting. This puts the closed contours of a
+flat pattern in an order that keeps the laser's travel short: inner contours
+are always cut before the contour that surrounds them, so a part doesn't drop
+out of the sheet before its holes are cut, and parts are visited with a
+nearest-neighbour tour improved by 2-opt. Panels already come as single
+outlines, with no edges shared between pieces, so there's nothing to merge.
+
+Contours are lists of (x, y) points; the closing point isn't repeated.
+"""
+
+import collections
+import math
+
+Report = collections.namedtuple('Report', ['cutLength', 'travel'])
+
+
+def contourLength(contour):
+    n = len(contour)
+    return sum(math.dist(contour[i], contour[(i + 1) % n]) for i in range(n))
+
+
+def containsPoint(contour, p):
+    """Returns True if a point is inside a closed contour."""
+    x, y = p
+    inside = False
+    n = len(contour)
+    for i in range(n):
+        (x1, y1), (x2, y2) = contour[i], contour[(i + 1) % n]
+        if (y1 > y) != (y2 > y):
+            if x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+def measure(contours, start=(0.0, 0.0)):
+    """Returns the cut length and travel distance for cutting contours in the
+    order given, starting at start. Each contour is cut starting and ending at
+    its first point."""
+    cut = 0.0
+    travel = 0.0
+    pos = start
+    for c in contours:
+        travel += math.dist(pos, c[0])
+        cut += contourLength(c)
+        pos = c[0]
+    return Report(cut, travel)
+
+
+def orderContours(contours, start=(0.0, 0.0), passes=20):
+    """Returns the contours in cutting order. Contours are grouped into parts
+    (an outer contour and everything inside it); the parts are visited in an
+    order found with a nearest-neighbour tour improved by 2-opt, and within
+    each part the inner contours are cut first. Each contour is rotated to
+    start at its point nearest to where the laser already is."""
+    parts = _groupParts(contours)
+    anchors = [_center(outer) for outer, _ in parts]
+    order = _twoOpt(_nearestNeighbour(anchors, start), anchors, start, passes)
+
+    result = []
+    pos = start
+    for i in order:
+        outer, inner = parts[i]
+        nearest = _NearestContours(inner)
+        for _ in range(len(inner)):
+            c = _rotateTo(inner[nearest.pop(pos)], pos)
+            result.append(c)
+            pos = c[0]
+        c = _rotateTo(outer, pos)
+        result.append(c)
+        pos = c[0]
+    return result
+
+
+def _groupParts(contours):
+    """Groups contours into (outer, [inner...]) parts. Holes nested more than
+    one deep are treated as inner contours of the outermost part, which is
+    still cut inside-out since they're cut first."""
+    bounds = [_bounds(c) for c in contours]
+    # A contour's outermost container doesn't have a container itself, so
+    # with the biggest contours looked at first, each contour only has to be
+    # checked against the outer contours already found.
+    order = sorted(range(len(contours)), key=lambda i: -_area(bounds[i]))
+    parents = [None] * len(contours)
+    outers = []
+    for i in order:
+        c = contours[i]
+        parent = None
+        for j in outers:
+            if not _boundsInside(bounds[i], bounds[j]):
+                continue
+            if containsPoint(contours[j], c[0]):
+                # Pick the outermost container.
+                if parent is None or _boundsInside(bounds[parent], bounds[j]):
+                    parent = j
+        parents[i] = parent
+        if parent is None:
+            outers.append(i)
+    parts = {}
+    for i, parent in enumerate(parents):
+        if parent is None:
+            parts.setdefault(i, [])
+    for i, parent in enumerate(parents):
+        if parent is not None:
+            parts.setdefault(parent, []).append(contours[i])
+    return [(contours[i], inner) for i, inner in parts.items()]
+
+
+def _bounds(c):
+    xs = [p[0] for p in c]
+    ys = [p[1] for p in c]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _area(b):
+    return (b[2] - b[0]) * (b[3] - b[1])
+
+
+def _boundsInside(a, b):
+    return a[0] >= b[0] and a[1] >= b[1] and a[2] <= b[2] and a[3] <= b[3]
+
+
+def _center(c):
+    x1, y1, x2, y2 = _bounds(c)
+    return ((x1 + x2) / 2, (y1 + y2) / 2)
+
+
+def _nearestDist(c, pos):
+    return min(math.dist(p, pos) for p in c)
+
+
+class _NearestContours:
+    """Finds which of a set of contours has a point nearest to a position,
+    over and over, removing each one as it's found. The contours' points are
+    put in a grid, and the search works outwards from the position's cell
+    until nothing further out could be nearer. Ties go to the contour that
+    comes first."""
+
+    def __init__(self, contours):
+        self.contours = contours
+        self.cells = collections.defaultdict(set)
+        if not contours:
+            return
+        x1, y1, x2, y2 = _bounds([p for c in contours for p in c])
+        self.origin = (x1, y1)
+        side = math.isqrt(len(contours)) + 1
+        self.size = max(x2 - x1, y2 - y1, 1e-9) / side
+        self.extent = self._cell((x2, y2))
+        for i, c in enumerate(contours):
+            for p in c:
+                self.cells[self._cell(p)].add(i)
+
+    def _cell(self, p):
+        return (int(math.floor((p[0] - self.origin[0]) / self.size)),
+                int(math.floor((p[1] - self.origin[1]) / self.size)))
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def pop(self, pos):
+        """Returns the index of the contour nearest to pos, and removes it."""
+        cx, cy = self._cell(pos)
+        ex, ey = self.extent
+        # The rings nearer than this don't reach the grid, and the ones
+        # further out than last are past it.
+        first = max(0, -cx, cx - ex, -cy, cy - ey)
+        last = max(cx, ex - cx, cy, ey - cy)
+        best = None
+        seen = set()
+        for r in range(first, last + 1):
+            for cell in self._ring(cx, cy, r):
+                for i in self.cells.get(cell, ()):
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    d = _nearestDist(self.contours[i], pos)
+                    if best is None or (d, i) < best:
+                        best = (d, i)
+            # Every point outside the rings searched so far is at least r
+            # cells away.
+            if best is not None and best[0] < r * self.size:
+                break
+        i = best[1]
+        for p in self.contours[i]:
+            self.cells[self._cell(p)].discard(i)
+        return i
+
+
+def _rotateTo(c, pos):
+    i = min(range(len(c)), key=lambda k: math.dist(c[k], pos))
+    return c[i:] + c[:i]
+
+
+def _nearestNeighbour(points, start):
+    remaining = set(range(len(points)))
+    order = []
+    pos = start
+    while remaining:
+        i = min(remaining, key=lambda k: math.dist(points[k], pos))
+        remaining.remove(i)
+        order.append(i)
+        pos = points[i]
+    return order
+
+
+def _twoOpt(order, points, start, passes):
+    """Improves an open tour from start by reversing segments of it while that
+    makes it shorter."""
+    path = [start] + [points[i] for i in order]
+    order = list(order)
+    for _ in range(passes):
+        improved = False
+        for i in range(1, len(path) - 1):
+            for j in range(i + 1, len(path)):
+                a, b = path[i - 1], path[i]
+                c = path[j]
+                d = path[j + 1] if j + 1 < len(path) else None
+                before = math.dist(a, b) + (math.dist(c, d) if d else 0.0)
+                after = math.dist(a, c) + (math.dist(b, d) if d else 0.0)
+                if after < before - 1e-9:
+                    path[i:j + 1] = reversed(path[i:j + 1])
+                    order[i - 1:j] = reversed(order[i - 1:j])
+                    improved = True
+        if not improved:
+            break
+    return order
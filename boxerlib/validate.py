@@ -0,0 +1,124 @@
+"""Rule-based validation of box specs. Each rule lists the spec fields it
+depends on, so that when the user changes one input only the rules that could
+have changed their answer are checked again.
+"""
+
+import collections
+
+from . import dividers, fingerplan, hinge, panels
+
+# check is called with the spec, and returns an error message, or None if the
+# rule is satisfied.
+Rule = collections.namedtuple('Rule', ['name', 'fields', 'check'])
+
+
+def _checkThickness(spec):
+    if spec.thickness <= 0:
+        return 'The material thickness must be greater than 0.'
+    return None
+
+
+def _dimensionRule(field):
+    def check(spec):
+        if getattr(spec, field) <= 2*spec.thickness:
+            return 'The box {} must be more than twice the material ' \
+                'thickness.'.format(field)
+        return None
+    return Rule(field, (field, 'thickness'), check)
+
+
+def _fingerRule(index, field):
+    # Fingers are laid out on the outer dimensions, so this depends on
+    # everything that goes into those as well as on the finger scale.
+    def check(spec):
+        if spec.thickness <= 0:
+            return None
+        dims = panels.outerDimensions(
+            spec.length, spec.width, spec.height, spec.thickness,
+            spec.drawLid, spec.dimsOuter)
+        plan = fingerplan.planFingers2D(
+            dims[index], spec.thickness, spec.fingerScale)
+        if plan.count == 0:
+            return 'The box {} is too short for fingers.'.format(field)
+        return None
+    fields = (field, 'thickness', 'fingerScale', 'dimsOuter')
+    if field == 'height':
+        fields += ('drawLid',)
+    return Rule(field + 'Fingers', fields, check)
+
+
+def _checkDividers(spec):
+    if spec.dividersX < 0 or spec.dividersY < 0:
+        return 'The number of dividers can\'t be negative.'
+    if not (spec.dividersX or spec.dividersY) or spec.thickness <= 0:
+        return None
+    t = spec.thickness
+    length, width, height = panels.outerDimensions(
+        spec.length, spec.width, spec.height, t, spec.drawLid, spec.dimsOuter)
+    for field, inner, count in (('length', length - 2*t, spec.dividersX),
+                                ('width', width - 2*t, spec.dividersY)):
+        if dividers.compartment(inner, t, count) < t:
+            return 'There are too many dividers across the box {} for the ' \
+                'compartments to be wider than the material.'.format(field)
+    grid = dividers.dividerGrid(length, width, height, t, spec.drawLid,
+                                spec.fingerScale, 0, 0)
+    if not grid.spans:
+        return 'The box is too short for the dividers to have fingers.'
+    return None
+
+
+def _checkHinges(spec):
+    unknown = [name for name in spec.hinges if name not in panels.PANEL_NAMES]
+    if unknown:
+        return 'Living hinges can only be cut in the {}, not the {}.'.format(
+            ', '.join(panels.PANEL_NAMES), ', '.join(unknown))
+    if 'lid' in spec.hinges and not spec.drawLid:
+        return 'The box has no lid to cut a living hinge in.'
+    if not spec.hinges or spec.thickness <= 0:
+        return None
+    boxPanels = panels.boxPanels(
+        spec.length, spec.width, spec.height, spec.thickness, spec.drawLid,
+        spec.fingerScale, spec.dimsOuter)
+    for panel in boxPanels:
+        if (panel.name in spec.hinges and
+                hinge.hingeRegion(panel.core, spec.thickness) is None):
+            return 'The {} is too small for a living hinge.'.format(
+                panel.name)
+    return None
+
+
+RULES = (
+    Rule('thickness', ('thickness',), _checkThickness),
+    _dimensionRule('length'),
+    _dimensionRule('width'),
+    _dimensionRule('height'),
+    _fingerRule(0, 'length'),
+    _fingerRule(1, 'width'),
+    _fingerRule(2, 'height'),
+    Rule('dividers', ('dividersX', 'dividersY', 'length', 'width', 'height',
+                      'thickness', 'drawLid', 'fingerScale', 'dimsOuter'),
+         _checkDividers),
+    Rule('hinges', ('hinges', 'length', 'width', 'height', 'thickness',
+                    'drawLid', 'fingerScale', 'dimsOuter'), _checkHinges),
+)
+
+
+class Validator:
+    """Validator checks specs against a set of rules, remembering the result of
+    each rule so that it only has to re-check the ones affected by a change.
+    """
+
+    def __init__(self, rules=RULES):
+        self.rules = rules
+        self.results = {}
+
+    def validate(self, spec, changed=None):
+        """Checks a spec and returns a list of error messages; the spec is valid
+        if the list is empty. changed is the set of spec fields that have
+        changed since the last call. If it's None, every rule is checked."""
+        for rule in self.rules:
+            if (changed is None or rule.name not in self.results or
+                    not changed.isdisjoint(rule.fields)):
+                self.results[rule.name] = rule.check(spec)
+        return [self.results[rule.name] for rule in self.rules
+                if self.results[rule.name]]
@@ -0,0 +1,99 @@
+"""Batched finger planning. planFingers2D plans one edge at a time, which is
+all a box needs, but its per-call overhead adds up when thousands of edges are
+planned at once. planFingers2DBatch plans arrays of edges in closed form with
+NumPy: the loop that shrinks the finger scale until a finger fits is replaced
+by working out the largest scale that fits directly, and every other step is
+the same arithmetic, in the same order, as planFingers2D, so the plans are
+identical to its plans down to the last bit.
+
+NumPy is optional. Without it, planFingers2DBatch plans the edges one at a
+time with planFingers2D.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import fingerplan
+
+
+def planFingers2DBatch(edgeLens, thicknesses, factors=5):
+    """Returns the finger plans for a set of edges, as arrays of their offsets,
+    pitches and counts; see fingerplan.planFingers2D. thicknesses and factors
+    are either arrays the same length as edgeLens or single values used for
+    every edge. Without NumPy, the arrays are lists. Raises ValueError if any
+    thickness isn't positive, or any factor is less than 1 or isn't a whole
+    number."""
+    if numpy is None:
+        return _planScalar(edgeLens, thicknesses, factors)
+
+    L = numpy.asarray(edgeLens, dtype=float)
+    t = numpy.broadcast_to(numpy.asarray(thicknesses, dtype=float), L.shape)
+    f = numpy.asarray(factors, dtype=float)
+    if numpy.any(f != numpy.trunc(f)):
+        raise ValueError('finger scales must be whole numbers')
+    f = numpy.broadcast_to(f.astype(numpy.int64), L.shape)
+    if numpy.any(t <= 0):
+        raise ValueError('thicknesses must be positive')
+    if numpy.any(f < 1):
+        raise ValueError('finger scales must be at least 1')
+
+    empty = 3 * t > L
+    with numpy.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # planFingers2D drops the factor one at a time until a finger fits
+        # on the edge. That's the largest factor, no more than the one asked
+        # for, with factor * t <= L; the estimate from L / t can be one out
+        # either way from rounding, so it's checked against the same test.
+        def fits(factor):
+            return numpy.floor(L / (factor * t)) >= 1
+
+        factor = numpy.minimum(f, numpy.floor(L / t).clip(1, None)
+                               .astype(numpy.int64))
+        factor = numpy.where(fits(factor) | (factor == 1), factor,
+                             factor - 1)
+        factor = numpy.where((factor < f) & fits(factor + 1), factor + 1,
+                             factor)
+
+        flen = factor * t
+        fcount = numpy.floor(L / flen)
+        few = fcount < 3
+        # shorten the fingers so there are at least 3.
+        flen = numpy.where(few, L / 3, flen)
+        fcount = numpy.where(few, numpy.floor(L / flen), fcount)
+        even = fcount % 2 == 0
+        # lengthen the fingers so there's one less
+        flen = numpy.where(even, flen + flen / fcount, flen)
+        fcount = numpy.where(even, numpy.floor(L / flen), fcount)
+        offset = (L - fcount * flen) / 2
+
+    return (numpy.where(empty, 0.0, offset), numpy.where(empty, 0.0, flen),
+            numpy.where(empty, 0, fcount).astype(numpy.int64))
+
+
+def _planScalar(edgeLens, thicknesses, factors):
+    edgeLens = list(edgeLens)
+    n = len(edgeLens)
+    if isinstance(thicknesses, (int, float)):
+        thicknesses = [thicknesses] * n
+    if isinstance(factors, (int, float)):
+        factors = [factors] * n
+    if any(t <= 0 for t in thicknesses):
+        raise ValueError('thicknesses must be positive')
+    if any(f != int(f) for f in factors):
+        raise ValueError('finger scales must be whole numbers')
+    if any(int(f) < 1 for f in factors):
+        raise ValueError('finger scales must be at least 1')
+    plans = [fingerplan.planFingers2D(L, t, f)
+             for L, t, f in zip(edgeLens, thicknesses, factors)]
+    return ([p.offset for p in plans], [p.pitch for p in plans],
+            [p.count for p in plans])
+
+
+def plans(offsets, pitches, counts, thicknesses):
+    """Turns the arrays returned by planFingers2DBatch back into a list of
+    FingerPlans."""
+    if isinstance(thicknesses, (int, float)):
+        thicknesses = [thicknesses] * len(offsets)
+    return [fingerplan.FingerPlan(float(o), float(p), int(c), float(t))
+            for o, p, c, t in zip(offsets, pitches, counts, thicknesses)]
@@ -0,0 +1,52 @@
+"""Minimal affine transform helpers. Matrices are 16-element row-major lists,
+the same layout as adsk.core.Matrix3D.asArray(), so a matrix can be pulled out
+of Fusion once and then applied to any number of points in plain Python.
+"""
+
+
+def identity():
+    return [1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0]
+
+
+def fromAxes(origin, xAxis, yAxis, zAxis):
+    """Returns the matrix that maps (1, 0, 0) to xAxis and so on, and the origin
+    to origin."""
+    return [xAxis[0], yAxis[0], zAxis[0], origin[0],
+            xAxis[1], yAxis[1], zAxis[1], origin[1],
+            xAxis[2], yAxis[2], zAxis[2], origin[2],
+            0.0, 0.0, 0.0, 1.0]
+
+
+def multiply(a, b):
+    """Returns a * b, i.e. the transform that applies b and then a."""
+    return [sum(a[r*4 + k] * b[k*4 + c] for k in range(4))
+            for r in range(4) for c in range(4)]
+
+
+def invertRigid(m):
+    """Inverts a transform made up only of a rotation and a translation."""
+    rt = [m[0], m[4], m[8],
+          m[1], m[5], m[9],
+          m[2], m[6], m[10]]
+    t = (m[3], m[7], m[11])
+    return [rt[0], rt[1], rt[2], -(rt[0]*t[0] + rt[1]*t[1] + rt[2]*t[2]),
+            rt[3], rt[4], rt[5], -(rt[3]*t[0] + rt[4]*t[1] + rt[5]*t[2]),
+            rt[6], rt[7], rt[8], -(rt[6]*t[0] + rt[7]*t[1] + rt[8]*t[2]),
+            0.0, 0.0, 0.0, 1.0]
+
+
+def applyPoint(m, p):
+    x, y, z = p
+    return (m[0]*x + m[1]*y + m[2]*z + m[3],
+            m[4]*x + m[5]*y + m[6]*z + m[7],
+            m[8]*x + m[9]*y + m[10]*z + m[11])
+
+
+def applyVector(m, v):
+    x, y, z = v
+    return (m[0]*x + m[1]*y + m[2]*z,
+            m[4]*x + m[5]*y + m[6]*z,
+            m[8]*x + m[9]*y + m[10]*z)
@@ -0,0 +1,45 @@
+"""drawBox builds each panel as one extrude of one notched outline, with no
+combine features. Boxer is run against the stand-in adsk package the
+benchmarks use."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import run as bench  # noqa: E402
+
+boxer = bench.loadBoxer()
+
+
+class DrawBoxTest(unittest.TestCase):
+
+    def testOneOutlinePerPanel(self):
+        for size, drawLid in (((30.0, 20.0, 15.0), True),
+                              ((12.0, 40.0, 7.0), False)):
+            des = bench.newDesign(boxer)
+            inputs = bench.boxInputs(boxer, des, size, 0.3, 5, drawLid)
+            component = boxer.drawBox(inputs).component
+            boxPanels = boxer.spec.specPanels(inputs)
+            extrudes = component.features.extrudeFeatures
+            self.assertEqual([f.name for f in extrudes],
+                             [p.name for p in boxPanels])
+            for feature in extrudes:
+                self.assertEqual(len(list(feature.profile)), 1)
+            self.assertEqual(component.features.combineFeatures.count, 0)
+            self.assertEqual(component.bRepBodies.count, len(boxPanels))
+            # Parallel panels share a sketch, with every edge of their
+            # outline drawn once.
+            outlines = {p.name: p.outline for p in boxPanels}
+            self.assertEqual([sk.name for sk in component.sketches],
+                             ['base', 'front', 'left'])
+            for sk in component.sketches:
+                self.assertEqual(sk.sketchCurves.sketchLines.count,
+                                 len(outlines[sk.name]))
+                self.assertEqual(sk.profiles.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""A box that's been edited has to come out the same as one drawn from scratch
+with the new inputs. Boxer is run against the stand-in adsk package the
+benchmarks use, which keeps the sketch lines, profiles and extrudes Boxer
+makes."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import run as bench  # noqa: E402
+
+boxer = bench.loadBoxer()
+
+SIZE = (60.0, 40.0, 30.0)
+
+
+def rounded(values):
+    return tuple(round(v, 6) for v in values)
+
+
+def snapshot(component):
+    """Returns what a box's component is made of: each sketch's lines and
+    profiles, each extrude's distance, start offset and profiles, and the
+    stored spec."""
+    sketches = {}
+    for sk in component.sketches:
+        lines = set()
+        for line in sk.sketchCurves.sketchLines:
+            a = line.startSketchPoint.geometry
+            b = line.endSketchPoint.geometry
+            lines.add(tuple(sorted([rounded((a.x, a.y)),
+                                    rounded((b.x, b.y))])))
+        sketches[sk.name] = (lines, sorted(rounded(p._bounds)
+                                           for p in sk.profiles))
+    extrudes = {}
+    for feature in component.features.extrudeFeatures:
+        extrudes[feature.name] = (
+            round(feature.extentOne.distance.value, 6),
+            round(feature.startExtent.offset.value, 6),
+            sorted(rounded(p._bounds) for p in feature.profile))
+    attributes = {name: component.attributes.itemByName(
+        boxer.ATTRIBUTE_GROUP, name).value
+        for name in ('spec', 'transform', 'hash')}
+    return sketches, extrudes, attributes
+
+
+class EditBoxTest(unittest.TestCase):
+
+    def draw(self, **fields):
+        des = bench.newDesign(boxer)
+        inputs = bench.boxInputs(boxer, des, SIZE, 0.3, 5)
+        for field, value in fields.items():
+            setattr(inputs, field, value)
+        return boxer.drawBox(inputs).component, inputs
+
+    def checkEdit(self, before, after):
+        component, inputs = self.draw(**before)
+        for field, value in after.items():
+            setattr(inputs, field, value)
+        boxer.editBox(component, inputs)
+        edited = snapshot(component)
+        fresh = snapshot(self.draw(**dict(before, **after))[0])
+        self.assertEqual(edited[0].keys(), fresh[0].keys())
+        for name in fresh[0]:
+            self.assertEqual(edited[0][name], fresh[0][name], name)
+        self.assertEqual(edited[1], fresh[1])
+        self.assertEqual(edited[2], fresh[2])
+
+    def testEdits(self):
+        for after in ({'height': 45.0}, {'length': 90.0}, {'width': 12.5},
+                      {'thickness': 0.6}, {'fingerScale': 2},
+                      {'dimsOuter': False}, {'drawLid': False},
+                      {'length': 20.0, 'height': 10.0, 'thickness': 0.4}):
+            with self.subTest(**after):
+                self.checkEdit({}, after)
+
+    def testAddLid(self):
+        self.checkEdit({'drawLid': False}, {'drawLid': True})
+
+    def testNoChange(self):
+        self.checkEdit({}, {})
+
+    def testRetargetIdenticalBoxes(self):
+        component, inputs = self.draw()
+        other = boxer.drawBox(inputs).component
+        inputs.height = 20.0
+        boxer.retargetBoxes([component, other, component], inputs)
+        self.assertEqual(snapshot(component), snapshot(other))
+        self.assertEqual(snapshot(component)[1],
+                         snapshot(self.draw(height=20.0)[0])[1])
+
+    def testIdenticalBoxes(self):
+        component, inputs = self.draw()
+        other = boxer.drawBox(inputs).component
+        inputs.fastSolid = True
+        solid = boxer.drawBox(inputs).component
+        inputs.fastSolid = False
+        inputs.height = 20.0
+        boxes, skipped = boxer.identicalBoxes(component, inputs)
+        self.assertEqual(boxes, [other])
+        self.assertEqual(len(skipped), 1)
+        self.assertIs(skipped[0][0], solid)
+        self.assertIn('fast solids', skipped[0][1])
+
+    def testCantEdit(self):
+        component, inputs = self.draw(fastSolid=True)
+        inputs.height = 20.0
+        with self.assertRaisesRegex(ValueError, 'fast solids'):
+            boxer.editBox(component, inputs)
+        component, inputs = self.draw()
+        inputs.dividersX = 2
+        self.assertIsNotNone(boxer.editProblem(component, inputs))
+        with self.assertRaises(ValueError):
+            boxer.retargetBoxes([component], inputs)
+
+
+if __name__ == '__main__':
+    unittest.main()
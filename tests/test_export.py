@@ -0,0 +1,113 @@
+"""FileWriter gives every file its own name, gzips files if asked, and records
+each one in the manifest. Exporting the boxes in a design writes each panel's
+cuts once; that's run against the stand-in adsk package the benchmarks use."""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from boxerlib import export
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import run as bench  # noqa: E402
+
+boxer = bench.loadBoxer()
+
+
+class FileWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.staging = os.path.join(self.folder, 'staging')
+        self.out = os.path.join(self.folder, 'out')
+        os.mkdir(self.staging)
+        os.mkdir(self.out)
+        self.staged = 0
+
+    def stage(self, text):
+        self.staged += 1
+        path = os.path.join(self.staging, str(self.staged))
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def testNames(self):
+        self.assertEqual(export.fileName('Box 1', 'lid'), 'Box_1-lid.dxf')
+        self.assertEqual(export.fileName('a/b:c', '', ext='.svg'),
+                         'a_b_c-.svg')
+        writer = export.FileWriter(self.out)
+        with writer:
+            names = [writer.fileName('box', 'front') for _ in range(3)]
+        self.assertEqual(names, ['box-front.dxf', 'box-front-2.dxf',
+                                 'box-front-3.dxf'])
+
+    def testWrite(self):
+        with export.FileWriter(self.out) as writer:
+            for i in range(10):
+                writer.submit(self.stage('panel {}'.format(i)),
+                              writer.fileName('box', 'front'), {'index': i})
+        self.assertEqual([e['index'] for e in writer.entries], list(range(10)))
+        for i, entry in enumerate(writer.entries):
+            with open(os.path.join(self.out, entry['file'])) as f:
+                self.assertEqual(f.read(), 'panel {}'.format(i))
+            self.assertEqual(entry['bytes'], len('panel {}'.format(i)))
+            self.assertGreaterEqual(entry['writeSeconds'], 0)
+        self.assertEqual(len(os.listdir(self.out)), 10)
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def testCompress(self):
+        with export.FileWriter(self.out, compress=True) as writer:
+            writer.submit(self.stage('panel'), 'box-lid.dxf', {})
+        entry, = writer.entries
+        self.assertEqual(entry['file'], 'box-lid.dxf.gz')
+        path = os.path.join(self.out, entry['file'])
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(f.read(), 'panel')
+        self.assertEqual(entry['bytes'], os.path.getsize(path))
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def testErrors(self):
+        writer = export.FileWriter(self.out)
+        writer.submit(os.path.join(self.staging, 'missing'), 'box.dxf', {})
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def testManifest(self):
+        entries = [{'file': 'box-lid.dxf', 'bytes': 10}]
+        manifest = export.writeManifest(self.out, entries, units='cm')
+        with open(os.path.join(self.out, export.MANIFEST_NAME)) as f:
+            self.assertEqual(json.load(f), manifest)
+        self.assertEqual(manifest, {'units': 'cm', 'files': entries})
+
+
+class ExportBoxesTest(unittest.TestCase):
+
+    def testLines(self):
+        des = bench.newDesign(boxer)
+        boxer.boxIndex = None
+        inputs = bench.boxInputs(boxer, des, (60.0, 40.0, 30.0), 0.3, 5)
+        component = boxer.drawBox(inputs).component
+        with tempfile.TemporaryDirectory() as folder:
+            manifest = boxer.exportBoxes(folder)
+            self.assertEqual(sorted(e['panel'] for e in manifest['files']),
+                             sorted(boxer.panels.PANEL_NAMES))
+            for entry in manifest['files']:
+                with open(os.path.join(folder, entry['file'])) as f:
+                    lines = f.read().splitlines()
+                # The stand-in's panels are plain rectangles, and each edge
+                # is written once.
+                self.assertEqual(lines.count('LINE'), 4, entry['panel'])
+        # The flat sketches are deleted once they've been saved.
+        self.assertEqual([sk.name for sk in component.sketches
+                          if sk.name.endswith('Flat')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
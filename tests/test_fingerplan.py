@@ -0,0 +1,71 @@
+"""Finger plans have an odd number of slots, centred on the edge, so the
+fingers at both ends of an edge are the same."""
+
+import unittest
+
+from boxerlib import fingerplan
+
+
+class PlanFingers2DTest(unittest.TestCase):
+
+    def testPlansAreOddAndCentred(self):
+        for edge in (0.9, 1.0, 2.5, 7.3, 10.0, 33.3, 100.0):
+            for t in (0.1, 0.3, 0.6):
+                for factor in (1, 3, 5, 12):
+                    plan = fingerplan.planFingers2D(edge, t, factor)
+                    if plan.count == 0:
+                        self.assertGreater(3 * t, edge)
+                        continue
+                    self.assertEqual(plan.count % 2, 1)
+                    self.assertGreaterEqual(plan.count, 3)
+                    self.assertAlmostEqual(
+                        2 * plan.offset + plan.count * plan.pitch, edge)
+                    self.assertGreaterEqual(plan.offset, -1e-12)
+                    self.assertEqual(plan.thickness, t)
+
+    def testFingerLength(self):
+        plan = fingerplan.planFingers2D(100.0, 0.5, 4)
+        # About factor times the thickness, lengthened to keep the count odd.
+        self.assertGreaterEqual(plan.pitch, 2.0)
+        self.assertLess(plan.pitch, 4.0)
+
+    def testShortEdges(self):
+        self.assertEqual(fingerplan.planFingers2D(0.5, 0.3),
+                         fingerplan.emptyPlan(0.3))
+        plan = fingerplan.planFingers2D(1.0, 0.3, 10)
+        self.assertEqual(plan.count, 3)
+        self.assertAlmostEqual(plan.pitch, 1.0 / 3)
+
+    def testWholeFactors(self):
+        self.assertEqual(fingerplan.planFingers2D(10.0, 0.3, 2.0),
+                         fingerplan.planFingers2D(10.0, 0.3, 2))
+        with self.assertRaises(ValueError):
+            fingerplan.planFingers2D(10.0, 0.3, 2.9)
+        self.assertEqual(fingerplan.checkFactor(3.0), 3)
+        self.assertIsInstance(fingerplan.checkFactor(3.0), int)
+
+    def testSpansAreTheOddSlots(self):
+        plan = fingerplan.planFingers2D(10.0, 0.3, 5)
+        spans = fingerplan.fingerSpans(plan)
+        self.assertEqual(len(spans), plan.count // 2)
+        for i, (start, end) in enumerate(spans):
+            self.assertAlmostEqual(start,
+                                   plan.offset + (2 * i + 1) * plan.pitch)
+            self.assertAlmostEqual(end - start, plan.pitch)
+        rects = fingerplan.fingerRects(plan)
+        self.assertEqual(rects, [(0.0, a, 0.3, b) for a, b in spans])
+        self.assertEqual(fingerplan.swapXY(rects),
+                         [(a, 0.0, b, 0.3) for a, b in spans])
+
+    def testPlanFingers(self):
+        plan = fingerplan.planFingers(20.0, 0.3)
+        self.assertEqual(plan.count % 2, 1)
+        self.assertAlmostEqual(2 * plan.offset + plan.count * plan.pitch, 20.0)
+        # The fingers stay clear of the other body's material.
+        self.assertGreaterEqual(plan.offset, 0.3 - 1e-12)
+        with self.assertRaises(ValueError):
+            fingerplan.planFingers(2.0, 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""A Job hands back every result it computes, and stops when it's cancelled or
+its function fails."""
+
+import threading
+import time
+import unittest
+
+from boxerlib import jobs
+
+
+def collect(job, timeout=0):
+    results = []
+    while not job.finished:
+        results += job.ready(timeout)
+    return results
+
+
+class JobTest(unittest.TestCase):
+
+    def testResults(self):
+        notified = []
+        job = jobs.Job(lambda x: x * x, range(5),
+                       lambda: notified.append(1)).start()
+        self.assertEqual(collect(job, 0.01), [(i, i * i) for i in range(5)])
+        self.assertIsNone(job.error)
+        # Once for each result, and once more at the end.
+        self.assertEqual(len(notified), 6)
+
+    def testWait(self):
+        go = threading.Event()
+        job = jobs.Job(lambda x: go.wait() and x, [1]).start()
+        start = time.perf_counter()
+        self.assertEqual(job.ready(0.05), [])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+        go.set()
+        self.assertEqual(collect(job, 1.0), [(0, 1)])
+
+    def testCancel(self):
+        started = threading.Event()
+        go = threading.Event()
+
+        def square(x):
+            started.set()
+            go.wait()
+            return x * x
+        job = jobs.Job(square, range(10)).start()
+        started.wait()
+        job.cancel()
+        go.set()
+        self.assertEqual(collect(job, 0.01), [(0, 0)])
+
+    def testError(self):
+        job = jobs.Job(lambda x: 1 / x, [1, 0, 2]).start()
+        self.assertEqual(collect(job, 0.01), [(0, 1.0)])
+        self.assertIn('ZeroDivisionError', job.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""The joint check passes every box Boxer plans, and catches plans that have
+been broken on purpose."""
+
+import random
+import unittest
+from unittest import mock
+
+from boxerlib import jointcheck, panels, spec
+
+
+def box(**fields):
+    return panels.boxPanels(**dict(dict(
+        length=30, width=20, height=15, thickness=0.3, drawLid=True,
+        fingerScale=5), **fields))
+
+
+def replace(boxPanels, name, **fields):
+    """Returns boxPanels with the named panel's fields replaced."""
+    return tuple(p._replace(**fields) if p.name == name else p
+                 for p in boxPanels)
+
+
+def kinds(problems):
+    return set((p.a, p.b, p.kind) for p in problems)
+
+
+class SoundBoxTest(unittest.TestCase):
+
+    def testBoxes(self):
+        for fields in ({}, {'drawLid': False}, {'dimsOuter': False},
+                       {'fingerScale': 1}, {'fingerScale': 12},
+                       {'thickness': 1.8, 'height': 6},
+                       {'dividersX': 3, 'dividersY': 2},
+                       {'drawLid': False, 'dividersY': 1},
+                       {'hinges': ('front', 'lid')}):
+            self.assertEqual(jointcheck.checkJoints(box(**fields)), [],
+                             fields)
+
+    def testRandomBoxes(self):
+        specs = [jointcheck.randomSpec(random.Random(i)) for i in range(50)]
+        checked, skipped, bad, shown = jointcheck.checkSpecs(specs + specs)
+        self.assertEqual(checked + skipped, 100)
+        self.assertEqual((bad, shown), (0, []))
+        self.assertEqual(jointcheck.checkRandom(1, 0, 20)[2], 0)
+
+    def testCheckPlan(self):
+        jointcheck.clearPlanCache()
+        boxSpec = spec.BoxSpec(30, 20, 15, 0.3, True, 5, True, 0, 0, (), None)
+        boxPanels = spec.specPanels(boxSpec)
+        self.assertEqual(jointcheck.checkPlan(boxSpec, boxPanels), ())
+        # The result is remembered by the spec's signature, so the panels
+        # aren't looked at again.
+        broken = replace(boxPanels, 'front', tabs=())
+        self.assertEqual(jointcheck.checkPlan(boxSpec, broken), ())
+        self.assertNotEqual(jointcheck.checkPlan(boxSpec, broken, 1e-6), ())
+        jointcheck.clearPlanCache()
+        self.assertNotEqual(jointcheck.checkPlan(boxSpec, broken), ())
+
+
+class BrokenBoxTest(unittest.TestCase):
+
+    def testShiftedTab(self):
+        boxPanels = box()
+        u1, v1, u2, v2 = boxPanels[0].tabs[0]
+        tabs = ((u1 + 0.1, v1, u2 + 0.1, v2),) + boxPanels[0].tabs[1:]
+        problems = jointcheck.checkJoints(
+            replace(boxPanels, 'base', tabs=tabs))
+        self.assertEqual(kinds(problems), {('base', 'front', 'overlap'),
+                                           ('base', 'front', 'gap')})
+        for p in problems:
+            self.assertEqual(p.axis, 0)
+            self.assertAlmostEqual(p.end - p.start, 0.1)
+
+    def testShortTab(self):
+        boxPanels = box()
+        u1, v1, u2, v2 = boxPanels[0].tabs[0]
+        tabs = ((u1, v1 + 0.1, u2, v2),) + boxPanels[0].tabs[1:]
+        problems = jointcheck.checkJoints(
+            replace(boxPanels, 'base', tabs=tabs))
+        self.assertEqual(kinds(problems), {('base', 'front', 'partial')})
+        self.assertAlmostEqual(problems[0].start, u1)
+        self.assertAlmostEqual(problems[0].end, u2)
+
+    def testMissingNotch(self):
+        boxPanels = box()
+        front = boxPanels[2]
+        problems = jointcheck.checkJoints(
+            replace(boxPanels, 'front', notches=front.notches[1:]))
+        self.assertEqual(kinds(problems), {('base', 'front', 'overlap')})
+
+    def testMissingTabs(self):
+        boxPanels = box()
+        front = boxPanels[2]
+        problems = jointcheck.checkJoints(
+            replace(boxPanels, 'front', tabs=front.tabs[1:]))
+        self.assertEqual(kinds(problems), {('front', 'right', 'gap')})
+        # Without any tabs, the front only touches the sides.
+        problems = jointcheck.checkJoints(replace(boxPanels, 'front', tabs=()))
+        self.assertEqual(kinds(problems), {('front', 'left', 'gap'),
+                                           ('front', 'right', 'gap')})
+
+    def testParallelPanels(self):
+        boxPanels = box()
+        problems = jointcheck.checkJoints(
+            replace(boxPanels, 'lid', offset=boxPanels[0].offset + 0.1))
+        self.assertIn(('base', 'lid', 'overlap'), kinds(problems))
+
+    def testTolerance(self):
+        boxPanels = box()
+        u1, v1, u2, v2 = boxPanels[0].tabs[0]
+        tabs = ((u1 + 1e-6, v1, u2 + 1e-6, v2),) + boxPanels[0].tabs[1:]
+        broken = replace(boxPanels, 'base', tabs=tabs)
+        self.assertNotEqual(jointcheck.checkJoints(broken), [])
+        self.assertEqual(jointcheck.checkJoints(broken, 1e-5), [])
+
+    def testDescribe(self):
+        problem = jointcheck.Problem('base', 'front', 'gap', 0, 1.0, 1.5)
+        self.assertEqual(jointcheck.describe(problem),
+                         'The base and front leave a gap from x = 1 to 1.5.')
+
+    def testBrokenSpecsAreShown(self):
+        broken = spec.BoxSpec(30, 20, 15, 0.3, True, 5, True, 0, 0, (), None)
+        moved = replace(spec.specPanels(broken), 'left', offset=1.0)
+        with mock.patch.object(spec, 'specPanels', return_value=moved):
+            checked, skipped, bad, shown = jointcheck.checkSpecs(
+                [broken, broken], show=1)
+        self.assertEqual((checked, skipped, bad), (2, 0, 2))
+        self.assertEqual(shown[0][0], broken)
+        self.assertIn(('base', 'left', 'overlap'), kinds(shown[0][1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Nested panels stay on their sheets, gap in from the edges, and gap apart
+from each other."""
+
+import random
+import unittest
+
+from boxerlib import nesting
+
+EPSILON = 1e-9
+
+
+class NestTest(unittest.TestCase):
+
+    def check(self, sizes, sheetWidth, sheetHeight, gap, rotate=True):
+        placements = nesting.nest(sizes, sheetWidth, sheetHeight, gap, rotate)
+        self.assertEqual(len(placements), len(sizes))
+        for (w, h), p in zip(sizes, placements):
+            if p.rotated:
+                w, h = h, w
+            self.assertAlmostEqual(p.width, w)
+            self.assertAlmostEqual(p.height, h)
+            if not rotate:
+                self.assertFalse(p.rotated)
+            self.assertGreaterEqual(p.x, gap - EPSILON)
+            self.assertGreaterEqual(p.y, gap - EPSILON)
+            self.assertLessEqual(p.x + p.width, sheetWidth - gap + EPSILON)
+            self.assertLessEqual(p.y + p.height, sheetHeight - gap + EPSILON)
+        for i, a in enumerate(placements):
+            for b in placements[i + 1:]:
+                if a.sheet != b.sheet:
+                    continue
+                apart = (a.x + a.width + gap <= b.x + EPSILON or
+                         b.x + b.width + gap <= a.x + EPSILON or
+                         a.y + a.height + gap <= b.y + EPSILON or
+                         b.y + b.height + gap <= a.y + EPSILON)
+                self.assertTrue(apart, (a, b))
+        return placements
+
+    def testRandom(self):
+        rng = random.Random(7)
+        for gap in (0.0, 0.3):
+            sizes = [(rng.uniform(1, 30), rng.uniform(1, 20))
+                     for _ in range(200)]
+            placements = self.check(sizes, 60, 40, gap)
+            self.assertGreater(nesting.utilization(placements, 60, 40), 0.5)
+            self.check(sizes, 60, 40, gap, rotate=False)
+
+    def testBoxPanels(self):
+        # Lots of panels in a few sizes, as from a batch of boxes.
+        sizes = [(30, 20), (30, 15), (20, 15)] * 2 * 20
+        placements = self.check(sizes, 60, 40, 0.5)
+        area = sum(w * h for w, h in sizes)
+        self.assertLess(nesting.sheetCount(placements), 2 * area / (60 * 40))
+
+    def testRotatesToFit(self):
+        placements = self.check([(10, 50)], 60, 40, 0.0)
+        self.assertTrue(placements[0].rotated)
+
+    def testTooBig(self):
+        with self.assertRaises(ValueError):
+            nesting.nest([(10, 50)], 60, 40, rotate=False)
+        with self.assertRaises(ValueError):
+            nesting.nest([(60, 40)], 60, 40, gap=0.1)
+        self.assertEqual(nesting.sheetCount([]), 0)
+        self.assertEqual(nesting.utilization([], 60, 40), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
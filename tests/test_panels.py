@@ -0,0 +1,90 @@
+"""The panels of a box fill its outside dimensions, and each panel's outline is
+its core plus its tabs, less its notches."""
+
+import unittest
+
+from boxerlib import panels
+
+
+def area(rect):
+    u1, v1, u2, v2 = rect
+    return (u2 - u1) * (v2 - v1)
+
+
+def outlineArea(outline):
+    """The shoelace area of a closed outline; positive if it runs
+    counter-clockwise."""
+    n = len(outline)
+    return sum(outline[i][0] * outline[(i + 1) % n][1] -
+               outline[(i + 1) % n][0] * outline[i][1]
+               for i in range(n)) / 2
+
+
+def bounds(boxPanels):
+    """The box around all of the panels, tabs and all."""
+    lo = [float('inf')] * 3
+    hi = [float('-inf')] * 3
+    for panel in boxPanels:
+        for u, v in panel.outline:
+            for w in (panel.offset, panel.offset + panel.thickness):
+                p = panels.toBox(panel, u, v, w)
+                lo = [min(a, b) for a, b in zip(lo, p)]
+                hi = [max(a, b) for a, b in zip(hi, p)]
+    return lo, hi
+
+
+class BoxPanelsTest(unittest.TestCase):
+
+    def testNames(self):
+        names = [p.name for p in panels.boxPanels(30, 20, 15, 0.3, True, 5)]
+        self.assertEqual(names, list(panels.PANEL_NAMES))
+        names = [p.name for p in panels.boxPanels(30, 20, 15, 0.3, False, 5,
+                                                  dividersX=2, dividersY=1)]
+        self.assertEqual(names, ['base', 'front', 'back', 'left', 'right',
+                                 'dividerX1', 'dividerX2', 'dividerY1'])
+
+    def testOuterDimensions(self):
+        for drawLid in (True, False):
+            lo, hi = bounds(panels.boxPanels(30, 20, 15, 0.3, drawLid, 5))
+            for a, b in zip(lo + hi, [0, 0, 0, 30, 20, 15]):
+                self.assertAlmostEqual(a, b)
+        outer = panels.outerDimensions(30, 20, 15, 0.3, True, False)
+        lo, hi = bounds(panels.boxPanels(30, 20, 15, 0.3, True, 5, False))
+        for a, b, c in zip(outer, hi, (30.6, 20.6, 15.6)):
+            self.assertAlmostEqual(a, c)
+            self.assertAlmostEqual(b, c)
+
+    def testOutlines(self):
+        for boxPanels in (panels.boxPanels(30, 20, 15, 0.3, True, 5),
+                          panels.boxPanels(12, 40, 7, 0.6, False, 2),
+                          panels.boxPanels(30, 20, 15, 0.3, True, 3,
+                                           dividersX=2, dividersY=2)):
+            for p in boxPanels:
+                expected = (area(p.core) + sum(map(area, p.tabs)) -
+                            sum(map(area, p.notches)))
+                self.assertAlmostEqual(outlineArea(p.outline), expected,
+                                       msg=p.name)
+                for hole in p.holes:
+                    u1, v1, u2, v2 = hole
+                    c1, d1, c2, d2 = p.core
+                    self.assertTrue(c1 <= u1 < u2 <= c2 and
+                                    d1 <= v1 < v2 <= d2, p.name)
+
+    def testHinges(self):
+        plain = panels.boxPanels(30, 20, 15, 0.3, True, 5)
+        hinged = panels.boxPanels(30, 20, 15, 0.3, True, 5,
+                                  hinges=('front', 'nonsense'))
+        for a, b in zip(plain, hinged):
+            self.assertEqual(a._replace(slits=()), b._replace(slits=()))
+            self.assertEqual(bool(b.slits), b.name == 'front')
+        c1, d1, c2, d2 = hinged[2].core
+        for u1, v1, u2, v2 in hinged[2].slits:
+            self.assertTrue(c1 < u1 < u2 < c2 and d1 < v1 < v2 < d2)
+
+    def testMemoized(self):
+        self.assertIs(panels.boxPanels(30, 20, 15, 0.3, True, 5),
+                      panels.boxPanels(30.0, 20.0, 15.0, 0.3, 1, 5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
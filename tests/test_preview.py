@@ -0,0 +1,58 @@
+"""The preview follows the dialog's inputs, and goes away when they stop
+being valid. Boxer is run against the stand-in adsk package the benchmarks
+use."""
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import run as bench  # noqa: E402
+
+boxer = bench.loadBoxer()
+
+
+class PreviewTest(unittest.TestCase):
+
+    def preview(self, handler, inputs):
+        handler.session.inputs = inputs
+        handler.session.changed = set()
+        # As if every input had changed, so every rule is checked again.
+        handler.session.unvalidated = None
+        args = types.SimpleNamespace(
+            command=types.SimpleNamespace(commandInputs=None),
+            isValidResult=True)
+        handler.notify(args)
+        return args.isValidResult
+
+    def testPreview(self):
+        des = bench.newDesign(boxer)
+        groups = des.rootComponent.customGraphicsGroups
+        handler = boxer.BoxerCommandPreviewHandler(boxer.BoxerSession())
+        inputs = bench.boxInputs(boxer, des, (30.0, 20.0, 15.0), 0.3, 5)
+        # The preview is only graphics; the box is built on execute.
+        self.assertFalse(self.preview(handler, inputs))
+        self.assertEqual(groups.count, 1)
+        first = boxer.previewGraphics
+        self.preview(handler, inputs)
+        self.assertIs(boxer.previewGraphics, first)
+
+        changed = bench.boxInputs(boxer, des, (30.0, 20.0, 25.0), 0.3, 5)
+        self.preview(handler, changed)
+        self.assertFalse(first.isValid)
+        self.assertEqual(groups.count, 1)
+
+        invalid = bench.boxInputs(boxer, des, (30.0, 20.0, 15.0), 20.0, 5)
+        self.preview(handler, invalid)
+        self.assertIsNone(boxer.previewGraphics)
+        self.assertEqual(groups.count, 0)
+
+        self.preview(handler, changed)
+        self.assertEqual(groups.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""uniqueSegments draws every piece of every edge exactly once."""
+
+import unittest
+
+from boxerlib import segments
+
+
+def total(segs):
+    return sum(abs(b[0] - a[0]) + abs(b[1] - a[1]) for a, b in segs)
+
+
+class UniqueSegmentsTest(unittest.TestCase):
+
+    def assertNoOverlaps(self, segs):
+        for i, (a, b) in enumerate(segs):
+            for c, d in segs[i + 1:]:
+                if a[1] == b[1] == c[1] == d[1]:
+                    lo = max(min(a[0], b[0]), min(c[0], d[0]))
+                    hi = min(max(a[0], b[0]), max(c[0], d[0]))
+                    self.assertLessEqual(hi, lo, (a, b, c, d))
+                elif a[0] == b[0] == c[0] == d[0]:
+                    lo = max(min(a[1], b[1]), min(c[1], d[1]))
+                    hi = min(max(a[1], b[1]), max(c[1], d[1]))
+                    self.assertLessEqual(hi, lo, (a, b, c, d))
+
+    def testSharedEdge(self):
+        rects = [(0, 0, 1, 1), (1, 0, 2, 1)]
+        segs = segments.uniqueSegments(
+            [s for r in rects for s in segments.rectSegments(r)])
+        self.assertNoOverlaps(segs)
+        self.assertEqual(len(segs), 7)
+        self.assertAlmostEqual(total(segs), 7)
+
+    def testFingerOnPanel(self):
+        # A finger sticking out of the middle of a panel's edge splits the
+        # edge where it starts and ends.
+        rects = [(0, 0, 10, 5), (4, 5, 6, 6)]
+        segs = segments.uniqueSegments(
+            [s for r in rects for s in segments.rectSegments(r)])
+        self.assertNoOverlaps(segs)
+        # The bottom of the finger is the same line as the top of the panel.
+        self.assertAlmostEqual(total(segs), 30 + 4)
+        self.assertIn(((4, 5), (6, 5)), segs)
+        self.assertIn(((0, 5), (4, 5)), segs)
+
+    def testNoiseAndDuplicates(self):
+        segs = segments.uniqueSegments([
+            ((0, 0), (1, 1)), ((1, 1), (0, 0)), ((0, 0), (0, 0)),
+            ((0, 0), (2, 0)), ((2 + 1e-12, 0), (1, 0))])
+        self.assertEqual(sorted(segs), [((0, 0), (1, 0)), ((0, 0), (1, 1)),
+                                        ((1, 0), (2, 0))])
+
+    def testOutlineSegments(self):
+        outline = [(0, 0), (1, 0), (1, 1)]
+        self.assertEqual(segments.outlineSegments(outline),
+                         [((0, 0), (1, 0)), ((1, 0), (1, 1)),
+                          ((1, 1), (0, 0))])
+        self.assertEqual(segments.offsetRects([(0, 0, 1, 2)], 1, -1),
+                         [(1, -1, 2, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Spec hashes are stored with every box Boxer draws, so they have to stay the
+same from one version to the next. Spec files are read into BoxSpecs, and
+every box in one is checked before any are built."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from boxerlib import spec
+
+
+def boxSpec(**fields):
+    values = dict(spec.DEFAULTS, length=30.0, width=20.0, height=15.0,
+                  thickness=0.6)
+    values.update(fields)
+    return spec.BoxSpec(position=None, **values)
+
+
+class SpecHashTest(unittest.TestCase):
+
+    def testKnownHashes(self):
+        # Worked out when hashes were first stored; boxes drawn then still
+        # have these.
+        self.assertEqual(
+            spec.specHash(spec.BoxSpec(10.0, 8.0, 5.0, 0.3, True, 5, True, 0,
+                                       0, (), None)),
+            '0d67153fb1772d51')
+        self.assertEqual(
+            spec.specHash(boxSpec(drawLid=False, fingerScale=3,
+                                  dimsOuter=False, dividersX=2,
+                                  dividersY=1)),
+            '37aeb22740114996')
+
+    def testHinges(self):
+        plain = spec.specHash(boxSpec())
+        self.assertEqual(spec.specHash(boxSpec(hinges=['nonsense'])), plain)
+        self.assertNotEqual(spec.specHash(boxSpec(hinges=('lid',))), plain)
+        self.assertEqual(spec.specHash(boxSpec(hinges=('lid', 'base'))),
+                         spec.specHash(boxSpec(hinges=['base', 'lid'])))
+
+
+class SignatureTest(unittest.TestCase):
+
+    def testNormalized(self):
+        self.assertEqual(
+            spec.signature(boxSpec()),
+            spec.signature(boxSpec(length='30', width=20 + 1e-12,
+                                   drawLid=0, fingerScale=5.0)))
+        self.assertNotEqual(spec.signature(boxSpec()),
+                            spec.signature(boxSpec(length=30.001)))
+
+    def testGroupSpecs(self):
+        specs = [boxSpec(), boxSpec(height=5.0), boxSpec(length=30.0)]
+        self.assertEqual(spec.groupSpecs(specs), [[0, 2], [1]])
+
+
+class SpecFileTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def write(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def testCsv(self):
+        path = self.write('boxes.csv', 'length,width,height,thickness,'
+                          'drawLid,hinges,x\n'
+                          '3,2,1.5,0.06,yes,lid+front,\n'
+                          '4,3,2,0.06,,,10\n')
+        first, second = spec.loadSpecs(path, scale=10)
+        self.assertEqual(first, boxSpec(drawLid=True,
+                                        hinges=('lid', 'front')))
+        self.assertEqual(second.length, 40.0)
+        self.assertEqual(second.drawLid, False)
+        self.assertEqual(second.position, (100.0, 0.0, 0.0))
+
+    def testJson(self):
+        path = self.write('boxes.json', json.dumps(
+            [spec.specToDict(boxSpec(dividersX=2))]))
+        self.assertEqual(spec.loadSpecs(path), [boxSpec(dividersX=2)])
+
+    def testErrors(self):
+        path = self.write('boxes.csv', 'length,width,height\n1,2,3\n')
+        with self.assertRaisesRegex(ValueError, 'line 2: missing thickness'):
+            spec.loadSpecs(path)
+        path = self.write('boxes.json', '[{}, 3]')
+        with self.assertRaisesRegex(ValueError,
+                                    'box 1: missing length\nbox 2: '):
+            spec.loadSpecs(path)
+        path = self.write('boxes.json', '{}')
+        with self.assertRaises(ValueError):
+            spec.loadSpecs(path)
+        path = self.write('boxes.txt', '')
+        with self.assertRaises(ValueError):
+            spec.loadSpecs(path)
+
+    def testChecked(self):
+        path = self.write('boxes.csv', 'length,width,height,thickness,hinges\n'
+                          '30,20,15,0.6,\n'
+                          '30,20,15,0.6,handle\n'
+                          '30,20,1,0.6,\n'
+                          '30,20,15,0.6,front\n')
+        with self.assertRaises(ValueError) as raised:
+            spec.loadSpecs(path)
+        lines = str(raised.exception).splitlines()
+        self.assertEqual(lines[0], path + ':')
+        # An unknown hinge is reported, not dropped, and every bad box is
+        # listed rather than just the first.
+        self.assertTrue(lines[1].startswith('line 3: '), lines[1])
+        self.assertIn('not the handle', lines[1])
+        self.assertTrue(lines[2].startswith('line 4: '), lines[2])
+        self.assertIn('height', lines[2])
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(len(spec.loadSpecs(path, check=False)), 4)
+
+    def testManyErrors(self):
+        path = self.write('boxes.csv', 'length,width,height,thickness\n' +
+                          '30,20,15,0\n' * 30)
+        with self.assertRaises(ValueError) as raised:
+            spec.loadSpecs(path)
+        lines = str(raised.exception).splitlines()
+        self.assertEqual(len(lines), spec.MAX_ERRORS + 2)
+        self.assertEqual(lines[-1], 'and 10 more')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Contours are cut inside out, and every contour is cut exactly once."""
+
+import random
+import unittest
+
+from boxerlib import panels, toolpath
+
+
+def contours():
+    """The outlines and holes of a box's panels, laid out in a row."""
+    result = []
+    x = 0.0
+    for p in panels.boxPanels(30, 20, 15, 0.3, True, 5, dividersX=2,
+                              dividersY=1):
+        outlines = [p.outline] + [panels.holeOutline(h) for h in p.holes]
+        result += [[(u + x, v) for u, v in c] for c in outlines]
+        x += p.core[2] + 2.0
+    return result
+
+
+def canonical(contour):
+    """The contour rotated to start at its lowest point, so that the same
+    contour started anywhere compares equal."""
+    i = contour.index(min(contour))
+    return tuple(contour[i:] + contour[:i])
+
+
+class OrderContoursTest(unittest.TestCase):
+
+    def testOrder(self):
+        original = contours()
+        shuffled = list(original)
+        random.Random(3).shuffle(shuffled)
+        ordered = toolpath.orderContours(shuffled)
+        self.assertEqual(sorted(map(canonical, ordered)),
+                         sorted(map(canonical, original)))
+        for i, c in enumerate(ordered):
+            for outer in ordered[:i]:
+                # Nothing is cut after the contour around it.
+                self.assertFalse(toolpath.containsPoint(outer, c[0]))
+        self.assertLess(toolpath.measure(ordered).travel,
+                        toolpath.measure(shuffled).travel)
+        self.assertAlmostEqual(toolpath.measure(ordered).cutLength,
+                               toolpath.measure(shuffled).cutLength)
+
+    def testContainsPoint(self):
+        square = [(0, 0), (2, 0), (2, 2), (0, 2)]
+        self.assertTrue(toolpath.containsPoint(square, (1, 1)))
+        self.assertFalse(toolpath.containsPoint(square, (3, 1)))
+        self.assertAlmostEqual(toolpath.contourLength(square), 8)
+        self.assertEqual(toolpath.orderContours([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
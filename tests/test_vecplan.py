@@ -0,0 +1,65 @@
+"""The batched finger planner has to give exactly the same plans as
+planFingers2D, edge for edge. The NumPy planner is only checked when NumPy is
+installed."""
+
+import math
+import random
+import unittest
+
+from boxerlib import fingerplan, vecplan
+
+
+def edges(count=20000, seed=1):
+    """Returns (length, thickness, factor) edges: random ones, and ones at
+    and either side of the lengths where a plan changes."""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        t = rng.choice((0.1, 0.3, 0.6, 1.0, 1.8, rng.uniform(0.05, 3)))
+        result.append((rng.uniform(0, 200 * t), t, rng.randint(1, 12)))
+    for t in (0.1, 0.3, 0.6, 1.8):
+        for f in range(1, 13):
+            for n in range(0, 60):
+                edge = n * t
+                result += [(edge, t, f), (math.nextafter(edge, 0), t, f),
+                           (math.nextafter(edge, math.inf), t, f)]
+    return result
+
+
+class BatchPlanTest(unittest.TestCase):
+
+    def check(self, planner):
+        cases = edges()
+        lengths, thicknesses, factors = [list(c) for c in zip(*cases)]
+        batch = vecplan.plans(*planner(lengths, thicknesses, factors),
+                              thicknesses)
+        for plan, edge in zip(batch, cases):
+            self.assertEqual(plan, fingerplan.planFingers2D(*edge), edge)
+
+    @unittest.skipIf(vecplan.numpy is None, 'NumPy is not installed')
+    def testNumpyMatchesScalar(self):
+        self.check(vecplan.planFingers2DBatch)
+
+    def testFallbackMatchesScalar(self):
+        self.check(vecplan._planScalar)
+
+    @unittest.skipIf(vecplan.numpy is None, 'NumPy is not installed')
+    def testSingleValues(self):
+        offsets, pitches, counts = vecplan.planFingers2DBatch(
+            [10.0, 20.0, 0.5], 0.3, 5)
+        for i, edge in enumerate((10.0, 20.0, 0.5)):
+            plan = fingerplan.planFingers2D(edge, 0.3, 5)
+            self.assertEqual((offsets[i], pitches[i], counts[i]),
+                             plan[:3])
+
+    def testBadArguments(self):
+        with self.assertRaises(ValueError):
+            vecplan.planFingers2DBatch([10.0], [0.0])
+        with self.assertRaises(ValueError):
+            vecplan.planFingers2DBatch([10.0], [0.3], [0])
+        with self.assertRaises(ValueError):
+            vecplan.planFingers2DBatch([10.0], [0.3], [2.5])
+
+
+if __name__ == '__main__':
+    unittest.main()